@@ -0,0 +1,102 @@
+"""
+对冲请求基准测试
+在本地启动一个模拟视频页的HTTP服务，其中一部分请求随机变慢(模拟长尾)，
+按批次获取视频页，对比不对冲与开启 HedgePolicy 时的总耗时、批次耗时分位数与对冲次数
+
+用法:
+    python bench_hedging.py                          # 200个视频，每批10个，8%的请求延迟2秒，按p90对冲
+    python bench_hedging.py --slow-ratio 0.02 --slow-delay 5
+    python bench_hedging.py --batch-size 40 --concurrency 8  # 批次大于并发上限时，名额占满期间跳过对冲(统计中的 saturated)
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from aiohttp import web
+
+from concurrency import AdaptiveConcurrency
+from hedging import HedgePolicy
+from http_client import HttpClient
+from rate_limiter import RateLimiter
+
+PAGE = "<html><script>window.__INITIAL_STATE__={}</script>" + "<p>视频页</p>" * 2000 + "</html>"
+
+
+async def start_server(slow_ratio, slow_delay, seed):
+    rng = random.Random(seed)
+
+    async def video(request):
+        # 每个请求独立抽样，对冲的第二个请求大概率落在正常延迟上
+        if rng.random() < slow_ratio:
+            await asyncio.sleep(slow_delay)
+        else:
+            await asyncio.sleep(rng.uniform(0.02, 0.06))
+        return web.Response(text=PAGE, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/video/{bvid}", video)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def crawl(base_url, videos, batch_size, concurrency, hedging):
+    client = HttpClient(
+        limit_per_host=concurrency,
+        rate_limiter=RateLimiter({}),
+        concurrency=AdaptiveConcurrency(initial=concurrency, max_limit=concurrency),
+        hedging=hedging,
+    )
+    batch_times = []
+    started = time.perf_counter()
+    async with client:
+        for begin in range(0, videos, batch_size):
+            batch_started = time.perf_counter()
+            await asyncio.gather(*[
+                client.hedged("video", lambda url=f"{base_url}/video/BV{i}": client.get_text(url, endpoint="video"))
+                for i in range(begin, min(begin + batch_size, videos))])
+            batch_times.append(time.perf_counter() - batch_started)
+    return time.perf_counter() - started, sorted(batch_times)
+
+
+def _quantile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对冲请求基准测试")
+    parser.add_argument("--videos", type=int, default=200, help="视频数量")
+    parser.add_argument("--batch-size", type=int, default=10, help="每批次视频数")
+    parser.add_argument("--concurrency", type=int, default=20, help="并发上限")
+    parser.add_argument("--slow-ratio", type=float, default=0.08, help="变慢的请求比例")
+    parser.add_argument("--slow-delay", type=float, default=2.0, help="变慢的请求延迟(秒)")
+    parser.add_argument("--percentile", type=float, default=0.9,
+                        help="触发对冲的耗时分位数，需低于 1 - slow-ratio，否则阈值落在长尾本身、不会触发对冲")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    args = parser.parse_args()
+
+    async def run():
+        print(f"{args.videos} 个视频，每批 {args.batch_size} 个，并发上限 {args.concurrency}，"
+              f"{args.slow_ratio:.0%} 的请求延迟 {args.slow_delay}s，按p{args.percentile * 100:g}对冲")
+        for name in ("不对冲", "对冲"):
+            runner, base_url = await start_server(args.slow_ratio, args.slow_delay, args.seed)
+            hedging = HedgePolicy(percentile=args.percentile) if name == "对冲" else None
+            try:
+                elapsed, batches = await crawl(base_url, args.videos, args.batch_size, args.concurrency, hedging)
+            finally:
+                await runner.cleanup()
+            line = (f"{name:>4}: 总耗时 {elapsed:6.2f}s  批次p50 {_quantile(batches, 0.5):5.2f}s  "
+                    f"批次p95 {_quantile(batches, 0.95):5.2f}s")
+            if hedging is not None:
+                line += f"  {hedging.stats()}"
+            print(line)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
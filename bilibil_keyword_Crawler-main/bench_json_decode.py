@@ -0,0 +1,148 @@
+"""
+JSON解码基准测试
+对比标准库json与已安装的加速实现(orjson/ujson)解码评论接口响应的耗时
+
+用法:
+    python bench_json_decode.py                 # 使用合成的评论页(每页20条主评论，每条附3条楼中楼)
+    python bench_json_decode.py --dir replies/  # 使用目录下录制的评论页响应(*.json)
+    python bench_json_decode.py --cassette raw_data/cassettes  # 使用 --cassette record 录制的评论接口响应
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import random
+import time
+
+from json_codec import BACKEND, available_backends
+
+
+def _fake_member(rng):
+    mid = rng.randint(10 ** 6, 10 ** 9)
+    return {
+        "mid": str(mid),
+        "uname": f"用户{mid}",
+        "sex": rng.choice(["男", "女", "保密"]),
+        "sign": "这个人很神秘，什么都没有写" * rng.randint(0, 3),
+        "avatar": f"https://i0.hdslb.com/bfs/face/{mid:x}.jpg",
+        "level_info": {"current_level": rng.randint(0, 6), "current_min": 0, "current_exp": 0, "next_exp": 0},
+        "vip": {"vipType": rng.randint(0, 2), "vipDueDate": 0, "vipStatus": rng.randint(0, 1)},
+        "pendant": {"pid": 0, "name": "", "image": ""},
+        "nameplate": {"nid": 0, "name": "", "image": "", "level": "", "condition": ""},
+    }
+
+
+def _fake_reply(rng, oid, with_children=True):
+    reply = {
+        "rpid": rng.randint(10 ** 10, 10 ** 11),
+        "oid": oid,
+        "type": 1,
+        "mid": rng.randint(10 ** 6, 10 ** 9),
+        "root": 0,
+        "parent": 0,
+        "count": 3,
+        "rcount": 3,
+        "state": 0,
+        "like": rng.randint(0, 5000),
+        "ctime": 1700000000 + rng.randint(0, 10 ** 7),
+        "member": _fake_member(rng),
+        "content": {
+            "message": "评论内容，带一点\"转义\"和表情[doge]\n" * rng.randint(1, 6),
+            "members": [],
+            "emote": {"[doge]": {"id": 26, "text": "[doge]", "url": "https://i0.hdslb.com/bfs/emote/doge.png"}},
+            "jump_url": {},
+            "max_line": 6,
+        },
+        "reply_control": {"location": "IP属地：" + rng.choice(["北京", "上海", "广东", "四川"]),
+                          "time_desc": "3天前发布"},
+        "replies": [],
+    }
+    if with_children:
+        reply["replies"] = [_fake_reply(rng, oid, with_children=False) for _ in range(3)]
+    return reply
+
+
+def synthetic_pages(count=200, seed=0):
+    """生成结构与 /x/v2/reply/wbi/main 响应一致的合成评论页(bytes)"""
+    rng = random.Random(seed)
+    pages = []
+    for i in range(count):
+        oid = rng.randint(10 ** 8, 10 ** 9)
+        body = {
+            "code": 0,
+            "message": "0",
+            "ttl": 1,
+            "data": {
+                "cursor": {"is_begin": i == 0, "prev": i, "next": i + 2, "is_end": False, "mode": 3},
+                "replies": [_fake_reply(rng, oid) for _ in range(20)],
+                "top_replies": [],
+                "upper": {"mid": rng.randint(10 ** 6, 10 ** 9)},
+            },
+        }
+        pages.append(json.dumps(body, ensure_ascii=False).encode("utf-8"))
+    return pages
+
+
+def load_pages(directory):
+    """读取目录下录制的响应体"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    return pages
+
+
+def load_cassette(directory):
+    """读取录制文件中评论接口的成功响应体"""
+    pages = []
+    path = os.path.join(directory, "reply.jsonl.gz")
+    if not os.path.exists(path):
+        return pages
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry.get("status") == 200 and "body" in entry:
+                pages.append(entry["body"].encode("utf-8"))
+    return pages
+
+
+def bench(decode, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for page in pages:
+            decode(page)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON解码基准测试")
+    parser.add_argument("--dir", type=str, help="录制的评论页响应目录(*.json)")
+    parser.add_argument("--cassette", type=str, help="录制文件目录(读取其中的评论接口响应)")
+    parser.add_argument("--pages", type=int, default=200, help="合成评论页数量")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最快一次")
+    args = parser.parse_args()
+
+    if args.cassette:
+        pages = load_cassette(args.cassette)
+    elif args.dir:
+        pages = load_pages(args.dir)
+    else:
+        pages = synthetic_pages(args.pages)
+    if not pages:
+        print(f"目录 {args.cassette or args.dir} 下没有找到录制的评论页")
+        return
+    total_mb = sum(len(p) for p in pages) / 1024 / 1024
+    print(f"共 {len(pages)} 页，{total_mb:.2f} MB，当前使用的后端: {BACKEND}")
+
+    baseline = None
+    for name, decode in available_backends().items():
+        elapsed = bench(decode, pages, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{name:>8}: {elapsed * 1000:8.1f} ms  {total_mb / elapsed:8.1f} MB/s  相对json {baseline / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
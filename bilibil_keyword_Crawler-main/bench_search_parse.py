@@ -0,0 +1,245 @@
+"""
+搜索页解析基准测试
+对比旧实现(完整构建DOM后对 soup.prettify() 做正则匹配)与当前 parse_search_page 的耗时，
+以及旧的按 {...} 切块、逐字段正则的 extract_video_info 与当前单次扫描实现的耗时(分别对截取出的结果数组、对整页计时，
+整页时旧实现需先用 slice_result_array 截取数组)，
+以及搜索阶段(解析→按BV号去重→基本视频信息)经DataFrame往返与直接使用 SearchRecord 的耗时和内存分配峰值
+
+用法:
+    python bench_search_parse.py                 # 使用合成的搜索页(每页50条结果)
+    python bench_search_parse.py --dir pages/    # 使用目录下保存的搜索页(*.html)
+    python bench_search_parse.py --cassette raw_data/cassettes  # 使用 --cassette record 录制的搜索页
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+import time
+import tracemalloc
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+from bil_search_page import (decode_html_entities, extract_video_info, parse_search_page, parse_search_records,
+                             slice_result_array)
+from bilibili_api import BilibiliAPI
+
+SEARCH_URL = "https://search.bilibili.com/video?keyword=test&page=1"
+
+
+def _fake_result(i):
+    return (
+        '{type:"video",id:%d,author:"作者%d",mid:%d,typeid:"17",typename:"单机游戏",'
+        'arcurl:"http:\\u002F\\u002Fwww.bilibili.com\\u002Fvideo\\u002Fav%d",aid:%d,bvid:"BV1xx411c7%03d",'
+        'title:"标题\\u003Cem class=\\"keyword\\"\\u003E关键词\\u003C\\u002Fem\\u003E第%d个",'
+        'description:"简介%d，包含[方括号]和逗号",arcrank:"0",pic:"\\u002F\\u002Fi0.hdslb.com\\u002Fbfs\\u002Farchive\\u002F%d.jpg",'
+        'play:%d,video_review:%d,favorites:%d,tag:"游戏,三角洲行动,攻略",review:%d,pubdate:%d,senddate:%d,'
+        'duration:"12:34",badgepay:false,hit_columns:["title","tag"],view_type:"",is_pay:0,is_union_video:0,'
+        'rec_tags:a,new_rec_tags:[],rank_score:%d,like:%d,upic:"https:\\u002F\\u002Fi1.hdslb.com\\u002Fbfs\\u002Fface\\u002F%d.jpg",'
+        'corner:"",cover:"",desc:"",url:"",rec_reason:"",danmaku:%d,biz_data:a,is_charge_video:0,vt:0,enable_vt:0,'
+        'vt_display:"",subtitle:"",episode_count_text:"",release_status:0,is_intervene:0,area:0,style:0,'
+        'is_live_room_inline:0}'
+        % (i, i, 10000 + i, 900000 + i, 900000 + i, i, i, i, i, 1000 * i + 7, i, 10 + i, 3 + i,
+           1714000000 + i, 1714000000 + i, 50000 + i, 20 + i, i, 30 + i)
+    )
+
+
+def synthetic_page(results=50):
+    """生成结构与 search.bilibili.com/video 一致的合成搜索页，结果数组内嵌在压缩后的脚本中"""
+    array = "[" + ",".join(_fake_result(i) for i in range(results)) + "]"
+    filler = "".join(f'<div class="nav-item"><a href="/v/{i}">分区{i}</a></div>' for i in range(300))
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>搜索结果</title></head><body>'
+        f'<div id="server-search-app">{filler}</div>'
+        '<script>window.__pinia=(function(a,b,c){return {searchTypeResponse:{searchTypeResponse:'
+        f'{{seid:"1",page:1,pagesize:{results},numResults:1000,numPages:20,suggest_keyword:"",rqt_type:"search",'
+        f'cost_time:{{}},exp_list:{{}},egg_hit:a,result:{array},show_column:a,in_black_key:a,in_white_key:a}}}}}}}}'
+        '(0,false,null));</script></body></html>'
+    )
+
+
+LEGACY_PATTERNS = {
+    "BV号": r'bvid:"([^"]*)"',
+    "标题": r'title:"(.*?)",',
+    "作者": r'author:"(.*?)",',
+    "发布时间": r'pubdate:(\d+)',
+    "播放量": r'play:(\d+)',
+    "点赞数": r'like:(\d+)',
+    "收藏数": r'favorites:(\d+)',
+    "时长": r'duration:"([^"]*)"',
+    "视频介绍": r'description:"([^"]*)"',
+    "标签": r'tag:"([^"]*)"',
+    "评论数": r'review:(\d+)'
+}
+
+
+def legacy_extract_video_info(html_content):
+    """旧实现：按 {...} 切块后对每块逐字段做正则匹配"""
+    videos = []
+    for block in re.findall(r'{[^{}]*}', html_content):
+        bv_match = re.search(LEGACY_PATTERNS["BV号"], block)
+        if not bv_match or not bv_match.group(1).strip():
+            continue
+        video = {}
+        for key, pattern in LEGACY_PATTERNS.items():
+            match = re.search(pattern, block)
+            if match:
+                value = match.group(1)
+                if key == "发布时间":
+                    value = datetime.fromtimestamp(int(value)).strftime("%Y-%m-%d %H:%M:%S")
+                elif key == "标题":
+                    value = decode_html_entities(value)
+                video[key] = value
+            else:
+                video[key] = "N/A"
+        videos.append(video)
+    return videos
+
+
+def legacy_parse(html_text):
+    """旧实现：完整构建DOM，对重新序列化的整页文本做正则匹配"""
+    soup = BeautifulSoup(html_text, "html.parser")
+    match = re.search(r'egg_hit:a\s*,result:\s*(\[.*?\])\s*,show', soup.prettify())
+    return legacy_extract_video_info(match.group(1)) if match else []
+
+
+def dataframe_search_stage(api, html_text):
+    """旧实现：每页构建DataFrame，dropna/drop_duplicates 后再转回字典构建基本视频信息"""
+    video_df = parse_search_page(html_text, SEARCH_URL)
+    if video_df.empty:
+        return []
+    video_df = video_df.dropna(subset=['BV号'])
+    video_df = video_df.drop_duplicates(subset=['BV号'], keep='first')
+    videos = []
+    for video in video_df.to_dict("records"):
+        videos.append({
+            "video": {
+                "bvid": video['BV号'],
+                "title": video.get('标题', ''),
+                "view_count": api._parse_view_count(video.get('播放量', '0')),
+                "pubdate": video.get('发布时间', ''),
+                "duration": video.get('时长', ''),
+                "description": video.get('视频介绍', ''),
+                "aid": video.get('aid', 0),
+                "_from_search": True,
+                "_search_keyword": "test",
+                "_search_page": 1
+            },
+            "owner": {
+                "name": video.get('作者', video.get('UP主', '')),
+                "mid": video.get('mid', 0)
+            }
+        })
+    return videos
+
+
+def record_search_stage(api, html_text):
+    """当前实现：解析为 SearchRecord，生成器去重后直接构建基本视频信息"""
+    records, _ = parse_search_records(html_text, SEARCH_URL)
+    return list(api._iter_basic_info(api._unique_records(records), "test", 1))
+
+
+def peak_allocation(func, pages):
+    """逐页执行时的内存分配峰值(KB)"""
+    tracemalloc.start()
+    for page in pages:
+        func(page)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def load_pages(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
+
+
+def load_cassette(directory):
+    """读取录制文件中成功的搜索页"""
+    pages = []
+    path = os.path.join(directory, "search.jsonl.gz")
+    if not os.path.exists(path):
+        return pages
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry.get("status") == 200 and "result:" in entry.get("body", ""):
+                pages.append(entry["body"])
+    return pages
+
+
+def bench(func, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for page in pages:
+            func(page)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="搜索页解析基准测试")
+    parser.add_argument("--dir", type=str, help="保存的搜索页目录(*.html)")
+    parser.add_argument("--cassette", type=str, help="录制文件目录(读取其中的搜索页)")
+    parser.add_argument("--pages", type=int, default=20, help="合成搜索页数量")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最快一次")
+    args = parser.parse_args()
+
+    if args.cassette:
+        pages = load_cassette(args.cassette)
+    elif args.dir:
+        pages = load_pages(args.dir)
+    else:
+        pages = [synthetic_page() for _ in range(args.pages)]
+    if not pages:
+        print(f"目录 {args.cassette or args.dir} 下没有找到搜索页")
+        return
+
+    # 两种实现解析出的视频应当一致(旧实现不还原字符串转义，且评论数可能误取 video_review，只比较BV号与计数)
+    keys = ("BV号", "播放量", "点赞数", "收藏数")
+    for page in pages:
+        expected = [tuple(v[k] for k in keys) for v in legacy_parse(page)]
+        actual = [tuple(v[k] for k in keys) for v in parse_search_page(page, SEARCH_URL).to_dict("records")]
+        if expected != actual:
+            print("警告：新旧实现的解析结果不一致")
+            break
+
+    print(f"共 {len(pages)} 页，{sum(len(p) for p in pages) / 1024 / 1024:.2f} MB")
+    legacy = bench(legacy_parse, pages, args.repeat)
+    current = bench(lambda page: parse_search_page(page, SEARCH_URL), pages, args.repeat)
+    print(f"{'DOM+prettify':>18}: {legacy * 1000 / len(pages):8.2f} ms/页")
+    print(f"{'parse_search_page':>18}: {current * 1000 / len(pages):8.2f} ms/页  ({legacy / current:.1f}x)")
+
+    arrays = [array for array in map(slice_result_array, pages) if array]
+    if arrays:
+        legacy = bench(legacy_extract_video_info, arrays, args.repeat)
+        current = bench(extract_video_info, arrays, args.repeat)
+        print(f"{'逐字段正则':>18}: {legacy * 1000 / len(arrays):8.2f} ms/页")
+        print(f"{'extract_video_info':>18}: {current * 1000 / len(arrays):8.2f} ms/页  ({legacy / current:.1f}x)")
+        legacy = bench(lambda page: legacy_extract_video_info(slice_result_array(page) or ""), pages, args.repeat)
+        current = bench(lambda page: parse_search_records(page, SEARCH_URL), pages, args.repeat)
+        print(f"{'截取+逐字段正则':>18}: {legacy * 1000 / len(pages):8.2f} ms/页")
+        print(f"{'parse_search_records':>18}: {current * 1000 / len(pages):8.2f} ms/页  ({legacy / current:.1f}x)")
+
+    # 只用到解析相关的方法，不创建连接池
+    api = object.__new__(BilibiliAPI)
+    stages = (("DataFrame往返", lambda page: dataframe_search_stage(api, page)),
+              ("SearchRecord", lambda page: record_search_stage(api, page)))
+    if [v["video"]["bvid"] for v in stages[0][1](pages[0])] != [v.bvid for v in stages[1][1](pages[0])]:
+        print("警告：搜索阶段两种实现的结果不一致")
+    baseline = None
+    for name, func in stages:
+        elapsed = bench(func, pages, args.repeat)
+        peak = peak_allocation(func, pages)
+        baseline = baseline or elapsed
+        print(f"{name:>18}: {elapsed * 1000 / len(pages):8.2f} ms/页  ({baseline / elapsed:.1f}x)  分配峰值 {peak:8.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
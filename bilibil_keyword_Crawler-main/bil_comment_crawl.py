@@ -10,7 +10,8 @@ import pandas as pd
 from urllib.parse import quote
 from tqdm import tqdm
 import random_bil_cookie
-import aiohttp
+from crawl_governor import CrawlGovernor
+from models import COMMENT_HEADER, Comment
 
 class CommentProcessor:
     """
@@ -58,7 +59,7 @@ class CommentProcessor:
     def process_reply(self, reply, parent_id=None, pbar=None):
         """
         处理单条评论并写入CSV
-        返回处理后的评论数据
+        返回处理后的评论(Comment)
         """
         # 更新计数并进度条
         self.count += 1
@@ -87,45 +88,33 @@ class CommentProcessor:
         like = reply.get('like', 0)
         
         # 构建评论数据
-        comment_data = [
+        comment = Comment(
             self.count, parent, rpid, uid, name, level, sex, 
             context, reply_time, rereply, like, sign, ip, vip, avatar
-        ]
+        )
         
         # 写入CSV
-        self.csv_writer.writerow(comment_data)
+        self.csv_writer.writerow(comment.as_row())
         
         # 返回处理结果
-        return {
-            "rpid": rpid,
-            "rereply_count": rereply,
-            "data": comment_data
-        }
+        return comment
 
-async def get_response(url, headers, max_retries=3):
-    """异步获取响应+重试机制"""
-    for attempt in range(max_retries):
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, timeout=10) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        print(f"请求返回状态码: {response.status}, URL: {url}")
-                        if attempt < max_retries - 1:
-                            delay = 1 * (attempt + 1)
-                            print(f"将在{delay}秒后重试...")
-                            await asyncio.sleep(delay)
-                        else:
-                            response.raise_for_status()
-        except Exception as e:
-            if attempt < max_retries - 1:
-                delay = 1 * (attempt + 1)
-                print(f"请求失败 ({attempt+1}/{max_retries}): {str(e)}, 将在{delay}秒后重试...")
-                await asyncio.sleep(delay)
-            else:
-                print(f"请求最终失败: {str(e)}")
-                raise
+async def get_response(url, headers, max_retries=None, client=None):
+    """
+    异步获取响应，按client的重试策略(指数退避+抖动)重试
+    非0业务码会抛出 BilibiliAPIError，风控类错误由client的熔断器统一暂停reply接口
+    client为共享的HttpClient，未传入时由默认的 CrawlGovernor 临时创建
+    """
+    if client is None:
+        async with CrawlGovernor().create_client() as client:
+            return await get_response(url, headers, max_retries, client)
+
+    policy = client.retry_policy if max_retries is None else client.retry_policy.with_retries(max_retries)
+    try:
+        return await policy.call(client.get_json, url, headers=headers, timeout=10, endpoint='reply')
+    except Exception as e:
+        print(f"请求最终失败: {str(e)}")
+        raise
 
 
 def get_header(cookie):
@@ -152,35 +141,27 @@ def get_header(cookie):
     }
     return header
 
-async def fetch_second_comments(aid, rpid, rereply, processor, header, parent_pbar=None):
-    """异步爬取二级评论，限制并发"""
+async def fetch_second_comments(aid, rpid, rereply, processor, header, parent_pbar=None, client=None):
+    """异步爬取二级评论，并发由client统一控制"""
     second_pbar = tqdm(total=rereply, desc=f"爬取ID:{rpid}的二级评论", leave=False) if parent_pbar else None
     
     # 计算需要的页数
     pages = (rereply - 1) // 10 + 1
-    tasks = []
     
-    # 分批处理，每批次不超过5个请求
-    batch_size = 5
-    for i in range(0, pages, batch_size):
-        batch_tasks = []
-        for page in range(i + 1, min(i + batch_size + 1, pages + 1)):
-            second_url = f"https://api.bilibili.com/x/v2/reply/reply?oid={aid}&type=1&root={rpid}&ps=10&pn={page}&web_location=333.788"
-            batch_tasks.append(fetch_second_page(second_url, header, processor, rpid, second_pbar))
-        
-        # 执行当前批次的任务
-        await asyncio.gather(*batch_tasks)
-        
-        # 批次间短暂暂停
-        await asyncio.sleep(0.5)
+    # 同时提交所有分页，实际并发数由client的自适应并发控制器根据延迟和风控情况调整
+    tasks = []
+    for page in range(1, pages + 1):
+        second_url = f"https://api.bilibili.com/x/v2/reply/reply?oid={aid}&type=1&root={rpid}&ps=10&pn={page}&web_location=333.788"
+        tasks.append(fetch_second_page(second_url, header, processor, rpid, second_pbar, client=client))
+    await asyncio.gather(*tasks)
     
     if second_pbar:
         second_pbar.close()
 
-async def fetch_second_page(url, header, processor, parent_id, pbar=None):
+async def fetch_second_page(url, header, processor, parent_id, pbar=None, client=None):
     """获取单个二级评论页"""
     try:
-        second_comment = await get_response(url, header)
+        second_comment = await get_response(url, header, client=client)
         
         if not second_comment['data']['replies']:
             return
@@ -190,8 +171,16 @@ async def fetch_second_page(url, header, processor, parent_id, pbar=None):
     except Exception as e:
         print(f"二级评论获取失败: {e}")
 
-async def start_async(bv, aid, pageID, count, csv_writer, is_second, cookie, wts=None, pbar=None, max_page=None, page_counter=0):
-    """异步版本的start函数"""
+async def start_async(bv, aid, pageID, count, csv_writer, is_second, cookie, wts=None, pbar=None, max_page=None, page_counter=0, client=None):
+    """
+    异步版本的start函数，同一次爬取的所有请求共用client的连接池
+    返回累计写入的评论条数；任意一页主评论请求失败时抛出异常，调用方据此判断是否采集成功
+    """
+    if client is None:
+        async with CrawlGovernor().create_client() as client:
+            return await start_async(bv, aid, pageID, count, csv_writer, is_second, cookie, wts, pbar,
+                                     max_page, page_counter, client=client)
+
     # 初始化
     processor = CommentProcessor(csv_writer)
     processor.count = count
@@ -238,21 +227,21 @@ async def start_async(bv, aid, pageID, count, csv_writer, is_second, cookie, wts
     header = get_header(cookie)
     
     try:
-        comment = await get_response(url, header)
+        comment = await get_response(url, header, client=client)
     except Exception as e:
         print(f"请求或解码失败: {e}")
-        return count
+        raise
     
     # 处理主评论
-    for reply in comment['data']['replies']:
+    for reply in comment['data']['replies'] or []:
         result = processor.process_reply(reply, pbar=pbar)
-        rpid = result["rpid"]
-        rereply = result["rereply_count"]
+        rpid = result.rpid
+        rereply = result.reply_count
 
         # 如果需要爬取二级评论
         if is_second and rereply != 0:
             # 将二级评论任务添加到任务列表
-            all_tasks.append(fetch_second_comments(aid, rpid, rereply, processor, header, pbar))
+            all_tasks.append(fetch_second_comments(aid, rpid, rereply, processor, header, pbar, client=client))
     
     if all_tasks:
         await asyncio.gather(*all_tasks)
@@ -264,10 +253,9 @@ async def start_async(bv, aid, pageID, count, csv_writer, is_second, cookie, wts
         print(f"评论爬取完成！总共爬取{processor.count}条。")
         return processor.count
     else:
-        await asyncio.sleep(random.uniform(0.5, 1.5))
         if pbar is None:
             print(f"当前爬取{processor.count}条。")
-        return await start_async(bv, aid, next_pageID, processor.count, csv_writer, is_second, cookie, wts, pbar, max_page, page_counter)
+        return await start_async(bv, aid, next_pageID, processor.count, csv_writer, is_second, cookie, wts, pbar, max_page, page_counter, client=client)
 
 async def async_crawler(): # 测试用
     """异步爬虫主函数"""
@@ -293,7 +281,7 @@ async def async_crawler(): # 测试用
     # 创建CSV文件并写入表头
     with open(f'{title[:12]}_评论_异步.csv', mode='w', newline='', encoding='utf-8-sig') as file:
         csv_writer = csv.writer(file)
-        csv_writer.writerow(['序号', '上级评论ID','评论ID', '用户ID', '用户名', '用户等级', '性别', '评论内容', '评论时间', '回复数', '点赞数', '个性签名', 'IP属地', '是否是大会员', '头像'])
+        csv_writer.writerow(COMMENT_HEADER)
 
         estimated_total = 5000
         print(f"预计评论数量: ~{estimated_total}条 (实际数量可能不同)")
@@ -1,3 +1,4 @@
+import asyncio
 import requests
 from bs4 import BeautifulSoup
 import re
@@ -5,153 +6,392 @@ import pandas as pd
 import random
 import time
 import random_bil_cookie
-from datetime import datetime
+from crawl_governor import CrawlGovernor
+from cassette import CassetteMissError
+from json_codec import loads as json_loads
 
 
 def decode_html_entities(text):
-    # 替换unicode转义字符
+    # 去掉搜索关键词高亮标签(兼容未解码的unicode转义形式)
     text = text.replace("\\u003Cem class=\\\"keyword\\\"\\u003E", "").replace("\\u003C\\u002Fem\\u003E", "")
+    text = text.replace('<em class="keyword">', "").replace("</em>", "")
     return text
 
+class SearchRecord:
+    """
+    单条搜索结果，字段为解析得到的原始值(缺失为"N/A")
+    使用 __slots__ 存储，不为每条结果创建字典；只有导出时才通过 to_dict / records_to_dataframe 转成中文列名
+    """
+
+    __slots__ = ("bvid", "title", "author", "pubdate", "play", "like", "favorites", "duration", "description", "tag",
+                 "review", "aid", "mid")
+
+    def __init__(self, bvid, title="N/A", author="N/A", pubdate="N/A", play="N/A", like="N/A", favorites="N/A",
+                 duration="N/A", description="N/A", tag="N/A", review="N/A", aid=0, mid=0):
+        self.bvid = bvid
+        self.title = title
+        self.author = author
+        self.pubdate = pubdate
+        self.play = play
+        self.like = like
+        self.favorites = favorites
+        self.duration = duration
+        self.description = description
+        self.tag = tag
+        self.review = review
+        # HTML搜索页中没有 aid 与 mid，为0时由详情获取补全
+        self.aid = aid
+        self.mid = mid
+
+    def to_dict(self):
+        """转换为以中文列名为键的字典(与 extract_video_info 的输出一致)"""
+        return {column: getattr(self, name) for column, name in _RECORD_COLUMNS}
+
+    def __repr__(self):
+        return f"SearchRecord(bvid={self.bvid!r}, title={self.title!r})"
+
+
+_COLUMNS = ("BV号", "标题", "作者", "发布时间", "播放量", "点赞数", "收藏数", "时长", "视频介绍", "标签", "评论数")
+# 中文列名与 SearchRecord 属性的对应关系
+_RECORD_COLUMNS = tuple(zip(_COLUMNS, ("bvid", "title", "author", "pubdate", "play", "like", "favorites", "duration",
+                                       "description", "tag", "review")))
+
+# 单次扫描的结果数组解析：先把字符串字面量替换为 \x00 占位符，剩下的代码中的括号、逗号与键名都是真实的结构，
+# 之后只需在代码上用 str.find / str.count 定位对象边界与字段，不必逐字符或逐字符串执行正则
+_STRING_FIELDS = tuple((name, f",{name}:\x00") for name in ("bvid", "title", "author", "duration", "description", "tag"))
+_NUMBER_FIELDS = tuple((name, f",{name}:", len(name) + 2)
+                       for name in ("pubdate", "play", "like", "favorites", "review"))
+_NUMBER = re.compile(r'-?\d+')
+_BRACE = re.compile(r'[{}]')
+
+
+def _split_strings(text):
+    """
+    按双引号一次切分文本，返回 (代码, 字符串列表, 是否含转义)
+    代码中每个字符串字面量替换为一个 \x00；切分前把转义的反斜杠与引号替换为 \x01 / \x02，字符串中的引号不会截断取值
+    """
+    escaped = '\\' in text
+    if escaped:
+        text = text.replace('\\\\', '\x01').replace('\\"', '\x02')
+    parts = text.split('"')
+    return '\x00'.join(parts[0::2]), parts[1::2], escaped
+
+
+def _decode_string(raw, escaped=False):
+    """还原JS字符串字面量中的转义字符(\\" \\uXXXX 等)"""
+    if escaped:
+        raw = raw.replace('\x01', '\\\\').replace('\x02', '\\"')
+    if '\\' not in raw:
+        return raw
+    try:
+        return json_loads('"' + raw + '"')
+    except ValueError:
+        return raw
+
+
+def _close(code, start, opening, closing, end):
+    """返回与 start 处的开括号配对的闭括号之后的位置，没有配对时返回 end"""
+    depth = 0
+    pos = start
+    while True:
+        close = code.find(closing, pos, end)
+        if close < 0:
+            return end
+        depth += code.count(opening, pos, close) - 1
+        if depth == 0:
+            return close + 1
+        pos = close + 1
+
+
+def _mask_nested(piece):
+    """把嵌套对象中的逗号替换为分号，其中的同名键不会被当作结果的字段；长度与占位符位置不变"""
+    segments = []
+    depth = 0
+    last = 0
+    for match in _BRACE.finditer(piece):
+        segment = piece[last:match.start()]
+        segments.append(segment.replace(',', ';') if depth > 1 else segment)
+        depth += 1 if match.group() == '{' else -1
+        last = match.start()
+    segments.append(piece[last:])
+    return ''.join(segments)
+
+
+def iter_video_records(text):
+    """
+    解析内嵌的JS对象字面量结果数组 [{bvid:"...",title:"...",play:123,...}, ...]，逐条生成 SearchRecord
+    从 text 中的第一个 [ 开始解析到与之配对的 ]，数组之后的内容被忽略；字符串中的括号、逗号与转义引号不影响切分
+    """
+    code, strings, escaped = _split_strings(text)
+    start = code.find('[')
+    if start < 0:
+        return
+    end = _close(code, start, '[', ']', len(code))
+    # index 为当前对象之前的字符串个数，即对象中第一个字符串在 strings 中的下标
+    index = code.count('\x00', 0, start)
+    pos = start
+    while True:
+        begin = code.find('{', pos, end)
+        if begin < 0:
+            return
+        index += code.count('\x00', pos, begin)
+        pos = _close(code, begin, '{', '}', end)
+        piece = code[begin:pos]
+        if piece.count('{') > 1:
+            piece = _mask_nested(piece)
+        # 首个键前的 { 换成逗号，所有顶层键都以逗号开头
+        piece = ',' + piece[1:]
+        first = index
+        index += piece.count('\x00')
+        values = {}
+        for name, key in _STRING_FIELDS:
+            found = piece.find(key)
+            if found >= 0:
+                values[name] = _decode_string(strings[first + piece.count('\x00', 0, found)], escaped)
+        if not values.get("bvid", "").strip():
+            continue  # 如果没有有效BV号，跳过此视频块
+        for name, key, size in _NUMBER_FIELDS:
+            found = piece.find(key)
+            if found >= 0:
+                match = _NUMBER.match(piece, found + size)
+                if match:
+                    values[name] = match.group()
+        if "pubdate" in values:
+            try:
+                values["pubdate"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(int(values["pubdate"])))
+            except (ValueError, OverflowError, OSError):
+                del values["pubdate"]
+        if "title" in values:
+            values["title"] = decode_html_entities(values["title"])
+        yield SearchRecord(**values)
+
+
 def extract_video_info(html_content):
-    videos = []
-    
-    # 使用正则表达式匹配视频信息
-    patterns = {
-        "BV号": r'bvid:"([^"]*)"',
-        "标题": r'title:"(.*?)",',
-        "作者": r'author:"(.*?)",',
-        "发布时间": r'pubdate:(\d+)',
-        "播放量": r'play:(\d+)',
-        "点赞数": r'like:(\d+)',
-        "收藏数": r'favorites:(\d+)',
-        "时长": r'duration:"([^"]*)"',
-        "视频介绍": r'description:"([^"]*)"',
-        "标签": r'tag:"([^"]*)"',
-        "评论数": r'review:(\d+)'
+    """解析结果数组，返回以中文列名为键的字典列表；搜索流程中直接使用 iter_video_records"""
+    return [record.to_dict() for record in iter_video_records(html_content)]
+
+
+def records_to_dataframe(records, meta=None) -> pd.DataFrame:
+    """
+    导出时把搜索记录转换为中文列名的DataFrame
+
+    Args:
+        records: SearchRecord 可迭代对象
+        meta: 结果总数信息 {"num_results", "num_pages"}，提供时写入 DataFrame.attrs
+
+    Returns:
+        DataFrame，没有记录时为空DataFrame
+    """
+    records = list(records)
+    if records:
+        df = pd.DataFrame.from_records([[getattr(record, name) for _, name in _RECORD_COLUMNS] for record in records],
+                                       columns=_COLUMNS)
+    else:
+        df = pd.DataFrame()
+    if meta is not None:
+        df.attrs.update(meta)
+    return df
+
+def default_search_headers():
+    """搜索页请求头，每次调用随机化浏览器版本"""
+    return {
+        'User-Agent': f'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{random.randint(120, 135)}.0.0.0 Safari/537.36 Edg/{random.randint(120, 135)}.0.0.0',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6,zh-TW;q=0.5',
+        'Accept-Encoding': 'gzip, deflate, br, zstd',
+        'DNT': '1',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'same-origin',
+        'Sec-Fetch-User': '?1',
+        'sec-ch-ua': '"Microsoft Edge";v="135", "Not-A.Brand";v="8", "Chromium";v="135"',
+        'sec-ch-ua-mobile': '?0',
+        'sec-ch-ua-platform': '"Windows"',
+        'Cache-Control': 'max-age=0',
+        'Referer': 'https://www.bilibili.com/',
+        'Priority': 'u=0, i',
     }
+
+# 内嵌搜索结果数组的起始位置：...,egg_hit:a,result:[
+_RESULT_START = re.compile(r'egg_hit:[\w$]+\s*,\s*result:\s*\[')
+# 括号匹配时需要整体跳过的字符串字面量(含转义字符)，以及方括号本身
+_BRACKET_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|[\[\]]', re.DOTALL)
+
+
+def slice_result_array(html_text):
+    """
+    直接从原始响应文本中截取内嵌的搜索结果数组 result:[...]，无需构建DOM
+    通过括号配对确定数组结尾，字符串中的括号与转义引号不会干扰匹配
+
+    Args:
+        html_text: 搜索页原始HTML
+
+    Returns:
+        数组文本(含首尾方括号)，未找到时返回None
+    """
+    match = _RESULT_START.search(html_text)
+    if not match:
+        return None
+    start = match.end() - 1
+    depth = 0
+    for token in _BRACKET_TOKEN.finditer(html_text, start):
+        char = token.group()
+        if char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+            if depth == 0:
+                return html_text[start:token.end()]
+    return None
+
+
+_PAGE_META = (("num_results", re.compile(r'numResults:(\d+)')), ("num_pages", re.compile(r'numPages:(\d+)')))
+
+
+def search_page_meta(html_text):
+    """
+    读取搜索页内嵌数据中的结果总数与总页数
+
+    Returns:
+        {"num_results": int, "num_pages": int}，页面中没有这两项时返回None
+    """
+    meta = {}
+    for key, pattern in _PAGE_META:
+        match = pattern.search(html_text)
+        if match is None:
+            return None
+        meta[key] = int(match.group(1))
+    return meta
+
+
+def parse_search_records(html_text, url):
+    """
+    解析搜索页HTML
+
+    Returns:
+        (SearchRecord 列表, 结果总数信息 {"num_results", "num_pages"} 或 None)
+    """
+    if 'search.bilibili.com/video' in url:
+        # 快速路径：在原始文本中定位结果数组，从数组开头单次扫描解析到数组结尾；页面结构变化时再回退到完整解析DOM
+        match = _RESULT_START.search(html_text)
+        if match is not None:
+            return list(iter_video_records(html_text[match.end() - 1:])), search_page_meta(html_text)
+        soup = BeautifulSoup(html_text, 'html.parser')
+        pattern = r'egg_hit:a\s*,result:\s*(\[.*?\])\s*,show'
+        match = re.search(pattern, soup.prettify())
+        data_str = match.group(1) if match else None
+        
+        if data_str is not None:
+            # 解析视频数据
+            return list(iter_video_records(data_str)), search_page_meta(html_text)
+        else:
+            print("未找到匹配的数据")
+            return [], None
+            
+    soup = BeautifulSoup(html_text, 'html.parser')
+    video_list = soup.find('div', class_='video-list row')
+    if not video_list:
+        print("未找到视频列表")
+        return [], None
     
-    video_blocks = re.findall(r'{[^{}]*}', html_content)
+    results = []
     
-    for block in video_blocks:
+    for item in video_list.find_all('div', class_=re.compile('^col_3')):
         try:
-            video = {}
-            bv_match = re.search(patterns["BV号"], block)
-            if not bv_match or not bv_match.group(1).strip():
-                continue  # 如果没有有效BV号，跳过此视频块
-
-            for key, pattern in patterns.items():
-                match = re.search(pattern, block)
-                if match:
-                    value = match.group(1)
-                    if key == "发布时间":
-                        value = datetime.fromtimestamp(int(value)).strftime("%Y-%m-%d %H:%M:%S")
-                    elif key == "标题":
-                        value = decode_html_entities(value)
-                    video[key] = value
-                else:
-                    video[key] = "N/A"
-            videos.append(video)
+            # 提取BV号
+            a_tag = item.find('a', href=re.compile(r'/video/BV\w+'))
+            bv = re.search(r'BV\w+', a_tag['href']).group() if a_tag else "N/A"
+                
+            # 提取标题
+            title_tag = item.find('h3', class_='bili-video-card__info--tit')
+            title = title_tag.get_text(strip=True).replace('\n', '') if title_tag else "N/A"
+            
+            # 提取发布者和时间
+            info_bottom = item.find('div', class_='bili-video-card__info--bottom')
+            author = "N/A"
+            publish_date = "N/A"
+            if info_bottom:
+                author_tag = info_bottom.find('span', class_='bili-video-card__info--author')
+                author = author_tag.get_text(strip=True) if author_tag else "N/A"
+                
+                date_tag = info_bottom.find('span', class_='bili-video-card__info--date')
+                publish_date = date_tag.get_text(strip=True).replace('·', '').strip() if date_tag else "N/A"
+            
+            results.append(SearchRecord(bv, title=title, author=author, pubdate=publish_date))
+            
         except Exception as e:
+            print(f"解析单个视频时出错: {str(e)}")
             continue
-            
-    return videos
 
-def bil_search_page(url,headers = {}) -> pd.DataFrame:
+    return results, None
+
+
+def parse_search_page(html_text, url) -> pd.DataFrame:
+    """解析搜索页HTML，返回视频信息DataFrame；能读取到结果总数时写入 DataFrame.attrs(num_results/num_pages)"""
+    return records_to_dataframe(*parse_search_records(html_text, url))
+
+def bil_search_page(url,headers = {}, cassette=None) -> pd.DataFrame:
     if headers == {}:
-        headers = {
-            'User-Agent': f'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{random.randint(120, 135)}.0.0.0 Safari/537.36 Edg/{random.randint(120, 135)}.0.0.0',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6,zh-TW;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br, zstd',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'same-origin',
-            'Sec-Fetch-User': '?1',
-            'sec-ch-ua': '"Microsoft Edge";v="135", "Not-A.Brand";v="8", "Chromium";v="135"',
-            'sec-ch-ua-mobile': '?0',
-            'sec-ch-ua-platform': '"Windows"',
-            'Cache-Control': 'max-age=0',
-            'Referer': 'https://www.bilibili.com/',
-            'Priority': 'u=0, i',
-        }
-    else:
-        pass
+        headers = default_search_headers()
+
+    # 回放模式直接解析录制的页面，不联网
+    if cassette is not None and cassette.replaying:
+        try:
+            return parse_search_page(cassette.play('search', url).text(), url)
+        except CassetteMissError as e:
+            print(f"请求出错: {str(e)}")
+            return []
 
     # 随机生成cookie
     cookies = random_bil_cookie.get_random_cookies(scene='search',timestamp=int(time.time()))
 
     try:
         response = requests.get(url, headers=headers, timeout=15, cookies=cookies)
+        if cassette is not None:
+            cassette.record('search', url, response.status_code, response.content, 'utf-8')
         time.sleep(random.uniform(0.1, 1.0))  
         response.encoding = 'utf-8'
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        if 'search.bilibili.com/video' in url:
-            pattern = r'egg_hit:a\s*,result:\s*(\[.*?\])\s*,show'
-            match = re.search(pattern, soup.prettify())
-            
-            if match:
-                data_str = match.group(1)
-                # 解析视频数据
-                video_list = extract_video_info(data_str)
-                video_data = pd.DataFrame(video_list)
-                return video_data
-            else:
-                print("未找到匹配的数据")
-                return pd.DataFrame()
-                
-        else:
-            video_list = soup.find('div', class_='video-list row')
-            if not video_list:
-                print("未找到视频列表")
-                return pd.DataFrame()
-            
-            results = []
-            
-            for item in video_list.find_all('div', class_=re.compile('^col_3')):
-                try:
-                    # 提取BV号
-                    a_tag = item.find('a', href=re.compile(r'/video/BV\w+'))
-                    bv = re.search(r'BV\w+', a_tag['href']).group() if a_tag else "N/A"
-                        
-                    # 提取标题
-                    title_tag = item.find('h3', class_='bili-video-card__info--tit')
-                    title = title_tag.get_text(strip=True).replace('\n', '') if title_tag else "N/A"
-                    
-                    # 提取发布者和时间
-                    info_bottom = item.find('div', class_='bili-video-card__info--bottom')
-                    author = "N/A"
-                    publish_date = "N/A"
-                    if info_bottom:
-                        author_tag = info_bottom.find('span', class_='bili-video-card__info--author')
-                        author = author_tag.get_text(strip=True) if author_tag else "N/A"
-                        
-                        date_tag = info_bottom.find('span', class_='bili-video-card__info--date')
-                        publish_date = date_tag.get_text(strip=True).replace('·', '').strip() if date_tag else "N/A"
-                    
-                    results.append({
-                        'BV号': bv,
-                        '标题': title,
-                        '作者': author,
-                        '发布时间': publish_date
-                    })
-                    
-                except Exception as e:
-                    print(f"解析单个视频时出错: {str(e)}")
-                    continue
-
-        results_df = pd.DataFrame(results)
-
-        return results_df.reset_index(drop=True)
+        return parse_search_page(response.text, url)
         
     except Exception as e:
         print(f"请求出错: {str(e)}")
         return []
 
+async def search_records_async(url, headers=None, client=None):
+    """
+    异步请求并解析搜索页，通过共享的HttpClient请求，不阻塞事件循环
+    client为空时由默认的 CrawlGovernor 临时创建一个客户端，同样受限速、并发与重试策略控制
+
+    Returns:
+        (SearchRecord 列表, 结果总数信息或None)；请求失败时抛出异常，由调用方区分失败与空页
+    """
+    if client is None:
+        async with CrawlGovernor().create_client() as client:
+            return await search_records_async(url, headers, client)
+
+    if not headers:
+        headers = default_search_headers()
+    cookies = random_bil_cookie.get_random_cookies(scene='search',timestamp=int(time.time()))
+
+    # 只缓存包含搜索结果数据的页面
+    html_text = await client.get_text(url, headers=headers, cookies=cookies, timeout=15, encoding='utf-8',
+                                      endpoint='search', validate=lambda text: 'result:' in text)
+
+    # 解析属于CPU计算，放到线程池中执行，避免大页面解析时阻塞其他请求
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, parse_search_records, html_text, url)
+
+
+async def bil_search_page_async(url, headers=None, client=None) -> pd.DataFrame:
+    """bil_search_page 的异步版本，返回视频信息DataFrame(请求失败时为空)；搜索流程中直接使用 search_records_async"""
+    try:
+        return records_to_dataframe(*await search_records_async(url, headers, client))
+    except Exception as e:
+        print(f"请求出错: {str(e)}")
+        return pd.DataFrame()
+
 # 使用示例
 if __name__ == "__main__":
     search_url = "https://search.bilibili.com/video?keyword=%E9%A3%9F%E7%89%A9%E8%AF%AD&page=1&search_source=3&order=click"
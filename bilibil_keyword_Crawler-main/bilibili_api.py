@@ -1,28 +1,67 @@
 import aiohttp
 import asyncio
-import json
+from json_codec import loads as json_loads
 import time
 import re
 from urllib.parse import urlencode, quote
 from bs4 import BeautifulSoup
-from bil_search_page import bil_search_page
-from typing import Dict, List, Any, Optional, Union
-import pandas as pd
+from bil_search_page import SearchRecord, decode_html_entities, search_records_async
+from typing import Dict, List, Any, Optional, Tuple, Union
 import random
 import random_bil_cookie
 from tqdm import tqdm
 from datetime import datetime, timedelta
+from crawl_governor import CrawlGovernor
+from retry_policy import RetryableError, BilibiliAPIError
+from wbi import WbiSigner
+from search_planner import WindowPlanner, Pager, PageFetchError
+from query_planner import QueryPlanner
+from models import Honor, Owner, Video, VideoPage
 
 
 class BilibiliAPI:
-    def __init__(self, search_host = "search.bilibili.com"):
+    SEARCH_MODES = ("html", "api")
+
+    def __init__(self, search_host = "search.bilibili.com", client=None, governor=None, search_mode="html",
+                 search_page_size=50, planner: Optional[WindowPlanner] = None,
+                 query_planner: Optional[QueryPlanner] = None):
+        if search_mode not in self.SEARCH_MODES:
+            raise ValueError(f"不支持的搜索模式: {search_mode}")
         self.search_host = search_host
+        # html: 抓取 search.bilibili.com 搜索页并解析内嵌脚本；api: 请求WBI签名的JSON搜索接口
+        self.search_mode = search_mode
+        self.search_page_size = search_page_size
+        # 设置时按结果总数自适应二分时间窗口
+        self.planner = planner
+        # 设置时先探测各关键词组合的第1页，按结果重叠度丢弃或降级冗余组合
+        self.query_planner = query_planner
+        # 分页器：遇到空页或不足一页即停止，能读取到总页数时跳过不存在的页；停止原因记录在 pager.log
+        self.pager = Pager(page_size=search_page_size if search_mode == "api" else None)
         self.api_host = "api.bilibili.com"
         self.main_host = "www.bilibili.com"
         self.api_prefix = "/x"
         self.cookie = random_bil_cookie.get_random_cookies(scene='search',timestamp=int(time.time()))
+        # 整个生命周期共用一个连接池；外部传入的client由调用方负责关闭
+        # 未传入client时由governor(并发与节奏总控)创建，两者都为空时使用默认配置
+        self._owns_client = client is None
+        if client is None:
+            client = (governor if governor is not None else CrawlGovernor()).create_client()
+        self.client = client
+        self.wbi = WbiSigner(client)
+
+    async def __aenter__(self):
+        await self.client.get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """关闭API持有的连接池"""
+        if self._owns_client:
+            await self.client.close()
 
-    async def _get_html(self, url, referer="https://www.bilibili.com",cookie=None) -> str:
+    async def _get_html(self, url, referer="https://www.bilibili.com",cookie=None, endpoint="video", validate=None) -> str:
         """获取网页 HTML 内容"""
         headers = {
             'User-Agent': f'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{random.randint(120, 135)}.0.0.0 Safari/537.36 Edg/{random.randint(120, 135)}.0.0.0',
@@ -48,13 +87,17 @@ class BilibiliAPI:
         if cookie is None:
             cookie = self.cookie
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, cookies=cookie) as response:
-                if response.status != 200:
-                    raise Exception(f"HTTP Error: {response.status}")
-                return await response.text()
+        if validate is None and endpoint == "video":
+            # 只缓存包含视频数据的页面，风控页面不会被写入缓存
+            validate = lambda text: "window.__INITIAL_STATE__" in text
+        return await self.client.get_text(url, headers=headers, cookies=cookie, endpoint=endpoint, validate=validate)
     
-    async def search_videos(self, keyword, time_begin=None, time_end=None, pages=None, recent_days=None) -> List[Dict]:
+    async def _fetch_search_page(self, search_url):
+        """获取并解析搜索页，返回 (SearchRecord 列表, 结果总数信息或None)；不同关键词任务同时请求同一URL时只发起一次请求"""
+        return await self.client.singleflight(
+            ("search", search_url), lambda: search_records_async(search_url, client=self.client))
+    
+    async def search_videos(self, keyword, time_begin=None, time_end=None, pages=None, recent_days=None) -> List[Video]:
         """
         搜索视频获取基本信息，支持多页同时搜索
         
@@ -66,206 +109,388 @@ class BilibiliAPI:
             recent_days: 最近几天，如果设置，将按天搜索
         
         返回:
-            包含基本视频信息的字典列表
+            包含基本视频信息的 Video 列表
+        """
+        results = await self.search_many([keyword], time_begin, time_end, pages, recent_days)
+        videos = results[keyword]
+        print(f"搜索完成，找到 {len(videos)} 个唯一视频")
+        return videos
+
+    async def search_many(self, keywords, time_begin=None, time_end=None, pages=None, recent_days=None,
+                          show_progress=True, on_videos=None) -> Dict[str, List[Video]]:
+        """
+        并发搜索多个关键词：所有 (关键词, 时间窗口) 查询同时提交，由客户端的限速器与并发控制器统一调度，
+        搜索耗时取决于搜索接口的请求预算，而不是关键词数量；每个查询由分页器决定实际请求的页
+        
+        参数:
+            keywords: 关键词列表
+            time_begin: 开始时间
+            time_end: 结束时间
+            pages: 页码列表，默认为[1]；设置了时间窗口规划器时表示每个窗口最多请求到第 max(pages) 页
+            recent_days: 最近几天，如果设置，将按天搜索(设置了规划器时整个范围按结果数自适应二分)
+            show_progress: 是否显示进度条
+            on_videos: 异步回调 on_videos(关键词, 基本视频信息列表)，每请求完一页立即调用，用于流水线式处理；
+                设置时各页结果交给回调后即丢弃，搜索阶段不再汇总任何页面，返回值中各关键词的列表为空
+        
+        返回:
+            {关键词: 去重后的基本视频信息(Video)列表}，顺序与 关键词 -> 时间窗口 -> 页码 -> 页内顺序 一致，与完成先后无关
         """
         if pages is None:
             pages = [1]
-        elif recent_days:
-            pages = [p for p in pages if p <= 5]  # 限制在5页以内
         elif isinstance(pages, int):
             pages = [pages]
-                        
-        all_video_data = []
         
-        # 处理近期日期选项-限制在5页以内
+        windows = self._search_windows(time_begin, time_end, recent_days)
+        if self.planner is not None and recent_days is not None:
+            # 不再按自然日切分，整个范围作为一个窗口，由规划器按实际结果数二分
+            windows = [{"begin_ts": windows[-1]["begin_ts"], "end_ts": windows[0]["end_ts"],
+                        "label": f"近{recent_days}天"}]
+        elif recent_days:
+            pages = [p for p in pages if p <= 5]  # 限制在5页以内
+        
+        planner_before = self.planner.stats() if self.planner is not None else None
+        pager_before = self.pager.stats()
+        # 请求总数取决于各查询的实际页数，进度条按已完成的请求计数
+        pbar = tqdm(desc="搜索进度", unit="页", disable=not show_progress)
+        request_count = 0
+        
+        def fetcher(keyword):
+            async def fetch(sub_window, page):
+                nonlocal request_count
+                request_count += 1
+                try:
+                    videos, meta = await self._search_unit(keyword, sub_window, page)
+                finally:
+                    pbar.update(1)
+                if on_videos is not None and videos:
+                    # 下游队列已满时在这里等待，搜索随之放缓
+                    await on_videos(keyword, videos)
+                return videos, meta
+            return fetch
+        
+        # 回调模式下每页结果交给 on_videos 后即丢弃，不在搜索阶段汇总，内存占用与找到的视频总数无关
+        collect = on_videos is None
+        
+        async def run_query(keyword, window, first=None, max_page=None, fetch=None):
+            fetch = fetch or fetcher(keyword)
+            if max_page is not None:
+                # 降级的组合只按缩减后的页数翻页，不再二分时间窗口
+                return await self.pager.run(window, [p for p in pages if p <= max_page], fetch, first=first,
+                                            tag=keyword, collect=collect)
+            if self.planner is not None:
+                return await self.planner.search(window, max(pages, default=1), fetch, self.pager, tag=keyword,
+                                                 first=first, collect=collect, published_at=self._published_at)
+            return await self.pager.run(window, pages, fetch, first=first, tag=keyword, collect=collect)
+        
+        queries = [(keyword, window) for keyword in keywords for window in windows]
+        if self.query_planner is not None and len(keywords) >= self.query_planner.min_queries and 1 in pages:
+            query_results = await self._run_planned_queries(keywords, windows, pages, fetcher, run_query, collect)
+        else:
+            # 所有 (关键词, 时间窗口) 查询同时提交，gather按提交顺序返回结果，保证输出顺序确定
+            query_results = await asyncio.gather(*[run_query(*query) for query in queries])
+        pbar.close()
+        self._print_search_stats(request_count, planner_before, pager_before)
+        
+        # 按关键词汇总并去重（基于BV号），保留最先出现的记录
+        results = {keyword: {} for keyword in keywords}
+        for (keyword, _), units in zip(queries, query_results):
+            unique_videos = results[keyword]
+            for _, _, videos in units:
+                for video in videos:
+                    if video.bvid not in unique_videos:
+                        unique_videos[video.bvid] = video
+        return {keyword: list(unique_videos.values()) for keyword, unique_videos in results.items()}
+
+    async def _run_planned_queries(self, keywords, windows, pages, fetcher, run_query, collect=True) -> List[List[tuple]]:
+        """
+        先并发请求每个 (关键词, 时间窗口) 的第1页作为探测，由 QueryPlanner 按重叠度决定各关键词组合的处理方式：
+        保留的组合与降级的组合同时执行，降级的组合按缩减的页数翻页，且在保留的组合完成前每次只允许一个请求；
+        丢弃的组合只保留探测页。探测页会作为第1页复用，不重复请求；探测失败的窗口在执行时重新请求第1页
+        
+        返回:
+            与 [(关键词, 时间窗口), ...] 顺序一致的查询结果列表(collect 为False时各项为空列表)
+        """
+        queries = [(keyword, window) for keyword in keywords for window in windows]
+        firsts = await asyncio.gather(*[self.pager.fetch(fetcher(keyword), window, 1) for keyword, window in queries])
+        probes = {keyword: set() for keyword in keywords}
+        metas = {keyword: [] for keyword in keywords}
+        for (keyword, _), first in zip(queries, firsts):
+            if first is None:
+                # 重试后仍失败的探测无法估计重叠度，该组合交给规划器按原页数保留
+                probes[keyword] = None
+                metas[keyword].append(None)
+                continue
+            if probes[keyword] is not None:
+                probes[keyword].update(video.bvid for video in first[0])
+            metas[keyword].append(first[1])
+        
+        before = self.query_planner.stats()
+        decisions = self.query_planner.plan(probes, metas, max(pages))
+        stats = {key: value - before[key] for key, value in self.query_planner.stats().items()}
+        print(f"查询规划: {len(keywords)} 个关键词组合，丢弃 {stats['dropped']} 个、降级 {stats['deprioritized']} 个冗余组合，"
+              f"预计节省 {stats['saved_requests']} 次搜索请求")
+        if stats['unprobed']:
+            print(f"警告: {stats['unprobed']} 个关键词组合的探测页请求失败或为空，按原页数保留")
+        
+        decisions = {decision["keyword"]: decision for decision in decisions}
+        # 降级的组合不等待保留的组合全部完成，而是与其同时执行、共用一个请求名额，保留的组合完成后不再限制
+        low_priority = asyncio.Semaphore(1)
+        keep_done = asyncio.Event()
+        
+        def deprioritized(fetch):
+            async def gated(window, page):
+                if keep_done.is_set():
+                    return await fetch(window, page)
+                async with low_priority:
+                    return await fetch(window, page)
+            return gated
+        
+        async def run_keep(indexes):
+            try:
+                return await asyncio.gather(*[run_query(*queries[i], first=firsts[i]) for i in indexes])
+            finally:
+                keep_done.set()
+        
+        query_results = [None] * len(queries)
+        keep, lowered = [], []
+        for i, (keyword, window) in enumerate(queries):
+            action = decisions[keyword]["action"]
+            if action == QueryPlanner.DROP:
+                query_results[i] = [(window, 1, firsts[i][0])] if collect else []
+            else:
+                (keep if action == QueryPlanner.KEEP else lowered).append(i)
+        kept, done = await asyncio.gather(
+            run_keep(keep),
+            asyncio.gather(*[run_query(*queries[i], first=firsts[i], max_page=decisions[queries[i][0]]["max_page"],
+                                       fetch=deprioritized(fetcher(queries[i][0])))
+                             for i in lowered]))
+        for i, units in zip(keep + lowered, list(kept) + list(done)):
+            query_results[i] = units
+        return query_results
+
+    def _print_search_stats(self, requests, planner_before, pager_before):
+        """打印本次搜索的请求数，以及时间窗口规划与分页统计(相对搜索开始前的增量)"""
+        pager = {key: value - pager_before.get(key, 0) for key, value in self.pager.stats().items()}
+        if planner_before is not None:
+            planner = {key: value - planner_before[key] for key, value in self.planner.stats().items()}
+            print(f"时间窗口规划: {planner['windows']} 个窗口(二分 {planner['splits']} 次，复用父窗口第1页 {planner['reused']} 次)")
+            if planner['failed']:
+                print(f"警告: {planner['failed']} 个时间窗口的第1页重试后仍请求失败，未能判断是否需要二分")
+        early = pager.get(Pager.EMPTY_PAGE, 0) + pager.get(Pager.SHORT_PAGE, 0)
+        print(f"分页: {pager['queries']} 个查询共 {requests} 次搜索请求，"
+              f"{early} 个查询遇到空页或不足一页提前结束，{pager.get(Pager.NUM_PAGES, 0)} 个查询按总页数结束，"
+              f"跳过 {pager['skipped']} 页")
+        if pager['failed']:
+            print(f"警告: {pager['failed']} 页重试后仍请求失败，{pager.get(Pager.FAILED, 0)} 个查询因第1页失败未能完成")
+
+    def _search_windows(self, time_begin=None, time_end=None, recent_days=None) -> List[Dict]:
+        """
+        生成搜索的时间窗口列表，每项包含 begin_ts / end_ts 时间戳与 label 标签
+        按天搜索时每天一个窗口；否则为 time_begin~time_end 一个窗口，未指定时间时不限时间
+        """
         if recent_days is not None:
-            # 生成每天的时间范围
             now = datetime.now()
-            daily_ranges = []
-            
+            windows = []
             for day in range(recent_days):
                 end_date = now - timedelta(days=day)
                 start_date = end_date.replace(hour=0, minute=0, second=0)
                 end_date = end_date.replace(hour=23, minute=59, second=59)
-                
-                daily_ranges.append({
-                    "begin": start_date.strftime("%Y-%m-%d %H:%M:%S"),
-                    "end": end_date.strftime("%Y-%m-%d %H:%M:%S"),
-                    "label": f"近{day+1}天"
+                windows.append({
+                    "begin_ts": int(time.mktime(start_date.timetuple())),
+                    "end_ts": int(time.mktime(end_date.timetuple())),
+                    "label": f"近{day+1}天",
                 })
-            
-            # 创建进度条，总数为关键词*天数*页面数
-            total_iterations = len(daily_ranges) * len(pages)
-            pbar = tqdm(total=total_iterations, desc=f"搜索关键词: {keyword}")
-            
-            for date_range in daily_ranges:
-                day_begin = date_range["begin"]
-                day_end = date_range["end"]
-                day_label = date_range["label"]
-                
-                for page in pages:
-                    pbar.set_description(f"搜索关键词: {keyword} - {day_label} - 第{page}页")
-                    
-                    # 构建搜索URL
-                    encoded_keyword = quote(keyword)
-                    search_url = f"https://{self.search_host}/video?keyword={encoded_keyword}&from_source=webtop_search&page={page}&search_source=3&order=click"
-                    
-                    try:
-                        # 添加时间戳参数
-                        begin_ts = int(time.mktime(time.strptime(day_begin, "%Y-%m-%d %H:%M:%S")))
-                        end_ts = int(time.mktime(time.strptime(day_end, "%Y-%m-%d %H:%M:%S")))
-                        search_url += f"&pubtime_begin_s={begin_ts}&pubtime_end_s={end_ts}"
-                        
-                        # 使用bil_search_page获取搜索结果
-                        video_df = bil_search_page(search_url)
-                        video_df = video_df.dropna(subset=['BV号'])
-                        video_df = video_df.drop_duplicates(subset=['BV号'], keep='first')
-                        
-                        if isinstance(video_df, pd.DataFrame) and not video_df.empty:
-                            for _, video in video_df.iterrows():
-                                # 基本信息
-                                basic_info = {
-                                    "video": {
-                                        "bvid": video['BV号'],
-                                        "title": video.get('标题', ''),
-                                        "view_count": self._parse_view_count(video.get('播放量', '0')),
-                                        "pubdate": video.get('发布时间', ''),
-                                        "duration": video.get('时长', ''),
-                                        "description": video.get('视频介绍', ''),
-                                        "aid": 0,  # 初始值，详细信息获取时会更新
-                                        "_from_search": True,
-                                        "_search_keyword": keyword,
-                                        "_search_page": page,
-                                        "_search_day": day_label
-                                    },
-                                    "owner": {
-                                        "name": video.get('作者', video.get('UP主', '')),
-                                        "mid": 0
-                                    }
-                                }
-                                all_video_data.append(basic_info)
-                        
-                        pbar.update(1)
-                        await asyncio.sleep(random.uniform(0.5, 1.5))
-                        
-                    except Exception as e:
-                        print(f"搜索页 {page} - {day_label} 处理失败: {str(e)}")
-                        pbar.update(1)
-                        continue
-            
-            pbar.close()
-            
-        else:
-            # 原有逻辑 - 按照指定的时间范围搜索
-            total_pages = len(pages)
-            pbar = tqdm(total=total_pages, desc=f"搜索关键词: {keyword}")
-            
-            for page in pages:
-                pbar.set_description(f"搜索关键词: {keyword} - 第{page}页")
-                
-                # 构建搜索URL
-                encoded_keyword = quote(keyword)
-                search_url = f"https://{self.search_host}/video?keyword={encoded_keyword}&from_source=webtop_search&page={page}&search_source=3&order=click"
-                
-                # time_begin 和 time_end 是日期格式，并且必须同时存在
-                if time_begin or time_end:
-                    if not time_begin or not time_end:
-                        raise ValueError("time_begin 和 time_end 必须同时存在")
-                    # 将时间转换为时间戳
-                    try:
-                        time_begin_ts = int(time.mktime(time.strptime(time_begin, "%Y-%m-%d %H:%M:%S")))
-                        time_end_ts = int(time.mktime(time.strptime(time_end, "%Y-%m-%d %H:%M:%S")))
-                        search_url += f"&pubtime_begin_s={time_begin_ts}&pubtime_end_s={time_end_ts}"
-                    except ValueError as e:
-                        raise ValueError(f"时间格式错误: {e}")
-                
-                # 使用bil_search_page获取搜索结果
-                try:
-                    video_df = bil_search_page(search_url)
-                    video_df = video_df.dropna(subset=['BV号'])
-                    video_df = video_df.drop_duplicates(subset=['BV号'], keep='first')
-                    
-                    if isinstance(video_df, pd.DataFrame) and not video_df.empty:
-                        for _, video in video_df.iterrows():
-                            # 基本信息
-                            basic_info = {
-                                "video": {
-                                    "bvid": video['BV号'],
-                                    "title": video.get('标题', ''),
-                                    "view_count": self._parse_view_count(video.get('播放量', '0')),
-                                    "pubdate": video.get('发布时间', ''),
-                                    "duration": video.get('时长', ''),
-                                    "description": video.get('视频介绍', ''),
-                                    "aid": 0,  # 初始值，详细信息获取时会更新
-                                    "_from_search": True,
-                                    "_search_keyword": keyword,
-                                    "_search_page": page
-                                },
-                                "owner": {
-                                    "name": video.get('作者', video.get('UP主', '')),
-                                    "mid": 0
-                                }
-                            }
-                            all_video_data.append(basic_info)
-                    
-                    pbar.update(1)
-                    await asyncio.sleep(random.uniform(0.5, 1.5))
-                    
-                except Exception as e:
-                    print(f"搜索页 {page} 处理失败: {str(e)}")
-                    pbar.update(1)
-                    continue
-            
-            pbar.close()
+            return windows
         
-        # 去重（基于BV号）
-        unique_videos = {}
-        for video in all_video_data:
-            bvid = video["video"]["bvid"]
-            if bvid not in unique_videos:
-                unique_videos[bvid] = video
+        # time_begin 和 time_end 是日期格式，并且必须同时存在
+        if time_begin or time_end:
+            if not time_begin or not time_end:
+                raise ValueError("time_begin 和 time_end 必须同时存在")
+            try:
+                return [{
+                    "begin_ts": int(time.mktime(time.strptime(time_begin, "%Y-%m-%d %H:%M:%S"))),
+                    "end_ts": int(time.mktime(time.strptime(time_end, "%Y-%m-%d %H:%M:%S"))),
+                    "label": None,
+                }]
+            except ValueError as e:
+                raise ValueError(f"时间格式错误: {e}")
+        return [{"begin_ts": None, "end_ts": None, "label": None}]
+
+    def _build_search_url(self, keyword, page, window) -> str:
+        encoded_keyword = quote(keyword)
+        search_url = f"https://{self.search_host}/video?keyword={encoded_keyword}&from_source=webtop_search&page={page}&search_source=3&order=click"
+        if window["begin_ts"] is not None:
+            search_url += f"&pubtime_begin_s={window['begin_ts']}&pubtime_end_s={window['end_ts']}"
+        return search_url
+
+    async def _fetch_search_records(self, keyword, page, window):
+        """
+        HTML模式：请求并解析搜索页
         
-        print(f"搜索完成，找到 {len(unique_videos)} 个唯一视频")
-        return list(unique_videos.values())
+        返回:
+            (按BV号去重的 SearchRecord 列表, 结果总数信息 {"num_results", "num_pages"} 或 None)
+        """
+        search_url = self._build_search_url(keyword, page, window)
+        # 异步获取搜索结果，不阻塞事件循环
+        records, meta = await self._fetch_search_page(search_url)
+        return list(self._unique_records(records)), meta
 
-    
-    async def get_videos_detail(self, videos, max_concurrent=3, show_progress=True) -> List[Dict]:
+    @staticmethod
+    def _unique_records(records):
+        """按BV号去重，保留最先出现的记录，跳过没有BV号的记录"""
+        seen = set()
+        for record in records:
+            if record.bvid and record.bvid != "N/A" and record.bvid not in seen:
+                seen.add(record.bvid)
+                yield record
+
+    async def _fetch_search_api_records(self, keyword, page, window) -> Tuple[List[SearchRecord], Optional[Dict]]:
+        """
+        API模式：请求WBI签名的JSON搜索接口，接口直接提供 aid 与 mid
+        每页结果数由 search_page_size 决定，同样的时间窗口参数在接口中同名
+        
+        返回:
+            (按BV号去重的 SearchRecord 列表, 结果总数信息 {"num_results", "num_pages"} 或 None)
+        """
+        params = {
+            "search_type": "video",
+            "keyword": keyword,
+            "page": page,
+            "page_size": self.search_page_size,
+            "order": "click",
+        }
+        if window["begin_ts"] is not None:
+            params["pubtime_begin_s"] = window["begin_ts"]
+            params["pubtime_end_s"] = window["end_ts"]
+        headers = {
+            'User-Agent': f'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{random.randint(120, 135)}.0.0.0 Safari/537.36',
+            'Referer': f'https://{self.search_host}/video?keyword={quote(keyword)}',
+        }
+        endpoint_url = f"https://{self.api_host}{self.api_prefix}/web-interface/wbi/search/type"
+        
+        async def fetch():
+            signed = await self.wbi.sign(params, cookies=self.cookie)
+            url = f"{endpoint_url}?{urlencode(signed)}"
+            return await self.client.get_json(url, headers=headers, cookies=self.cookie, endpoint="search")
+        
+        try:
+            # 签名随时间变化，按未签名的参数合并相同请求
+            data = await self.client.singleflight(("search", endpoint_url, urlencode(sorted(params.items()))), fetch)
+        except BilibiliAPIError as e:
+            if e.code == -403:
+                # 签名密钥已轮换，下次请求重新获取
+                self.wbi.invalidate()
+            raise
+        
+        payload = data.get("data") or {}
+        meta = None
+        if "numResults" in payload and "numPages" in payload:
+            meta = {"num_results": payload["numResults"], "num_pages": payload["numPages"]}
+        return list(self._unique_records(self._iter_api_records(payload.get("result") or []))), meta
+
+    def _iter_api_records(self, items):
+        """把搜索接口返回的结果逐条转换为 SearchRecord"""
+        for item in items:
+            pubdate = item.get("pubdate")
+            yield SearchRecord(
+                item.get("bvid") or "",
+                title=decode_html_entities(item.get("title", "")),
+                author=item.get("author", "N/A"),
+                pubdate=self._timestamp_to_datetime(pubdate) if pubdate else "N/A",
+                play=item.get("play", "N/A"),
+                like=item.get("like", "N/A"),
+                favorites=item.get("favorites", "N/A"),
+                duration=item.get("duration", "N/A"),
+                description=item.get("description", "N/A"),
+                tag=item.get("tag", "N/A"),
+                review=item.get("review", "N/A"),
+                aid=item.get("aid", 0),
+                mid=item.get("mid", 0),
+            )
+
+    async def _search_unit(self, keyword, window, page):
+        """
+        请求并解析单个 (关键词, 时间窗口, 页码) 的搜索结果
+        
+        返回:
+            (基本视频信息列表, 结果总数信息或None)
+        
+        异常:
+            PageFetchError: 请求或解析失败，由分页器重试或计入失败，不当作空页
+        """
+        day_label = window["label"]
+        try:
+            if self.search_mode == "api":
+                records, meta = await self._fetch_search_api_records(keyword, page, window)
+            else:
+                records, meta = await self._fetch_search_records(keyword, page, window)
+            
+            return list(self._iter_basic_info(records, keyword, page, day_label)), meta
+        except Exception as e:
+            label = f" - {day_label}" if day_label else ""
+            print(f"关键词 '{keyword}' 搜索页 {page}{label} 处理失败: {str(e)}")
+            raise PageFetchError(str(e)) from e
+
+    def _iter_basic_info(self, records, keyword, page, day_label=None):
+        """把搜索记录逐条转换为后续阶段使用的基本视频信息(Video)"""
+        for record in records:
+            yield Video(
+                bvid=record.bvid,
+                title=record.title,
+                view_count=self._parse_view_count(record.play),
+                pubdate=record.pubdate,
+                duration=record.duration,
+                description=record.description,
+                aid=record.aid,  # 搜索页没有aid时为0，详细信息获取时会更新
+                owner=Owner(name=record.author, mid=record.mid),
+                from_search=True,
+                search_keyword=keyword,
+                search_page=page,
+                search_day=day_label,
+            )
+
+    async def get_videos_detail(self, videos, max_concurrent=None, show_progress=True) -> List[Video]:
         """
         根据基本视频信息获取详细信息
         
         参数:
-            videos: 包含基本信息的视频列表
-            max_concurrent: 最大并发请求数
+            videos: 包含基本信息的视频(Video)列表
+            max_concurrent: 额外的最大并发请求数，为空时完全由客户端的自适应并发控制器决定
             show_progress: 是否显示进度条
         
         返回:
-            包含详细信息的视频列表
+            包含详细信息的视频(Video)列表，获取失败的视频保留搜索得到的基本信息
         """
         detailed_videos = []
         failed_videos = []
         
-        # 创建信号量限制并发请求数
-        semaphore = asyncio.Semaphore(max_concurrent)
+        # 并发数由 self.client.concurrency 根据延迟与风控情况自动调整；显式指定时再叠加一层信号量
+        semaphore = asyncio.Semaphore(max_concurrent) if max_concurrent else None
         
+        async def _fetch_video_detail(video):
+            bv_id = video.bvid
+            try:
+                # 构建视频页面URL
+                video_url = f"https://{self.main_host}/video/{bv_id}"
+                
+                # 获取并解析视频页面；多个任务同时请求同一BV号时只发起一次请求，
+                # 启用对冲时请求过慢会再发起一次相同请求，取先返回的结果
+                video_data = await self.client.singleflight(
+                    ("video", bv_id),
+                    lambda: self.client.hedged("video", lambda: self._fetch_and_parse_video(video_url)))
+                
+                if video_data:
+                    return video_data, None
+                else:
+                    return video, "解析失败"
+            except Exception as e:
+                return video, str(e)
+
         async def fetch_video_detail(video):
+            if semaphore is None:
+                return await _fetch_video_detail(video)
             async with semaphore:
-                bv_id = video["video"]["bvid"]
-                try:
-                    # 构建视频页面URL
-                    video_url = f"https://{self.main_host}/video/{bv_id}"
-                    
-                    # 获取视频页面HTML
-                    html_content = await self._get_html(video_url)
-                    
-                    # 解析视频详细信息
-                    video_data = self._parse_video_html(html_content)
-                    
-                    if video_data:
-                        return video_data, None
-                    else:
-                        return video, "解析失败"
-                except Exception as e:
-                    return video, str(e)
+                return await _fetch_video_detail(video)
         
         # 第一轮：视频详情
         total_videos = len(videos)
@@ -300,48 +525,18 @@ class BilibiliAPI:
             
             random.shuffle(failed_videos)  # 随机打乱顺序
             
-            retry_results = []
+            # 按重试策略(指数退避+抖动)重试，每次尝试更换随机Cookie；风控时由熔断器统一暂停
+            async def retry_video_detail(video):
+                try:
+                    return await self.client.retry_policy.call(self._fetch_video_detail_fresh_cookie, video)
+                except Exception:
+                    return video
             
-            if show_progress:
-                for video, error in tqdm(failed_videos, desc="重试获取"):
-                    # ...重试逻辑...
-                    bv_id = video["video"]["bvid"]
-                    try:
-                        video_url = f"https://{self.main_host}/video/{bv_id}"
-                        html_content = await self._get_html(
-                            video_url, 
-                            cookie=random_bil_cookie.get_random_cookies(scene='search', timestamp=int(time.time()))
-                        )
-                        
-                        video_data = self._parse_video_html(html_content)
-                        if video_data:
-                            retry_results.append(video_data)
-                        else:
-                            retry_results.append(video)
-                    except Exception:
-                        retry_results.append(video)
-                    
-                    await asyncio.sleep(random.uniform(0.8, 1.4))
-            else:
-                for video, error in failed_videos:
-                    # ...重试逻辑...
-                    bv_id = video["video"]["bvid"]
-                    try:
-                        video_url = f"https://{self.main_host}/video/{bv_id}"
-                        html_content = await self._get_html(
-                            video_url, 
-                            cookie=random_bil_cookie.get_random_cookies(scene='search', timestamp=int(time.time()))
-                        )
-                        
-                        video_data = self._parse_video_html(html_content)
-                        if video_data:
-                            retry_results.append(video_data)
-                        else:
-                            retry_results.append(video)
-                    except Exception:
-                        retry_results.append(video)
-                    
-                    await asyncio.sleep(random.uniform(0.8, 1.4))
+            retry_tasks = [retry_video_detail(video) for video, error in failed_videos]
+            retry_results = []
+            for task in tqdm(asyncio.as_completed(retry_tasks), total=len(retry_tasks), desc="重试获取",
+                             disable=not show_progress):
+                retry_results.append(await task)
             
             # 添加重试成功的视频
             detailed_videos.extend(retry_results)
@@ -351,7 +546,25 @@ class BilibiliAPI:
         
         return detailed_videos
 
-    async def search_and_get_video_info(self, keyword, time_begin=None, time_end=None, page=1, recent_days=None) -> List[Dict]:
+    async def _fetch_and_parse_video(self, video_url) -> Optional[Video]:
+        """获取视频页面HTML并解析详细信息"""
+        html_content = await self._get_html(video_url)
+        return self._parse_video_html(html_content)
+
+    async def _fetch_video_detail_fresh_cookie(self, video) -> Video:
+        """使用新的随机Cookie获取单个视频详情，页面无法解析(多为风控页)时抛出可重试错误"""
+        bv_id = video.bvid
+        video_url = f"https://{self.main_host}/video/{bv_id}"
+        html_content = await self._get_html(
+            video_url, 
+            cookie=random_bil_cookie.get_random_cookies(scene='search', timestamp=int(time.time()))
+        )
+        video_data = self._parse_video_html(html_content)
+        if not video_data:
+            raise RetryableError(f"视频 {bv_id} 页面解析失败")
+        return video_data
+
+    async def search_and_get_video_info(self, keyword, time_begin=None, time_end=None, page=1, recent_days=None) -> List[Video]:
         """
         根据关键词搜索视频并获取详细信息
         
@@ -391,10 +604,10 @@ class BilibiliAPI:
             except ValueError:
                 return 0
     
-    def _parse_video_html(self, html_content) -> Dict[str, Any]:
+    def _parse_video_html(self, html_content) -> Optional[Video]:
         """
         从视频页面HTML中提取所需信息
-        返回符合数据库结构的格式化结果
+        返回符合数据库结构的 Video，页面中没有视频数据时返回None
         """
         try:
             # 使用BeautifulSoup解析HTML
@@ -410,72 +623,64 @@ class BilibiliAPI:
                     # 提取JSON数据
                     json_str = re.search(r'window\.__INITIAL_STATE__\s*=\s*(\{.+?\});', script.string, re.DOTALL)
                     if json_str:
-                        data = json.loads(json_str.group(1))
+                        data = json_loads(json_str.group(1))
                         if 'videoData' in data:
                             video_data = data['videoData']
                             break
             
             if not video_data:
                 return None
-                
-            # 构建返回数据结构
-            result = {
+            
+            stat = video_data.get("stat", {})
+            rights = video_data.get("rights", {})
+            owner = video_data.get("owner", {})
+            bvid = video_data.get("bvid", "")
+            return Video(
                 # 视频主表数据
-                "video": {
-                    "bvid": video_data.get("bvid", ""),
-                    "aid": video_data.get("aid", 0),
-                    "title": video_data.get("title", ""),
-                    "cover_url": video_data.get("pic", ""),
-                    "tid": video_data.get("tid", 0),
-                    "tname": video_data.get("tname", ""),
-                    "tid_v2": video_data.get("tid_v2", 0),
-                    "tname_v2": video_data.get("tname_v2", ""),
-                    "description": video_data.get("desc", ""),
-                    "pubdate": self._timestamp_to_datetime(video_data.get("pubdate", 0)),
-                    "ctime": self._timestamp_to_datetime(video_data.get("ctime", 0)),
-                    "duration": video_data.get("duration", 0),
-                    "copyright": video_data.get("copyright", 0),
-                    "state": video_data.get("state", 0),
-                    "mission_id": video_data.get("mission_id", 0),
-                    "videos": video_data.get("videos", 0),
-                    "dynamic": video_data.get("dynamic", ""),
-                    "keywords": self._extract_keywords(soup),
-                    
-                    # 统计信息
-                    "view_count": video_data.get("stat", {}).get("view", 0),
-                    "danmaku_count": video_data.get("stat", {}).get("danmaku", 0),
-                    "reply_count": video_data.get("stat", {}).get("reply", 0),
-                    "favorite_count": video_data.get("stat", {}).get("favorite", 0),
-                    "coin_count": video_data.get("stat", {}).get("coin", 0),
-                    "share_count": video_data.get("stat", {}).get("share", 0),
-                    "like_count": video_data.get("stat", {}).get("like", 0),
-                    "dislike_count": video_data.get("stat", {}).get("dislike", 0),
-                    
-                    # 权限信息
-                    "is_downloadable": bool(video_data.get("rights", {}).get("download", 0)),
-                    "no_reprint": bool(video_data.get("rights", {}).get("no_reprint", 0)),
-                    "autoplay": bool(video_data.get("rights", {}).get("autoplay", 0)),
-                    
-                    # 关联UP主ID
-                    "owner_mid": video_data.get("owner", {}).get("mid", 0)
-                },
+                bvid=bvid,
+                aid=video_data.get("aid", 0),
+                title=video_data.get("title", ""),
+                cover_url=video_data.get("pic", ""),
+                tid=video_data.get("tid", 0),
+                tname=video_data.get("tname", ""),
+                tid_v2=video_data.get("tid_v2", 0),
+                tname_v2=video_data.get("tname_v2", ""),
+                description=video_data.get("desc", ""),
+                pubdate=self._timestamp_to_datetime(video_data.get("pubdate", 0)),
+                ctime=self._timestamp_to_datetime(video_data.get("ctime", 0)),
+                duration=video_data.get("duration", 0),
+                copyright=video_data.get("copyright", 0),
+                state=video_data.get("state", 0),
+                mission_id=video_data.get("mission_id", 0),
+                videos=video_data.get("videos", 0),
+                dynamic=video_data.get("dynamic", ""),
+                keywords=self._extract_keywords(soup),
+                
+                # 统计信息
+                view_count=stat.get("view", 0),
+                danmaku_count=stat.get("danmaku", 0),
+                reply_count=stat.get("reply", 0),
+                favorite_count=stat.get("favorite", 0),
+                coin_count=stat.get("coin", 0),
+                share_count=stat.get("share", 0),
+                like_count=stat.get("like", 0),
+                dislike_count=stat.get("dislike", 0),
+                
+                # 权限信息
+                is_downloadable=bool(rights.get("download", 0)),
+                no_reprint=bool(rights.get("no_reprint", 0)),
+                autoplay=bool(rights.get("autoplay", 0)),
                 
                 # UP主信息
-                "owner": {
-                    "mid": video_data.get("owner", {}).get("mid", 0),
-                    "name": video_data.get("owner", {}).get("name", ""),
-                    "face_url": video_data.get("owner", {}).get("face", "")
-                },
+                owner_mid=owner.get("mid", 0),
+                owner=Owner(mid=owner.get("mid", 0), name=owner.get("name", ""), face_url=owner.get("face", "")),
                 
                 # 分P信息
-                "pages": [self._parse_video_page(page, video_data.get("bvid", "")) 
-                         for page in video_data.get("pages", [])],
+                pages=[self._parse_video_page(page, bvid) for page in video_data.get("pages", [])],
                 
                 # 荣誉信息
-                "honors": self._parse_honors(video_data)
-            }
-            
-            return result
+                honors=self._parse_honors(video_data)
+            )
             
         except Exception as e:
             print(f"解析视频HTML时出错: {str(e)}")
@@ -494,110 +699,91 @@ class BilibiliAPI:
             return ""
         return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
     
-    def _parse_video_page(self, page_data, bvid) -> Dict:
+    @staticmethod
+    def _published_at(video: Video) -> Optional[int]:
+        """读取搜索结果的发布时间戳，供时间窗口规划器判断父窗口第1页能否复用；无法解析时返回None"""
+        try:
+            return int(time.mktime(time.strptime(video.pubdate, "%Y-%m-%d %H:%M:%S")))
+        except (TypeError, ValueError):
+            return None
+    
+    def _parse_video_page(self, page_data, bvid) -> VideoPage:
         """解析视频分P信息"""
-        return {
-            "cid": page_data.get("cid", 0),
-            "bvid": bvid,
-            "page_number": page_data.get("page", 0),
-            "part_title": page_data.get("part", ""),
-            "duration": page_data.get("duration", 0),
-            "width": page_data.get("dimension", {}).get("width", 0),
-            "height": page_data.get("dimension", {}).get("height", 0),
-            "first_frame_url": page_data.get("first_frame", ""),
-            "page_ctime": self._timestamp_to_datetime(page_data.get("ctime", 0))
-        }
+        return VideoPage(
+            cid=page_data.get("cid", 0),
+            bvid=bvid,
+            page_number=page_data.get("page", 0),
+            part_title=page_data.get("part", ""),
+            duration=page_data.get("duration", 0),
+            width=page_data.get("dimension", {}).get("width", 0),
+            height=page_data.get("dimension", {}).get("height", 0),
+            first_frame_url=page_data.get("first_frame", ""),
+            page_ctime=self._timestamp_to_datetime(page_data.get("ctime", 0))
+        )
     
-    def _parse_honors(self, video_data) -> List[Dict]:
+    def _parse_honors(self, video_data) -> List[Honor]:
         """解析视频荣誉信息"""
         honors = []
         honor_data = video_data.get("honor_reply", {}).get("honor", [])
         
         for honor in honor_data:
-            honors.append({
-                "bvid": video_data.get("bvid", ""),
-                "type": honor.get("type", 0),
-                "description": honor.get("desc", "")
-            })
+            honors.append(Honor(
+                bvid=video_data.get("bvid", ""),
+                type=honor.get("type", 0),
+                description=honor.get("desc", "")
+            ))
         
         return honors
     
 
-    def _create_basic_info(self, bv_id, video):
-        """直接从搜索结果DataFrame行获取基本信息"""
+    def _create_basic_info(self, record) -> Video:
+        """直接从搜索记录(SearchRecord)获取基本信息，用于详情获取失败时输出"""
+        def count(value):
+            return int(value) if value != 'N/A' else 0
+        
         try:
-            # 获取播放量并处理格式
-            view_count = 0
-            if '播放量' in video:
-                view_str = str(video.get('播放量', '0'))
-                if '万' in view_str:
-                    view_str = view_str.replace('万', '')
-                    try:
-                        view_count = float(view_str) * 10000
-                    except ValueError:
-                        view_count = 0
-                else:
-                    try:
-                        view_count = int(view_str.replace(',', ''))
-                    except ValueError:
-                        view_count = 0
-            
-            # 创建一个包含基本信息的字典
-            return {
-                "video": {
-                    "bvid": bv_id,
-                    "aid": 0,
-                    "title": video.get('标题', '获取失败'),
-                    "description": video.get('视频介绍', ''),
-                    "pubdate": video.get('发布时间', ''),
-                    "duration": video.get('时长', ''),
-                    "cover_url": "",  # 搜索结果中通常没有封面URL
-                    
-                    # 统计信息
-                    "view_count": view_count,
-                    "like_count": int(video.get('点赞数', 0)) if video.get('点赞数', 'N/A') != 'N/A' else 0,
-                    "favorite_count": int(video.get('收藏数', 0)) if video.get('收藏数', 'N/A') != 'N/A' else 0,
-                    "reply_count": int(video.get('评论数', 0)) if video.get('评论数', 'N/A') != 'N/A' else 0,
-                    
-                    # 标记为失败
-                    "_error": "详情获取失败"
-                },
-                "owner": {
-                    "name": video.get('作者', video.get('UP主', '获取失败')),
-                    "mid": 0,
-                    "face_url": ""
-                },
-                "pages": [],
-                "honors": []
-            }
+            return Video(
+                bvid=record.bvid,
+                aid=record.aid,
+                title=record.title if record.title != 'N/A' else '获取失败',
+                description=record.description,
+                pubdate=record.pubdate,
+                duration=record.duration,
+                
+                # 统计信息
+                view_count=self._parse_view_count(record.play),
+                like_count=count(record.like),
+                favorite_count=count(record.favorites),
+                reply_count=count(record.review),
+                owner=Owner(mid=record.mid, name=record.author if record.author != 'N/A' else '获取失败'),
+                
+                # 标记为失败
+                error="详情获取失败"
+            )
         except Exception as e:
             # 若处理失败，则返回最小化信息
             print(f"创建基本信息失败: {str(e)}")
-            return {
-                "video": {
-                    "bvid": bv_id,
-                    "title": str(video.get('标题', '获取失败')),
-                    "_error": f"基本信息获取失败: {str(e)[:50]}"
-                },
-                "owner": {
-                    "name": str(video.get('作者', video.get('UP主', '获取失败'))),
-                    "mid": 0
-                },
-                "pages": [],
-                "honors": []
-            }
+            return Video(
+                bvid=record.bvid,
+                title=str(record.title),
+                owner=Owner(name=str(record.author)),
+                error=f"基本信息获取失败: {str(e)[:50]}"
+            )
 
 # 使用示例
+async def _demo(keyword):
+    async with BilibiliAPI() as api:
+        return await api.search_and_get_video_info(keyword=keyword, page=1)
+
 if __name__ == "__main__":
-    api = BilibiliAPI()
     keyword = "翁法罗斯"
-    results = asyncio.run(api.search_and_get_video_info(keyword=keyword, page=1))
+    results = asyncio.run(_demo(keyword))
     
     print(f"共获取到 {len(results)} 个视频信息")
     
     for result in results:
-        print(f"视频标题: {result['video']['title']}")
-        print(f"UP主: {result['owner']['name']}")
-        print(f"发布时间: {result['video']['pubdate']}")
-        print(f"播放量: {result['video']['view_count']}")
+        print(f"视频标题: {result.title}")
+        print(f"UP主: {result.owner.name}")
+        print(f"发布时间: {result.pubdate}")
+        print(f"播放量: {result.view_count}")
         print("---------------------")
\ No newline at end of file
@@ -0,0 +1,152 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+# 各阶段的默认过期时间(秒)：视频详情(播放量等统计)每天刷新，评论三天刷新一次
+DEFAULT_MAX_AGES = {
+    "detail": 24 * 3600,
+    "comment": 3 * 24 * 3600,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bv (
+    bvid TEXT PRIMARY KEY,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    last_detail REAL,
+    last_comment REAL,
+    row_mode TEXT,
+    row TEXT
+)
+"""
+
+
+class BvRegistry:
+    """
+    已采集BV号的本地登记表(sqlite)
+    记录每个BV号首次/最近出现时间、最近一次成功获取详情与评论的时间，以及最近一次输出的结果行；
+    增量运行时按各阶段的过期时间判断是否需要重新获取，未过期的BV号直接沿用登记的结果行
+    """
+
+    STAGES = ("detail", "comment")
+
+    def __init__(self, path, max_ages: Dict[str, Optional[float]] = None):
+        """
+        Args:
+            path: sqlite数据库文件路径
+            max_ages: 各阶段的过期时间(秒)，{"detail": ..., "comment": ...}；为None或0的阶段每次都重新获取
+        """
+        self.path = path
+        self.max_ages = dict(DEFAULT_MAX_AGES)
+        self.max_ages.update(max_ages or {})
+        self.skipped = {stage: 0 for stage in self.STAGES}
+        self.refreshed = {stage: 0 for stage in self.STAGES}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def from_config(cls, config) -> Optional["BvRegistry"]:
+        """
+        根据 config["bv_registry"] 创建登记表，未启用时返回None；文件默认位于 raw_data_dir 下
+
+        Args:
+            config: 配置字典
+        """
+        options = dict(config.get("bv_registry") or {})
+        if not options.pop("enabled", False):
+            return None
+        path = options.pop("path", None) or os.path.join(config.get("raw_data_dir", "./raw_data"), "bv_registry.sqlite3")
+        return cls(path, **options)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def mark_seen(self, bvids: Iterable[str], now=None):
+        """登记本次搜索到的BV号"""
+        now = time.time() if now is None else now
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO bv (bvid, first_seen, last_seen) VALUES (?, ?, ?) "
+                "ON CONFLICT(bvid) DO UPDATE SET last_seen = excluded.last_seen",
+                [(bvid, now, now) for bvid in bvids])
+
+    def _is_fresh(self, stage, last, now) -> bool:
+        max_age = self.max_ages.get(stage)
+        return bool(max_age) and last is not None and now - last < max_age
+
+    def fresh_rows(self, bvids: Iterable[str], row_mode, now=None) -> Dict[str, Dict]:
+        """
+        返回详情未过期、且登记了同一输出模式结果行的BV号及其结果行，这些BV号本次可跳过详情获取
+
+        Args:
+            bvids: 待判断的BV号
+            row_mode: 输出模式("full"/"simple")，模式不同的结果行不能沿用
+        """
+        now = time.time() if now is None else now
+        rows = {}
+        for bvid, last_detail, mode, row in self._select(bvids, "last_detail, row_mode, row"):
+            if row is not None and mode == row_mode and self._is_fresh("detail", last_detail, now):
+                rows[bvid] = json.loads(row)
+        self.skipped["detail"] += len(rows)
+        return rows
+
+    def needs_comments(self, bvid, now=None) -> bool:
+        """评论是否需要重新采集"""
+        now = time.time() if now is None else now
+        found = self._select([bvid], "last_comment")
+        if found and self._is_fresh("comment", found[0][1], now):
+            self.skipped["comment"] += 1
+            return False
+        return True
+
+    def record_details(self, rows: Dict[str, Dict], row_mode, now=None):
+        """登记成功获取详情的BV号及其输出结果行"""
+        now = time.time() if now is None else now
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO bv (bvid, first_seen, last_seen, last_detail, row_mode, row) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(bvid) DO UPDATE SET last_detail = excluded.last_detail, "
+                "row_mode = excluded.row_mode, row = excluded.row",
+                [(bvid, now, now, now, row_mode, json.dumps(row, ensure_ascii=False, default=str))
+                 for bvid, row in rows.items()])
+        self.refreshed["detail"] += len(rows)
+
+    def record_comments(self, bvid, now=None):
+        """登记评论采集完成的时间"""
+        now = time.time() if now is None else now
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO bv (bvid, first_seen, last_seen, last_comment) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(bvid) DO UPDATE SET last_comment = excluded.last_comment",
+                (bvid, now, now, now))
+        self.refreshed["comment"] += 1
+
+    def _select(self, bvids: Iterable[str], columns) -> List[tuple]:
+        bvids = list(bvids)
+        found = []
+        # sqlite单条语句的参数个数有限，分批查询
+        for start in range(0, len(bvids), 500):
+            chunk = bvids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            found.extend(self._conn.execute(
+                f"SELECT bvid, {columns} FROM bv WHERE bvid IN ({placeholders})", chunk).fetchall())
+        return found
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM bv").fetchone()[0]
+
+    def stats(self):
+        return {"known": len(self), "skipped": dict(self.skipped), "refreshed": dict(self.refreshed)}
@@ -0,0 +1,154 @@
+import base64
+import gzip
+import json
+import os
+from collections import deque
+from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+# 每次请求都会变化、与响应内容无关的查询参数：WBI签名的时间戳与签名值
+DEFAULT_VOLATILE_PARAMS = ("wts", "w_rid")
+
+
+class CassetteMissError(Exception):
+    """回放模式下请求的URL没有录制记录"""
+
+
+class RecordedResponse:
+    """录制的一次响应，提供与 aiohttp.ClientResponse 解析时用到的相同接口"""
+
+    __slots__ = ("url", "status", "body", "charset")
+
+    def __init__(self, url, status, body: bytes, charset=None):
+        self.url = url
+        self.status = status
+        self.body = body
+        self.charset = charset
+
+    def get_encoding(self):
+        return self.charset or "utf-8"
+
+    def text(self):
+        return self.body.decode(self.get_encoding())
+
+
+class Cassette:
+    """
+    HTTP录制/回放
+    录制模式下把每次请求的响应(状态码与原始响应体)按接口追加写入 <目录>/<接口>.jsonl.gz；
+    回放模式下完全不联网，按规范化后的URL依次返回录制的响应，同一URL录制了多次(如失败后重试)时按录制顺序返回，
+    用尽后重复返回最后一次，便于在真实流量上反复对比解析与流水线改动
+    """
+
+    RECORD = "record"
+    REPLAY = "replay"
+
+    def __init__(self, cassette_dir, mode=REPLAY, volatile_params=DEFAULT_VOLATILE_PARAMS):
+        """
+        Args:
+            cassette_dir: 录制文件目录
+            mode: "record" 录制 或 "replay" 回放
+            volatile_params: 匹配URL时忽略的查询参数
+        """
+        if mode not in (self.RECORD, self.REPLAY):
+            raise ValueError(f"不支持的模式: {mode}")
+        self.cassette_dir = cassette_dir
+        self.mode = mode
+        self.volatile_params = frozenset(volatile_params)
+        self.recorded = 0
+        self.played = 0
+        self.missed = 0
+        self._writers = {}
+        self._tapes: Dict[str, Dict[str, deque]] = {}
+        if mode == self.RECORD:
+            os.makedirs(cassette_dir, exist_ok=True)
+        elif not os.path.isdir(cassette_dir):
+            raise FileNotFoundError(f"录制目录不存在: {cassette_dir}")
+
+    @classmethod
+    def from_config(cls, config) -> Optional["Cassette"]:
+        """
+        根据 config["cassette"] 创建录制/回放，mode为空时返回None；目录默认位于 raw_data_dir 下
+
+        Args:
+            config: 配置字典
+        """
+        options = dict(config.get("cassette") or {})
+        mode = options.pop("mode", None)
+        if not mode:
+            return None
+        cassette_dir = options.pop("dir", None) or os.path.join(config.get("raw_data_dir", "./raw_data"), "cassettes")
+        return cls(cassette_dir, mode, **options)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == self.REPLAY
+
+    def normalize(self, url) -> str:
+        """去掉易变参数并按参数名排序，使同一资源的不同次请求得到相同的键"""
+        parts = urlsplit(url)
+        query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                       if k not in self.volatile_params)
+        return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+    def _tape_path(self, endpoint) -> str:
+        return os.path.join(self.cassette_dir, f"{endpoint or 'other'}.jsonl.gz")
+
+    def record(self, endpoint, url, status, body: bytes, charset=None):
+        """追加一条录制记录"""
+        if self.mode != self.RECORD:
+            return
+        entry = {"key": self.normalize(url), "url": url, "status": status, "charset": charset}
+        try:
+            entry["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_b64"] = base64.b64encode(body).decode("ascii")
+        endpoint = endpoint or "other"
+        writer = self._writers.get(endpoint)
+        if writer is None:
+            writer = self._writers[endpoint] = gzip.open(self._tape_path(endpoint), "at", encoding="utf-8")
+        writer.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.recorded += 1
+
+    def _load(self, endpoint) -> Dict[str, deque]:
+        tape = self._tapes.get(endpoint)
+        if tape is not None:
+            return tape
+        tape = self._tapes[endpoint] = {}
+        path = self._tape_path(endpoint)
+        if not os.path.exists(path):
+            return tape
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        tape.setdefault(entry["key"], deque()).append(entry)
+        except (EOFError, OSError, ValueError):
+            # 录制进程中途退出时文件末尾可能不完整，保留已读到的记录
+            pass
+        return tape
+
+    def play(self, endpoint, url) -> RecordedResponse:
+        """返回录制的响应，没有记录时抛出 CassetteMissError"""
+        entries = self._load(endpoint or "other").get(self.normalize(url))
+        if not entries:
+            self.missed += 1
+            raise CassetteMissError(f"回放模式下没有录制记录: {url}")
+        entry = entries.popleft() if len(entries) > 1 else entries[0]
+        if "body_b64" in entry:
+            body = base64.b64decode(entry["body_b64"])
+        else:
+            body = entry["body"].encode("utf-8")
+        self.played += 1
+        return RecordedResponse(entry["url"], entry["status"], body, entry.get("charset"))
+
+    def close(self):
+        """写完并关闭录制文件"""
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+    def stats(self):
+        return {"mode": self.mode, "recorded": self.recorded, "played": self.played, "missed": self.missed}
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+
+# 触发风控/限流的B站业务码：-352 风控校验失败，-412 请求被拦截
+THROTTLE_CODES = (-352, -412)
+# 触发风控的HTTP状态码
+THROTTLE_STATUS = (412, 429)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD(加性增、乘性减)自适应并发控制器
+    请求健康(成功且延迟低于阈值)时缓慢提高并发上限，遇到风控状态码、业务码或超时时按比例骤降
+    搜索、详情、评论各阶段共用同一个实例，由HttpClient在每次请求前后调用
+    """
+
+    def __init__(self, initial=3, min_limit=1, max_limit=10, increase=1.0, decrease=0.5,
+                 latency_threshold=3.0, cooldown=1.0):
+        """
+        Args:
+            initial: 初始并发上限
+            min_limit: 并发上限的下界
+            max_limit: 并发上限的上界
+            increase: 每个"满窗口"成功请求后增加的并发数
+            decrease: 遇到风控时并发上限的乘数
+            latency_threshold: 判定为健康请求的最大延迟(秒)
+            cooldown: 两次降低并发之间的最短间隔(秒)，避免同一波失败连续多次减半
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_threshold = latency_threshold
+        self.cooldown = cooldown
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = None
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _condition(self):
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def acquire(self):
+        """等待直到在途请求数低于当前并发上限"""
+        cond = self._condition()
+        async with cond:
+            while self._in_flight >= self.current_limit:
+                await cond.wait()
+            self._in_flight += 1
+
+    async def release(self):
+        cond = self._condition()
+        async with cond:
+            self._in_flight -= 1
+            cond.notify_all()
+
+    def slot(self):
+        """以 async with 的方式占用一个并发名额"""
+        return _Slot(self)
+
+    def on_success(self, latency):
+        """记录一次成功请求：延迟健康时按 increase/limit 加性增长，约每个满窗口并发上限+increase"""
+        if latency > self.latency_threshold:
+            return
+        old_limit = self.current_limit
+        self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+        if self.current_limit > old_limit and self._cond is not None:
+            # 上限提高后唤醒等待者；notify需要持有锁，交给事件循环异步执行
+            asyncio.ensure_future(self._notify())
+
+    def on_throttle(self):
+        """记录一次风控/超时：乘性降低并发上限"""
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+
+    async def _notify(self):
+        cond = self._condition()
+        async with cond:
+            cond.notify_all()
+
+
+class _Slot:
+    def __init__(self, controller):
+        self.controller = controller
+
+    async def __aenter__(self):
+        await self.controller.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.controller.release()
@@ -0,0 +1,103 @@
+from http_client import HttpClient
+from rate_limiter import RateLimiter
+from concurrency import AdaptiveConcurrency
+from retry_policy import RetryPolicy, CircuitBreakers
+from proxy_pool import ProxyPool
+from response_cache import ResponseCache
+from telemetry import Telemetry
+from cassette import Cassette
+from hedging import HedgePolicy
+
+
+class CrawlGovernor:
+    """
+    爬虫的并发与节奏总控
+    由 config 中的 max_concurrency / batch_size / retry_times / retry_base_delay / retry_max_delay 等配置构建，
+    搜索、详情、评论各阶段都通过它创建的 HttpClient 发起请求，调参只需修改配置或命令行参数
+    """
+
+    def __init__(self, max_concurrency=10, batch_size=5, retry_times=2, retry_base_delay=1.0, retry_max_delay=30.0,
+                 retry_jitter=0.5, rate_limits=None, adaptive_concurrency=None, circuit_breaker=None, proxy_pool=None,
+                 cache=None, telemetry=None, cassette=None, hedging=None):
+        """
+        Args:
+            max_concurrency: 最大并发请求数，同时作为连接池单主机连接上限
+            batch_size: 详情阶段每批次提交的视频数
+            retry_times: 请求失败后的重试次数(不含首次请求)
+            retry_base_delay: 首次重试前的最长等待时间(秒)，之后每次重试翻倍
+            retry_max_delay: 单次重试等待时间上限(秒)
+            retry_jitter: 重试等待的随机抖动比例，见 RetryPolicy
+            rate_limits: 各接口的令牌桶预算，见 rate_limiter.DEFAULT_RATE_LIMITS
+            adaptive_concurrency: AdaptiveConcurrency 的其余参数
+            circuit_breaker: CircuitBreakers 的参数
+            proxy_pool: 代理池 ProxyPool，为空时直连
+            cache: 原始响应磁盘缓存 ResponseCache，为空时不缓存
+            telemetry: 请求遥测 Telemetry，为空时只在内存中统计、不导出
+            cassette: HTTP录制/回放 Cassette，为空时正常联网请求
+            hedging: 详情请求的对冲策略 HedgePolicy，为空时不对冲
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.batch_size = max(1, int(batch_size))
+        self.retry_times = max(0, int(retry_times))
+
+        self.rate_limiter = RateLimiter.from_config({"rate_limits": rate_limits})
+        concurrency_options = dict(adaptive_concurrency or {})
+        concurrency_options["max_limit"] = self.max_concurrency
+        self.concurrency = AdaptiveConcurrency(**concurrency_options)
+        self.retry_policy = RetryPolicy(
+            max_retries=self.retry_times + 1,
+            base_delay=retry_base_delay,
+            max_delay=retry_max_delay,
+            jitter=retry_jitter,
+        )
+        self.breakers = CircuitBreakers(**(circuit_breaker or {}))
+        self.proxy_pool = proxy_pool
+        self.cache = cache
+        self.telemetry = telemetry if telemetry is not None else Telemetry()
+        self.cassette = cassette
+        self.hedging = hedging
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        根据配置字典创建总控
+
+        Args:
+            config: 配置字典
+        """
+        deprecated = [key for key in ("delay_min", "delay_max") if key in config]
+        if deprecated:
+            # 旧版本中这两项是请求间隔的随机等待，现在请求节奏由 rate_limits 的令牌桶控制
+            print(f"警告: 配置项 {'/'.join(deprecated)} 已废弃并被忽略，请求间隔请通过 rate_limits 设置，"
+                  f"重试等待请通过 retry_base_delay / retry_max_delay / retry_jitter 设置")
+        return cls(
+            max_concurrency=config.get("max_concurrency", 10),
+            batch_size=config.get("batch_size", 5),
+            retry_times=config.get("retry_times", 2),
+            retry_base_delay=config.get("retry_base_delay", 1.0),
+            retry_max_delay=config.get("retry_max_delay", 30.0),
+            retry_jitter=config.get("retry_jitter", 0.5),
+            rate_limits=config.get("rate_limits"),
+            adaptive_concurrency=config.get("adaptive_concurrency"),
+            circuit_breaker=config.get("circuit_breaker"),
+            proxy_pool=ProxyPool.from_config(config),
+            cache=ResponseCache.from_config(config),
+            telemetry=Telemetry.from_config(config),
+            cassette=Cassette.from_config(config),
+            hedging=HedgePolicy.from_config(config),
+        )
+
+    def create_client(self) -> HttpClient:
+        """创建共用本总控限速、并发、重试、熔断、代理池、缓存、遥测、录制回放与对冲策略的HTTP客户端"""
+        return HttpClient(
+            limit_per_host=self.max_concurrency,
+            rate_limiter=self.rate_limiter,
+            concurrency=self.concurrency,
+            retry_policy=self.retry_policy,
+            breakers=self.breakers,
+            proxy_pool=self.proxy_pool,
+            cache=self.cache,
+            telemetry=self.telemetry,
+            cassette=self.cassette,
+            hedging=self.hedging,
+        )
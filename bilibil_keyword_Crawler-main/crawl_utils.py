@@ -3,6 +3,7 @@ import json
 import pandas as pd
 import numpy as np
 from typing import List, Dict, Any
+from models import Comment
 
 def generate_combinations(arra, arrb):
     """生成关键词笛卡尔积"""
@@ -47,7 +48,7 @@ def extract_comment_data(csv_path):
         csv_path: 评论CSV文件路径
         
     Returns:
-        评论数据列表
+        评论(Comment)列表，列数不足的行会被跳过
     """
     comments_data = []
     try:
@@ -55,7 +56,9 @@ def extract_comment_data(csv_path):
             csv_reader = csv.reader(file)
             next(csv_reader)  # 跳过表头
             for row in csv_reader:
-                comments_data.append(row)
+                comment = Comment.from_row(row)
+                if comment is not None:
+                    comments_data.append(comment)
         return comments_data
     except Exception as e:
         print(f"读取评论文件失败: {e}")
@@ -67,62 +70,61 @@ def prepare_full_video_data(video):
     准备完整的视频数据（用于全字段导出）
     
     Args:
-        video: 视频数据字典
+        video: 视频(Video)
         
     Returns:
         格式化后的视频完整数据
     """
-    video_info = video["video"]
-    owner_info = video["owner"]
-    pages_info = video.get("pages", [])
-    honors_info = video.get("honors", [])
+    owner_info = video.owner
+    pages_info = [page.to_dict() for page in video.pages]
+    honors_info = [honor.to_dict() for honor in video.honors]
     
     result = {
         # 基本信息
-        "bvid": video_info.get("bvid", ""),
-        "aid": video_info.get("aid", 0),
-        "title": video_info.get("title", ""),
-        "cover_url": video_info.get("cover_url", ""),
+        "bvid": video.bvid,
+        "aid": video.aid,
+        "title": video.title,
+        "cover_url": video.cover_url,
         
         # 分类信息
-        "tid": video_info.get("tid", 0),
-        "tname": video_info.get("tname", ""),
-        "tid_v2": video_info.get("tid_v2", 0),
-        "tname_v2": video_info.get("tname_v2", ""),
+        "tid": video.tid,
+        "tname": video.tname,
+        "tid_v2": video.tid_v2,
+        "tname_v2": video.tname_v2,
         
         # 视频描述
-        "description": video_info.get("description", ""),
-        "keywords": video_info.get("keywords", ""),
-        "dynamic": video_info.get("dynamic", ""),
+        "description": video.description,
+        "keywords": video.keywords,
+        "dynamic": video.dynamic,
         
         # 时间信息
-        "pubdate": video_info.get("pubdate", ""),
-        "ctime": video_info.get("ctime", ""),
+        "pubdate": video.pubdate,
+        "ctime": video.ctime,
         
         # 视频属性
-        "duration": video_info.get("duration", 0),
-        "videos": video_info.get("videos", 0),
+        "duration": video.duration,
+        "videos": video.videos,
         
         # 版权信息
-        "copyright": video_info.get("copyright", 0),
-        "no_reprint": video_info.get("no_reprint", False),
-        "is_downloadable": video_info.get("is_downloadable", False),
-        "autoplay": video_info.get("autoplay", False),
+        "copyright": video.copyright,
+        "no_reprint": video.no_reprint,
+        "is_downloadable": video.is_downloadable,
+        "autoplay": video.autoplay,
         
         # 统计数据
-        "view_count": video_info.get("view_count", 0),
-        "danmaku_count": video_info.get("danmaku_count", 0),
-        "reply_count": video_info.get("reply_count", 0),
-        "favorite_count": video_info.get("favorite_count", 0),
-        "coin_count": video_info.get("coin_count", 0),
-        "share_count": video_info.get("share_count", 0),
-        "like_count": video_info.get("like_count", 0),
-        "dislike_count": video_info.get("dislike_count", 0),
+        "view_count": video.view_count,
+        "danmaku_count": video.danmaku_count,
+        "reply_count": video.reply_count,
+        "favorite_count": video.favorite_count,
+        "coin_count": video.coin_count,
+        "share_count": video.share_count,
+        "like_count": video.like_count,
+        "dislike_count": video.dislike_count,
         
         # UP主信息
-        "owner_mid": video_info.get("owner_mid", 0),
-        "owner_name": owner_info.get("name", ""),
-        "owner_face": owner_info.get("face_url", ""),
+        "owner_mid": video.owner_mid,
+        "owner_name": owner_info.name,
+        "owner_face": owner_info.face_url,
         
         # 分P信息
         "page_count": len(pages_info),
@@ -132,8 +134,8 @@ def prepare_full_video_data(video):
         "honors": json.dumps(honors_info, ensure_ascii=False) if honors_info else "[]",
         
         # 其他信息
-        "state": video_info.get("state", 0),
-        "mission_id": video_info.get("mission_id", 0),
+        "state": video.state,
+        "mission_id": video.mission_id,
     }
     
     # 处理可能的 NaN 或特殊值
@@ -149,28 +151,25 @@ def prepare_simple_video_data(video):
     准备简洁版的视频数据（用于简洁输出）
     
     Args:
-        video: 视频数据字典
+        video: 视频(Video)
         
     Returns:
         格式化后的视频简洁数据
     """
-    video_info = video["video"]
-    owner_info = video["owner"]
-    
     return {
-        "BV号": video_info.get("bvid", ""),
-        "标题": video_info.get("title", ""),
-        "UP主": owner_info.get("name", ""),
-        "分区": f"{video_info.get('tname', '')} ({video_info.get('tid', '')})",
-        "播放量": video_info.get("view_count", 0),
-        "弹幕数": video_info.get("danmaku_count", 0),
-        "收藏": video_info.get("favorite_count", 0),
-        "硬币": video_info.get("coin_count", 0),
-        "分享": video_info.get("share_count", 0),
-        "点赞": video_info.get("like_count", 0),
-        "发布时间": video_info.get("pubdate", ""),
-        "简介": video_info.get("description", ""),
-        "AV号": video_info.get("aid", 0)
+        "BV号": video.bvid,
+        "标题": video.title,
+        "UP主": video.owner.name,
+        "分区": f"{video.tname} ({video.tid})",
+        "播放量": video.view_count,
+        "弹幕数": video.danmaku_count,
+        "收藏": video.favorite_count,
+        "硬币": video.coin_count,
+        "分享": video.share_count,
+        "点赞": video.like_count,
+        "发布时间": video.pubdate,
+        "简介": video.description,
+        "AV号": video.aid
     }
 
 
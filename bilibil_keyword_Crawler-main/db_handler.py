@@ -159,7 +159,7 @@ class DatabaseHandler:
         插入视频数据到数据库
         
         Args:
-            videos_data: 包含视频信息的字典列表
+            videos_data: 视频(Video)列表
         """
         # 连接检查
         try:
@@ -184,38 +184,37 @@ class DatabaseHandler:
         owners_seen = set()  # 用于去重UP主
         
         for video in tqdm(videos_data, desc="处理视频数据"):
-            video_info = video["video"]
-            owner_info = video["owner"]
+            owner_info = video.owner
             
             # 处理视频信息
             videos_to_insert.append((
-                video_info.get("bvid", ""),
-                video_info.get("aid", 0),
-                video_info.get("title", "")[:255],  # 限制标题长度
-                video_info.get("cover_url", "")[:255],
-                video_info.get("tid", 0),
-                video_info.get("tname", "")[:50],
-                video_info.get("description", ""),
-                self._parse_datetime(video_info.get("pubdate", "")),
-                self._parse_datetime(video_info.get("ctime", "")),
-                video_info.get("duration", 0),
-                video_info.get("view_count", 0),
-                video_info.get("danmaku_count", 0),
-                video_info.get("reply_count", 0),
-                video_info.get("favorite_count", 0),
-                video_info.get("coin_count", 0),
-                video_info.get("share_count", 0),
-                video_info.get("like_count", 0),
-                video_info.get("owner_mid", 0)
+                video.bvid,
+                video.aid,
+                video.title[:255],  # 限制标题长度
+                video.cover_url[:255],
+                video.tid,
+                video.tname[:50],
+                video.description,
+                self._parse_datetime(video.pubdate),
+                self._parse_datetime(video.ctime),
+                video.duration,
+                video.view_count,
+                video.danmaku_count,
+                video.reply_count,
+                video.favorite_count,
+                video.coin_count,
+                video.share_count,
+                video.like_count,
+                video.owner_mid
             ))
             
             # 处理UP主信息（确保不重复）
-            owner_mid = owner_info.get("mid", 0)
+            owner_mid = owner_info.mid
             if owner_mid > 0 and owner_mid not in owners_seen:
                 owners_to_insert.append((
                     owner_mid,
-                    owner_info.get("name", "")[:100],
-                    owner_info.get("face_url", "")[:255]
+                    owner_info.name[:100],
+                    owner_info.face_url[:255]
                 ))
                 owners_seen.add(owner_mid)
         
@@ -277,7 +276,7 @@ class DatabaseHandler:
         插入评论数据到数据库
         
         Args:
-            comments_data: 评论数据列表
+            comments_data: 评论(Comment)列表
             bvid: 视频BV号
             aid: 视频AV号（OID）
         """
@@ -299,31 +298,25 @@ class DatabaseHandler:
         comments_to_insert = []
         
         for comment in comments_data:
-            # 处理评论信息（根据CSV文件格式）
-            # 假设comment是一个包含15个元素的列表，对应CSV的15列
-            if len(comment) >= 15:
-                try:
-                    # 格式: [序号, 上级评论ID, 评论ID, 用户ID, 用户名, 用户等级, 性别, 评论内容, 评论时间, 回复数, 点赞数, 个性签名, IP属地, 是否是大会员, 头像]
-                    rpid = comment[2]  # 评论ID
-                    parent_id = comment[1] if comment[1] else 0  # 上级评论ID
-                    mid = comment[3]  # 用户ID
-                    username = comment[4][:100] if comment[4] else ""  # 用户名
-                    level = int(comment[5]) if comment[5] and comment[5].isdigit() else 0  # 用户等级
-                    gender = comment[6][:10] if comment[6] else ""  # 性别
-                    content = comment[7]  # 评论内容
-                    comment_time = self._parse_datetime(comment[8])  # 评论时间
-                    reply_count = int(comment[9]) if comment[9] and str(comment[9]).isdigit() else 0  # 回复数
-                    like_count = int(comment[10]) if comment[10] and str(comment[10]).isdigit() else 0  # 点赞数
-                    ip_location = comment[12][:50] if comment[12] else ""  # IP属地
-                    is_vip = comment[13][:5] if comment[13] else "否"  # 是否是大会员
-                    
-                    comments_to_insert.append((
-                        rpid, parent_id, aid, bvid, mid, username, level, gender,
-                        content, comment_time, reply_count, like_count, ip_location, is_vip
-                    ))
-                except (ValueError, TypeError) as e:
-                    print(f"处理评论数据时出错: {e}, 数据: {comment}")
-                    continue
+            # 从CSV读取的评论字段均为字符串，数值字段在这里转换
+            try:
+                parent_id = comment.parent_id if comment.parent_id else 0
+                username = comment.username[:100] if comment.username else ""
+                level = int(comment.level) if str(comment.level).isdigit() else 0
+                gender = comment.sex[:10] if comment.sex else ""
+                comment_time = self._parse_datetime(comment.ctime)
+                reply_count = int(comment.reply_count) if str(comment.reply_count).isdigit() else 0
+                like_count = int(comment.like_count) if str(comment.like_count).isdigit() else 0
+                ip_location = comment.ip_location[:50] if comment.ip_location else ""
+                is_vip = comment.is_vip[:5] if comment.is_vip else "否"
+                
+                comments_to_insert.append((
+                    comment.rpid, parent_id, aid, bvid, comment.mid, username, level, gender,
+                    comment.content, comment_time, reply_count, like_count, ip_location, is_vip
+                ))
+            except (ValueError, TypeError) as e:
+                print(f"处理评论数据时出错: {e}, 数据: {comment}")
+                continue
         
         try:
             if comments_to_insert:
@@ -0,0 +1,170 @@
+import asyncio
+import contextvars
+import time
+from typing import Dict, Optional
+from telemetry import Histogram
+
+
+class _Attempt:
+    """一次对冲执行中单个请求的网络阶段：开始发送的时间与网络耗时，由 HttpClient 发送请求时填写"""
+
+    __slots__ = ("sending", "started", "latency")
+
+    def __init__(self):
+        self.sending = asyncio.Event()
+        self.started = None
+        self.latency = None
+
+
+# 当前任务所属的对冲请求；每个请求在各自的任务中运行，任务创建时复制上下文，互不影响
+_ATTEMPT = contextvars.ContextVar("hedge_attempt", default=None)
+
+
+def network_started():
+    """HttpClient 在等待完限速令牌与并发名额、真正发出请求时调用"""
+    attempt = _ATTEMPT.get()
+    if attempt is not None:
+        attempt.started = time.monotonic()
+        attempt.sending.set()
+
+
+def network_finished(latency):
+    """HttpClient 收到响应后调用，记录不含排队时间的网络耗时"""
+    attempt = _ATTEMPT.get()
+    if attempt is not None:
+        attempt.latency = latency
+
+
+class HedgePolicy:
+    """
+    对冲请求(hedged request)
+    请求真正发出后的网络耗时超过历史网络耗时的指定分位数仍未返回时，再发起一个相同的请求，取先成功返回的结果并取消另一个；
+    在限速令牌与并发名额上排队的时间既不计入耗时，也不触发对冲。对冲请求同样经过限速器与并发控制，
+    数量不超过总请求数的 max_ratio，且在限速器或并发控制器已经饱和时不发起，不会突破全局请求预算
+    """
+
+    def __init__(self, percentile=0.95, min_samples=20, max_ratio=0.1, min_delay=0.2):
+        """
+        Args:
+            percentile: 触发对冲的耗时分位数
+            min_samples: 样本数达到多少后才开始对冲
+            max_ratio: 对冲请求数占总请求数的上限
+            min_delay: 触发对冲前的最短等待(秒)，避免缓存命中拉低分位数后过早对冲
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_ratio = max_ratio
+        self.min_delay = min_delay
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.saturated = 0
+        self._histograms: Dict[str, Histogram] = {}
+
+    @classmethod
+    def from_config(cls, config) -> Optional["HedgePolicy"]:
+        """
+        根据 config["hedging"] 创建对冲策略，未启用时返回None
+
+        Args:
+            config: 配置字典
+        """
+        options = dict(config.get("hedging") or {})
+        if not options.pop("enabled", False):
+            return None
+        return cls(**options)
+
+    def delay(self, endpoint) -> Optional[float]:
+        """当前触发对冲的等待时间，样本不足时返回None(不对冲)"""
+        histogram = self._histograms.get(endpoint)
+        if histogram is None or histogram.count < self.min_samples:
+            return None
+        return max(self.min_delay, histogram.quantile(self.percentile))
+
+    def _observe(self, endpoint, attempt):
+        elapsed = attempt.latency
+        if elapsed is None:
+            # 没有经过 HttpClient 发出请求(如命中缓存)，不计入网络耗时
+            return
+        histogram = self._histograms.get(endpoint)
+        if histogram is None:
+            histogram = self._histograms[endpoint] = Histogram()
+        histogram.observe(elapsed)
+
+    @staticmethod
+    def _start(factory):
+        attempt = _Attempt()
+        token = _ATTEMPT.set(attempt)
+        try:
+            task = asyncio.ensure_future(factory())
+        finally:
+            _ATTEMPT.reset(token)
+        return task, attempt
+
+    async def _wait_sent(self, task, attempt):
+        """等待请求发出或提前结束(排队期间不计时)，返回请求是否已结束"""
+        if attempt.sending.is_set():
+            return task.done()
+        sending = asyncio.ensure_future(attempt.sending.wait())
+        try:
+            await asyncio.wait({task, sending}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            sending.cancel()
+        return task.done()
+
+    async def run(self, endpoint, factory, saturated=None):
+        """
+        执行 factory() 返回的协程，请求发出后超过对冲阈值仍未返回时并发执行第二个 factory()，返回先成功的结果
+        两个请求都失败时抛出后失败的异常
+
+        Args:
+            endpoint: 接口名，各接口分别统计网络耗时分位数
+            factory: 无参数、返回协程的函数
+            saturated: 无参数、返回限速器或并发控制器是否已饱和的函数，饱和时不发起对冲
+        """
+        self.calls += 1
+        delay = self.delay(endpoint)
+        primary, attempt = self._start(factory)
+        backup = None
+        try:
+            if delay is None or self.hedges >= self.max_ratio * self.calls:
+                result = await primary
+                self._observe(endpoint, attempt)
+                return result
+            if not await self._wait_sent(primary, attempt):
+                remaining = delay - (time.monotonic() - attempt.started)
+                await asyncio.wait({primary}, timeout=max(0.0, remaining))
+            if primary.done():
+                result = primary.result()
+                self._observe(endpoint, attempt)
+                return result
+            if saturated is not None and saturated():
+                # 对冲请求只会继续排队，反而占用其他请求的名额
+                self.saturated += 1
+                result = await primary
+                self._observe(endpoint, attempt)
+                return result
+            self.hedges += 1
+            backup, backup_attempt = self._start(factory)
+            attempts = {primary: attempt, backup: backup_attempt}
+            pending = {primary, backup}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedge_wins += 1
+                        self._observe(endpoint, attempts[task])
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # 返回或被取消时清理仍在进行的请求
+            for task in (primary, backup):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self):
+        return {"calls": self.calls, "hedges": self.hedges, "hedge_wins": self.hedge_wins,
+                "saturated": self.saturated}
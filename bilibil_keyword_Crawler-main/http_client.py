@@ -0,0 +1,266 @@
+import asyncio
+import time
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+from rate_limiter import RateLimiter
+from concurrency import AdaptiveConcurrency
+from retry_policy import RetryPolicy, CircuitBreakers, BilibiliAPIError, is_risk_control
+from response_cache import CacheMissError
+from json_codec import loads as json_loads
+from telemetry import Telemetry
+from hedging import network_finished, network_started
+
+
+class HttpClient:
+    """
+    共享连接池的异步HTTP客户端
+    在整个生命周期内复用同一个 aiohttp.ClientSession，避免每次请求都重新进行TCP+TLS握手
+    """
+
+    def __init__(self, limit=100, limit_per_host=10, ttl_dns_cache=300, keepalive_timeout=30, timeout=15,
+                 rate_limiter=None, concurrency=None, retry_policy=None, breakers=None, proxy_pool=None,
+                 cache=None, telemetry=None, cassette=None, hedging=None):
+        """
+        初始化HTTP客户端
+
+        Args:
+            limit: 连接池总连接数上限
+            limit_per_host: 单个主机的连接数上限
+            ttl_dns_cache: DNS缓存时间(秒)
+            keepalive_timeout: 空闲连接保持时间(秒)
+            timeout: 单次请求总超时时间(秒)
+            rate_limiter: 按接口限速的 RateLimiter，为空时使用默认预算
+            concurrency: 自适应并发控制器 AdaptiveConcurrency，为空时使用默认参数
+            retry_policy: 供调用方复用的重试策略 RetryPolicy
+            breakers: 按接口划分的熔断器 CircuitBreakers
+            proxy_pool: 代理池 ProxyPool，为空时直连
+            cache: 原始响应磁盘缓存 ResponseCache，为空时不缓存
+            telemetry: 请求遥测 Telemetry，为空时只在内存中统计、不导出
+            cassette: HTTP录制/回放 Cassette，回放模式下不发起任何网络请求
+            hedging: 对冲请求策略 HedgePolicy，为空时不对冲
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.concurrency = concurrency if concurrency is not None else AdaptiveConcurrency()
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.breakers = breakers if breakers is not None else CircuitBreakers()
+        self.proxy_pool = proxy_pool
+        self.cache = cache
+        self.telemetry = telemetry if telemetry is not None else Telemetry()
+        self.cassette = cassette
+        self.hedging = hedging
+        self._session = None
+        # 单飞(single-flight)：进行中的请求，相同key的并发调用共享同一个Future
+        self._inflight = {}
+        self.coalesced = 0
+
+    async def __aenter__(self):
+        await self.get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """获取(必要时创建)共享会话"""
+        if self.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.ttl_dns_cache,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            # Cookie由调用方按请求显式传入，不在会话间累积服务端下发的Cookie
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                cookie_jar=aiohttp.DummyCookieJar(),
+            )
+            self.telemetry.start()
+        return self._session
+
+    async def close(self):
+        """关闭会话并释放连接池"""
+        if not self.closed:
+            await self._session.close()
+            # 留出时间让底层SSL连接完成关闭，避免退出时出现 Unclosed connection 警告
+            await asyncio.sleep(0.25)
+            await self.telemetry.stop()
+        if self.cassette is not None:
+            self.cassette.close()
+        self._session = None
+
+    async def singleflight(self, key, factory):
+        """
+        合并相同key的并发调用：第一个调用执行 factory()，执行期间到达的相同调用直接等待并共享其结果(或异常)
+        结果对象在调用方之间共享，调用方不应原地修改
+
+        Args:
+            key: 请求标识，如 ("video", bvid)
+            factory: 无参数、返回协程的函数
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(factory())
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield保证某个调用方被取消时不会连带取消其他调用方共享的请求
+        return await asyncio.shield(future)
+
+    async def hedged(self, endpoint, factory):
+        """
+        配置了对冲策略时以对冲方式执行 factory()，否则直接执行
+        对冲请求同样经过限速器，占用全局请求预算；对冲阈值只按请求发出后的网络耗时计算，限速器或并发控制器饱和时不对冲
+
+        Args:
+            endpoint: 接口名
+            factory: 无参数、返回协程的函数
+        """
+        if self.hedging is None or self._replaying:
+            return await factory()
+        return await self.hedging.run(endpoint, factory, saturated=lambda: self._saturated(endpoint))
+
+    def _saturated(self, endpoint) -> bool:
+        """并发名额已占满或接口令牌已用完时，新的请求只能排队"""
+        if self.concurrency.in_flight >= self.concurrency.current_limit:
+            return True
+        bucket = self.rate_limiter.buckets.get(endpoint)
+        return bucket is not None and not bucket.available()
+
+    def _request_kwargs(self, headers, cookies, timeout):
+        kwargs = {"headers": headers, "cookies": cookies}
+        # 未指定时沿用会话级超时；显式传入None会被aiohttp视为不限时
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+        return kwargs
+
+    async def _throttle(self, endpoint):
+        """按接口预算等待令牌，endpoint为空时不限速"""
+        if endpoint is not None:
+            await self.rate_limiter.acquire(endpoint)
+
+    async def _request(self, url, parse, headers=None, cookies=None, timeout=None, endpoint=None):
+        """
+        发送GET请求的公共流程：等待熔断恢复 -> 等待限速令牌 -> 占用并发名额 -> (选取代理) -> 请求 -> 反馈结果
+        先等令牌再占名额：等待低预算接口(如搜索)令牌的请求不占用共享的并发名额，不会拖慢其他接口的请求
+        parse(response, body) 负责把响应体转换为返回值，出错时直接抛出异常
+        """
+        if self._replaying:
+            return self._replay(url, parse, endpoint)
+        queued_at = time.monotonic()
+        breaker = self.breakers.get(endpoint) if endpoint is not None else None
+        if breaker is not None:
+            await breaker.wait()
+        await self._throttle(endpoint)
+        async with self.concurrency.slot():
+            session = await self.get_session()
+            kwargs = self._request_kwargs(headers, cookies, timeout)
+            if self.proxy_pool is None:
+                return await self._send(session, url, kwargs, parse, breaker, endpoint, queued_at)
+            async with self.proxy_pool.lease() as lease:
+                kwargs["proxy"] = lease.url
+                return await self._send(session, url, kwargs, parse, breaker, endpoint, queued_at, lease)
+
+    async def _send(self, session, url, kwargs, parse, breaker, endpoint, queued_at, lease=None):
+        """执行单次请求，并把延迟与结果反馈给并发控制器、熔断器、代理池和遥测"""
+        started = time.monotonic()
+        network_started()
+        status = None
+        nbytes = 0
+        try:
+            async with session.get(url, **kwargs) as response:
+                status = response.status
+                body = await response.read()
+                nbytes = len(body)
+                if self.cassette is not None:
+                    self.cassette.record(endpoint, url, status, body, response.charset)
+                response.raise_for_status()
+                result = parse(response, body)
+        except Exception as e:
+            self.telemetry.record_request(endpoint, url, time.monotonic() - started, started - queued_at,
+                                          status, nbytes, e)
+            if isinstance(e, asyncio.TimeoutError) or is_risk_control(e):
+                self.concurrency.on_throttle()
+            if breaker is not None:
+                breaker.record_failure(e)
+            if lease is not None:
+                lease.fail(e)
+            raise
+        latency = time.monotonic() - started
+        network_finished(latency)
+        self.telemetry.record_request(endpoint, url, latency, started - queued_at, status, nbytes)
+        self.concurrency.on_success(latency)
+        if breaker is not None:
+            breaker.record_success()
+        if lease is not None:
+            lease.succeed(latency)
+        return result
+
+    @property
+    def _replaying(self) -> bool:
+        return self.cassette is not None and self.cassette.replaying
+
+    def _replay(self, url, parse, endpoint):
+        """回放录制的响应，错误状态码与真实请求一样抛出 aiohttp.ClientResponseError"""
+        response = self.cassette.play(endpoint, url)
+        if response.status >= 400:
+            request_info = aiohttp.RequestInfo(URL(url), "GET", CIMultiDictProxy(CIMultiDict()), URL(url))
+            raise aiohttp.ClientResponseError(request_info, (), status=response.status, message="replayed")
+        return parse(response, response.body)
+
+    def _check_offline(self, url):
+        if self.cache is not None and self.cache.offline and not self._replaying:
+            raise CacheMissError(f"离线模式下缓存未命中: {url}")
+
+    async def get_text(self, url, headers=None, cookies=None, timeout=None, encoding=None, endpoint=None,
+                       validate=None) -> str:
+        """
+        GET请求并返回文本内容，encoding为空时按响应头自动识别，非200状态码抛出 aiohttp.ClientResponseError
+        配置了缓存时优先读取磁盘缓存；validate(text)为真(或未提供)时才写入缓存，避免缓存风控页面
+        """
+        # 录制/回放时不读缓存，保证录下(或回放)的是完整的真实请求序列
+        if self.cache is not None and self.cassette is None:
+            cached = await self.cache.get_async(endpoint, url)
+            if cached is not None:
+                self.telemetry.record_cache_hit(endpoint)
+                return cached
+        self._check_offline(url)
+
+        def parse(response, body):
+            return body.decode(encoding or response.get_encoding())
+
+        text = await self._request(url, parse, headers, cookies, timeout, endpoint)
+        # 回放的是录制时的旧响应，不写入缓存，以免覆盖或污染真实请求得到的缓存条目
+        if self.cache is not None and not self._replaying and (validate is None or validate(text)):
+            await self.cache.put_async(endpoint, url, text)
+        return text
+
+    async def get_json(self, url, headers=None, cookies=None, timeout=None, endpoint=None, check_code=True):
+        """
+        GET请求并返回解析后的JSON
+        非200状态码抛出 aiohttp.ClientResponseError；check_code为真时非0业务码抛出 BilibiliAPIError
+        """
+        self._check_offline(url)
+
+        def parse(response, body):
+            # 直接解码原始字节，省去先转成str的开销；使用已安装的最快JSON实现
+            data = json_loads(body)
+            if isinstance(data, dict) and "code" in data:
+                self.telemetry.record_code(endpoint, data["code"])
+                if check_code and data["code"] != 0:
+                    raise BilibiliAPIError(data["code"], data.get("message", ""), url)
+            return data
+
+        return await self._request(url, parse, headers, cookies, timeout, endpoint)
+
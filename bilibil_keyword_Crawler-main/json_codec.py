@@ -0,0 +1,44 @@
+"""
+JSON解码封装
+按 orjson > ujson > 标准库json 的顺序选择已安装的最快实现，接口与 json.loads 一致(接受 str 或 bytes)
+"""
+import json
+
+try:
+    import orjson
+
+    BACKEND = "orjson"
+
+    def loads(data):
+        return orjson.loads(data)
+
+except ImportError:
+    try:
+        import ujson
+
+        BACKEND = "ujson"
+
+        def loads(data):
+            return ujson.loads(data)
+
+    except ImportError:
+        BACKEND = "json"
+
+        def loads(data):
+            return json.loads(data)
+
+
+# 各后端的解码函数，供基准测试对比
+def available_backends():
+    backends = {"json": json.loads}
+    try:
+        import orjson
+        backends["orjson"] = orjson.loads
+    except ImportError:
+        pass
+    try:
+        import ujson
+        backends["ujson"] = ujson.loads
+    except ImportError:
+        pass
+    return backends
@@ -2,6 +2,12 @@ import asyncio
 import pandas as pd
 from config import config
 from bilibili_api import BilibiliAPI
+from crawl_governor import CrawlGovernor
+from search_planner import WindowPlanner
+from query_planner import QueryPlanner
+from bv_registry import BvRegistry
+from pipeline import CrawlPipeline
+from models import COMMENT_HEADER
 import re
 import os
 from bil_comment_crawl import start_async as crawl_comments
@@ -63,225 +69,313 @@ async def main(max_page=20, fetch_details=True, fetch_comments=False, comments_m
         config["time_end"] = time_end
         print(f"已设置筛选最近 {recent_days} 天的热门视频 ({time_begin} 至 {time_end})")
     
-    api = BilibiliAPI()
-    keywords_combined = mix_keywords(config["keywords"], config["is_union"])
-    print(f"关键词数量: {len(keywords_combined)}, 每关键词页数: {config['page']}")
+    # 限速、并发、重试与熔断统一由总控根据配置创建，各阶段共用同一个客户端
+    governor = CrawlGovernor.from_config(config)
+    async with BilibiliAPI(governor=governor, search_mode=config.get("search_mode", "html"),
+                           search_page_size=config.get("search_page_size", 50),
+                           planner=WindowPlanner.from_config(config),
+                           query_planner=QueryPlanner.from_config(config)) as api:
+        keywords_combined = mix_keywords(config["keywords"], config["is_union"])
+        print(f"关键词数量: {len(keywords_combined)}, 每关键词页数: {config['page']}")
+        actual_pages = min(config.get('page', 1), max_page)
+        recent_days_value = recent_days if recent_days is not None else config.get("recent_days")
+        
+        if CrawlPipeline.enabled(config):
+            result = await run_pipeline(api, keywords_combined, actual_pages, recent_days_value,
+                                        fetch_details, fetch_comments, comments_max_page)
+            print_run_stats(api, governor)
+            return result
     
-    # 第一步：获取视频基本信息
-    print("\n=== 第一阶段：获取视频基本信息 ===")
-    all_videos = []
-    actual_pages = min(config.get('page', 1), max_page)
-    recent_days_value = recent_days if recent_days is not None else config.get("recent_days")
+        # 第一步：获取视频基本信息
+        print("\n=== 第一阶段：获取视频基本信息 ===")
+        all_videos = []
     
-    keyword_pbar = tqdm(keywords_combined, desc="关键词进度", position=0)
-    for idx, keyword in enumerate(keyword_pbar):
-        keyword_pbar.set_description(f"处理关键词 [{idx+1}/{len(keywords_combined)}]: {keyword}")
-        pages_list = list(range(1, actual_pages + 1))
-        
-        try:
-            # 传递近期日期参数给API
-            if recent_days_value:
-                print(f"按最近 {recent_days_value} 天逐日搜索: {keyword}")
-                videos_for_keyword = await api.search_videos(
-                    keyword=keyword,
-                    pages=range(1, actual_pages + 1),
-                    recent_days=recent_days_value
-                )
+        # 所有 (关键词, 时间窗口, 页码) 组合并发提交，由限速器统一调度，结果顺序与关键词顺序一致
+        if recent_days_value:
+            if api.planner is not None:
+                print(f"按最近 {recent_days_value} 天搜索，按结果数自适应切分时间窗口")
             else:
-                # 原有的时间范围搜索
-                videos_for_keyword = await api.search_videos(
-                    keyword=keyword,
-                    time_begin=config.get("time_begin", None),
-                    time_end=config.get("time_end", None),
-                    pages=range(1, actual_pages + 1)
-                )
-            
+                print(f"按最近 {recent_days_value} 天逐日搜索")
+            search_results = await api.search_many(
+                keywords_combined,
+                pages=range(1, actual_pages + 1),
+                recent_days=recent_days_value
+            )
+        else:
+            # 原有的时间范围搜索
+            search_results = await api.search_many(
+                keywords_combined,
+                time_begin=config.get("time_begin", None),
+                time_end=config.get("time_end", None),
+                pages=range(1, actual_pages + 1)
+            )
+    
+        for keyword, videos_for_keyword in search_results.items():
+            print(f"关键词 '{keyword}': 找到 {len(videos_for_keyword)} 个唯一视频")
             # 数据清洗和黑名单过滤
-            filtered = []
             for video in videos_for_keyword:
-                title = video["video"]["title"]
-                title = re.sub(r"<.*?>", "", title)
-                video["video"]["title"] = title
-                
+                title = re.sub(r"<.*?>", "", video.title)
+                video.title = title
+            
                 # 黑名单过滤
                 if not any(black in title for black in config["keywords_blacklist"]):
-                    filtered.append(video)
-            
-            all_videos.extend(filtered)
-            
-        except Exception as e:
-            print(f"关键词 '{keyword}' 处理失败: {str(e)}")
-            traceback.print_exc()
+                    all_videos.append(video)
     
-    # 去重（基于BV号）
-    unique_videos = {}
-    for video in all_videos:
-        bvid = video["video"]["bvid"]
-        if bvid not in unique_videos:
-            unique_videos[bvid] = video
+        # 去重（基于BV号）
+        unique_videos = {}
+        for video in all_videos:
+            if video.bvid not in unique_videos:
+                unique_videos[video.bvid] = video
     
-    basic_results = list(unique_videos.values())
-    print(f"基本信息获取完成，去重后共 {len(basic_results)} 个视频")
+        basic_results = list(unique_videos.values())
+        print(f"基本信息获取完成，去重后共 {len(basic_results)} 个视频")
+        
+        # 增量运行：详情未过期的BV号直接沿用登记表中上次输出的结果行
+        registry = BvRegistry.from_config(config)
+        carried_rows = {}
+        if registry is not None:
+            registry.mark_seen(unique_videos)
+            if fetch_details:
+                carried_rows = registry.fresh_rows(unique_videos, config["output_mode"])
+                if carried_rows:
+                    print(f"登记表中 {len(carried_rows)} 个视频的详情未过期，沿用上次结果")
+        videos_to_fetch = [video for video in basic_results if video.bvid not in carried_rows]
     
-    # 第二步：获取视频详细信息（可选）
-    detailed_results = []
-    if fetch_details and basic_results:
-        print("\n=== 第二阶段：获取视频详细信息 ===")
+        # 第二步：获取视频详细信息（可选）
+        detailed_results = []
+        if fetch_details and videos_to_fetch:
+            print("\n=== 第二阶段：获取视频详细信息 ===")
         
-        # 分批处理
-        batch_size = 20
-        total_batches = (len(basic_results) + batch_size - 1) // batch_size
+            # 分批处理
+            batch_size = governor.batch_size
+            total_batches = (len(videos_to_fetch) + batch_size - 1) // batch_size
         
-        # 单层进度条显示批次处理进度
-        batch_pbar = tqdm(total=total_batches, desc="详细信息批次处理", position=0)
+            # 单层进度条显示批次处理进度
+            batch_pbar = tqdm(total=total_batches, desc="详细信息批次处理", position=0)
         
-        processed_videos = []
-        for i in range(total_batches):
-            start_idx = i * batch_size
-            end_idx = min((i + 1) * batch_size, len(basic_results))
-            batch = basic_results[start_idx:end_idx]
-            
-            batch_pbar.set_description(f"批次 {i+1}/{total_batches} ({start_idx+1}-{end_idx}/{len(basic_results)})")
+            processed_videos = []
+            for i in range(total_batches):
+                start_idx = i * batch_size
+                end_idx = min((i + 1) * batch_size, len(videos_to_fetch))
+                batch = videos_to_fetch[start_idx:end_idx]
             
-            # 获取这一批次的视频详情
-            batch_results = await api.get_videos_detail(batch, show_progress=False)  # 在API中禁用进度条
-            processed_videos.extend(batch_results)
+                batch_pbar.set_description(f"批次 {i+1}/{total_batches} ({start_idx+1}-{end_idx}/{len(videos_to_fetch)})")
             
-            # 更新进度条
-            batch_pbar.update(1)
+                # 获取这一批次的视频详情
+                batch_results = await api.get_videos_detail(batch, show_progress=False)  # 在API中禁用进度条
+                processed_videos.extend(batch_results)
             
-            # 添加批次间的延迟
-            if i < total_batches - 1:  # 不是最后一批
-                await asyncio.sleep(random.uniform(0.4, 1.2))
+                # 更新进度条
+                batch_pbar.update(1)
         
-        batch_pbar.close()
-        detailed_results = processed_videos
-    else:
-        detailed_results = basic_results
+            batch_pbar.close()
+            detailed_results = processed_videos
+        else:
+            detailed_results = videos_to_fetch
     
-    # 处理结果并保存到Excel
-    print("\n正在处理结果并保存...")
-    if config["output_mode"] == "full":
-        print("使用全字段输出模式")
-        rows = [prepare_full_video_data(video) for video in tqdm(detailed_results, desc="处理数据")]
-    else:
-        print("使用简洁输出模式")
-        rows = [prepare_simple_video_data(video) for video in tqdm(detailed_results, desc="处理数据")]
+        # 处理结果并保存到Excel
+        print("\n正在处理结果并保存...")
+        if config["output_mode"] == "full":
+            print("使用全字段输出模式")
+            rows = [prepare_full_video_data(video) for video in tqdm(detailed_results, desc="处理数据")]
+        else:
+            print("使用简洁输出模式")
+            rows = [prepare_simple_video_data(video) for video in tqdm(detailed_results, desc="处理数据")]
+        
+        if registry is not None and fetch_details:
+            # 只登记成功获取详情的视频，失败的视频下次运行时重新获取
+            registry.record_details({
+                video.bvid: row for video, row in zip(detailed_results, rows) if video.succeeded
+            }, config["output_mode"])
+        if carried_rows:
+            # 沿用的结果行与本次获取的结果行合并，按搜索结果顺序输出
+            rows_by_bvid = {video.bvid: row for video, row in zip(detailed_results, rows)}
+            rows_by_bvid.update(carried_rows)
+            rows = [rows_by_bvid[bvid] for bvid in unique_videos if bvid in rows_by_bvid]
     
-    # 设置输出文件名，添加时间范围信息
-    file_path = config["file_path"]
-    file_base, file_ext = os.path.splitext(file_path)
+        # 设置输出文件名，添加时间范围信息
+        file_path = config["file_path"]
+        file_base, file_ext = os.path.splitext(file_path)
     
-    if config["output_format"] == "xlsx":
-        output_path = f"{file_base}.xlsx" if file_ext != ".xlsx" else file_path
-        try:
-            df = pd.DataFrame(rows)
-            df.to_excel(output_path, index=False)
-            print(f"数据已保存到Excel文件: {output_path}")
-        except Exception as e:
-            print(f"保存Excel失败: {str(e)}")
+        if config["output_format"] == "xlsx":
+            output_path = f"{file_base}.xlsx" if file_ext != ".xlsx" else file_path
             try:
-                csv_path = f"{file_base}.csv"
                 df = pd.DataFrame(rows)
-                df.to_csv(csv_path, index=False, encoding='utf-8-sig')
-                print(f"已备选保存为CSV文件: {csv_path}")
-            except Exception as csv_e:
-                print(f"保存CSV失败: {str(csv_e)}")
-    else:
-        # 默认CSV格式
-        output_path = f"{file_base}.csv" if file_ext != ".csv" else file_path
-        try:
-            df = pd.DataFrame(rows)
-            df.to_csv(output_path, index=False, encoding='utf-8-sig')
-            print(f"数据已保存到CSV文件: {output_path}")
-        except Exception as e:
-            print(f"保存CSV失败: {str(e)}")
+                df.to_excel(output_path, index=False)
+                print(f"数据已保存到Excel文件: {output_path}")
+            except Exception as e:
+                print(f"保存Excel失败: {str(e)}")
+                try:
+                    csv_path = f"{file_base}.csv"
+                    df = pd.DataFrame(rows)
+                    df.to_csv(csv_path, index=False, encoding='utf-8-sig')
+                    print(f"已备选保存为CSV文件: {csv_path}")
+                except Exception as csv_e:
+                    print(f"保存CSV失败: {str(csv_e)}")
+        else:
+            # 默认CSV格式
+            output_path = f"{file_base}.csv" if file_ext != ".csv" else file_path
+            try:
+                df = pd.DataFrame(rows)
+                df.to_csv(output_path, index=False, encoding='utf-8-sig')
+                print(f"数据已保存到CSV文件: {output_path}")
+            except Exception as e:
+                print(f"保存CSV失败: {str(e)}")
 
-    if config["use_database"] and db_handler:
-        print("\n=== 将视频数据保存到MySQL数据库 ===")
-        db_handler = DatabaseHandler(config)
-        if not db_handler.connect() or not db_handler.init_database():
-            print("数据库初始化失败，无法保存视频数据")
-            return
+        if config["use_database"] and db_handler:
+            print("\n=== 将视频数据保存到MySQL数据库 ===")
+            db_handler = DatabaseHandler(config)
+            if not db_handler.connect() or not db_handler.init_database():
+                print("数据库初始化失败，无法保存视频数据")
+                return
         
-        # 保存视频数据到数据库
-        save_videos_to_mysql(detailed_results, config)
+            # 保存视频数据到数据库
+            save_videos_to_mysql(detailed_results, config)
     
-    # 第三步：获取视频评论（可选）
-    comment_files = []
-    if fetch_comments and len(rows) > 0:
-        print("\n=== 第三阶段：获取视频评论数据 ===")
-        comments_dir = os.path.join(os.path.dirname(output_path), "comments")
-        os.makedirs(comments_dir, exist_ok=True)
+        # 第三步：获取视频评论（可选）
+        comment_files = []
+        if fetch_comments and len(rows) > 0:
+            print("\n=== 第三阶段：获取视频评论数据 ===")
+            comments_dir = os.path.join(os.path.dirname(output_path), "comments")
+            os.makedirs(comments_dir, exist_ok=True)
         
-        # 使用单层进度条
-        comment_pbar = tqdm(total=len(rows), desc="评论爬取", position=0)
+            # 使用单层进度条
+            comment_pbar = tqdm(total=len(rows), desc="评论爬取", position=0)
         
-        for i, video in enumerate(rows):
-            # 获取视频ID - 根据输出模式获取字段
-            if config["output_mode"] == "full":
-                bvid = video["bvid"]
-                aid = video["aid"]
-                title_field = "title"
-            else:
-                bvid = video["BV号"]
-                aid = video["AV号"]
-                title_field = "标题"
+            for i, video in enumerate(rows):
+                # 获取视频ID - 根据输出模式获取字段
+                if config["output_mode"] == "full":
+                    bvid = video["bvid"]
+                    aid = video["aid"]
+                    title_field = "title"
+                else:
+                    bvid = video["BV号"]
+                    aid = video["AV号"]
+                    title_field = "标题"
             
-            title = video.get(title_field, "未知标题")[:15]  # 标题前15个字符
-            comment_pbar.set_description(f"视频 {i+1}/{len(rows)}: {title}...")
+                title = str(video.get(title_field, "未知标题"))[:15]  # 标题前15个字符
+                comment_pbar.set_description(f"视频 {i+1}/{len(rows)}: {title}...")
+                
+                if registry is not None and not registry.needs_comments(bvid):
+                    # 评论未过期，保留上次采集的评论文件
+                    comment_pbar.update(1)
+                    continue
             
-            # 创建评论CSV文件
-            csv_path = os.path.join(comments_dir, f"{bvid}_comments.csv")
-            with open(csv_path, mode='w', newline='', encoding='utf-8-sig') as file:
-                csv_writer = csv.writer(file)
-                csv_writer.writerow(['序号', '上级评论ID', '评论ID', '用户ID', '用户名', '用户等级', 
-                                    '性别', '评论内容', '评论时间', '回复数', '点赞数', 
-                                    '个性签名', 'IP属地', '是否是大会员', '头像'])
+                # 创建评论CSV文件
+                csv_path = os.path.join(comments_dir, f"{bvid}_comments.csv")
+                with open(csv_path, mode='w', newline='', encoding='utf-8-sig') as file:
+                    csv_writer = csv.writer(file)
+                    csv_writer.writerow(COMMENT_HEADER)
                 
-                try:
-                    count = 0
-                    next_pageID = ''
-                    is_second = config.get("is_second_comments", False)
-                    cookie = None  # 使用默认cookie
+                    try:
+                        count = 0
+                        next_pageID = ''
+                        is_second = config.get("is_second_comments", False)
+                        cookie = None  # 使用默认cookie
                     
-                    # 爬取评论
-                    await crawl_comments(bvid, aid, next_pageID, count, csv_writer, 
-                                is_second, cookie, None, None, 
-                                max_page=comments_max_page or config.get("comments_max_page", 5), 
-                                page_counter=0)
+                        # 爬取评论
+                        await crawl_comments(bvid, aid, next_pageID, count, csv_writer, 
+                                    is_second, cookie, None, None, 
+                                    max_page=comments_max_page or config.get("comments_max_page", 5), 
+                                    page_counter=0, client=api.client)
                     
-                    # 保存评论文件路径
-                    comment_files.append((bvid, aid, csv_path))
+                        # 保存评论文件路径
+                        comment_files.append((bvid, aid, csv_path))
+                        if registry is not None:
+                            registry.record_comments(bvid)
                     
-                except Exception as e:
-                    print(f"获取评论失败: {str(e)}")
-                    traceback.print_exc()
-            
-            # 更新进度条
-            comment_pbar.update(1)
+                    except Exception as e:
+                        print(f"获取评论失败: {str(e)}")
+                        traceback.print_exc()
             
-            # 添加随机延迟
-            await asyncio.sleep(random.uniform(0.5, 1.5))
+                # 更新进度条
+                comment_pbar.update(1)
         
-        comment_pbar.close()
+            comment_pbar.close()
 
-        if config["use_database"] and db_handler:
-            print("\n=== 将评论数据保存到MySQL数据库 ===")
-            if not db_handler.connect():
-                print("数据库连接失败，无法保存评论数据")
-                return
+            if config["use_database"] and db_handler:
+                print("\n=== 将评论数据保存到MySQL数据库 ===")
+                if not db_handler.connect():
+                    print("数据库连接失败，无法保存评论数据")
+                    return
             
-            # 保存评论数据到数据库
-            save_comments_to_mysql(comment_files, config)
+                # 保存评论数据到数据库
+                save_comments_to_mysql(comment_files, config)
         
-    print("\n任务完成!")
-    return {
-        "video_count": len(detailed_results),
-        "output_file": output_path,
-        "comment_files": len(comment_files)
+        if registry is not None:
+            print(f"BV登记表: {registry.stats()}")
+            registry.close()
+        print_run_stats(api, governor)
+        return {
+            "video_count": len(detailed_results),
+            "output_file": output_path,
+            "comment_files": len(comment_files)
     }
 
+
+async def run_pipeline(api, keywords, actual_pages, recent_days, fetch_details, fetch_comments, comments_max_page):
+    """
+    流水线模式：搜索、详情、评论三个阶段通过有界队列同时进行，结果逐行写入CSV
+    xlsx格式无法逐行写出，先写CSV，结束后再转换
+    """
+    print("\n=== 流水线模式：搜索、详情与评论同时进行 ===")
+    file_base, _ = os.path.splitext(config["file_path"])
+    csv_path = f"{file_base}.csv"
+    
+    registry = BvRegistry.from_config(config)
+    db_handler = None
+    if config["use_database"] and DatabaseHandler is not None:
+        db_handler = DatabaseHandler(config)
+        if not db_handler.connect() or not db_handler.init_database():
+            print("数据库初始化失败，本次不写入数据库")
+            db_handler = None
+    
+    pipeline = CrawlPipeline.from_config(
+        api, config, registry=registry, fetch_details=fetch_details, fetch_comments=fetch_comments,
+        comments_max_page=comments_max_page or config.get("comments_max_page", 5), output_path=csv_path)
+    pages = range(1, actual_pages + 1)
+    try:
+        if recent_days:
+            result = await pipeline.run(keywords, pages=pages, recent_days=recent_days)
+        else:
+            result = await pipeline.run(keywords, time_begin=config.get("time_begin", None),
+                                        time_end=config.get("time_end", None), pages=pages)
+    finally:
+        if db_handler is not None:
+            db_handler.close()
+        if registry is not None:
+            print(f"BV登记表: {registry.stats()}")
+            registry.close()
+    print(f"流水线: {pipeline.stats()}")
+    print(f"数据已保存到CSV文件: {csv_path}")
+    
+    if config["output_format"] == "xlsx" and result["video_count"]:
+        output_path = f"{file_base}.xlsx"
+        try:
+            pd.read_csv(csv_path, encoding='utf-8-sig').to_excel(output_path, index=False)
+            result["output_file"] = output_path
+            print(f"数据已保存到Excel文件: {output_path}")
+        except Exception as e:
+            print(f"保存Excel失败: {str(e)}")
+    return result
+
+
+def print_run_stats(api, governor):
+    """打印本次运行的请求统计"""
+    if api.client.coalesced:
+        print(f"合并的重复并发请求: {api.client.coalesced} 次")
+    if governor.cache is not None:
+        print(f"响应缓存: {governor.cache.stats()}")
+    if governor.hedging is not None:
+        print(f"对冲请求: {governor.hedging.stats()}")
+    if governor.cassette is not None:
+        print(f"录制/回放: {governor.cassette.stats()}")
+    print("请求统计:")
+    print(governor.telemetry.summary())
+    if governor.telemetry.path:
+        print(f"详细统计将写入: {governor.telemetry.path}")
+    print("\n任务完成!")
+
 def parse_args():
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description="B站视频爬虫")
@@ -296,6 +390,33 @@ def parse_args():
     parser.add_argument("--keyword", type=str, default=None, help="搜索关键词，覆盖config中的设置")
     parser.add_argument("--recent-days", type=int, default=None, 
                         help="筛选最近N天的热门视频(按播放量排序)，如--recent-days 7表示最近一周")
+    parser.add_argument("--max-concurrency", type=int, default=None, help="最大并发请求数，覆盖config中的max_concurrency")
+    parser.add_argument("--batch-size", type=int, default=None, help="详情阶段每批次视频数，覆盖config中的batch_size")
+    parser.add_argument("--retry-times", type=int, default=None, help="请求失败重试次数，覆盖config中的retry_times")
+    parser.add_argument("--retry-base-delay", type=float, default=None,
+                        help="首次重试前的最长等待(秒)，之后每次重试翻倍，覆盖config中的retry_base_delay")
+    parser.add_argument("--retry-max-delay", type=float, default=None,
+                        help="单次重试等待上限(秒)，覆盖config中的retry_max_delay")
+    parser.add_argument("--delay-min", type=float, default=None, help="已废弃并被忽略，请求间隔请通过 rate_limits 设置")
+    parser.add_argument("--delay-max", type=float, default=None, help="已废弃并被忽略，请求间隔请通过 rate_limits 设置")
+    parser.add_argument("--search-mode", choices=["html", "api"], default=None,
+                        help="搜索方式: html抓取搜索页，api请求JSON搜索接口，覆盖config中的search_mode")
+    parser.add_argument("--pipeline", action="store_true", default=None,
+                        help="流水线模式：搜索、详情与评论通过有界队列同时进行，结果逐行写入CSV")
+    parser.add_argument("--no-pipeline", action="store_false", dest="pipeline", help="按阶段依次执行")
+    parser.add_argument("--registry", action="store_true", default=None,
+                        help="使用BV登记表，跳过详情与评论未过期的视频(增量运行)")
+    parser.add_argument("--no-registry", action="store_false", dest="registry",
+                        help="不使用BV登记表，重新获取全部视频的详情与评论")
+    parser.add_argument("--bisect", action="store_true", help="按结果数自适应二分搜索时间窗口")
+    parser.add_argument("--query-planner", action="store_true", help="按第1页结果重叠度丢弃或降级冗余的关键词组合")
+    parser.add_argument("--cache", action="store_true", help="把搜索页与视频页的原始响应缓存到磁盘")
+    parser.add_argument("--offline", action="store_true", help="仅使用磁盘缓存中的原始响应，不发起网络请求")
+    parser.add_argument("--cassette", choices=["record", "replay"], default=None,
+                        help="录制全部HTTP请求与响应，或只回放录制内容(不联网)，便于复现与基准测试")
+    parser.add_argument("--cassette-dir", type=str, default=None, help="录制文件目录，覆盖config中的cassette.dir")
+    parser.add_argument("--metrics-file", type=str, default=None,
+                        help="请求遥测导出文件，.prom/.txt 扩展名导出为Prometheus文本格式，覆盖config中的metrics_file")
     
     args = parser.parse_args()
     
@@ -303,6 +424,35 @@ def parse_args():
     if args.keyword:
         config["keywords"] = [args.keyword]
     
+    if args.pipeline is not None:
+        config.setdefault("pipeline", {})["enabled"] = args.pipeline
+    if args.registry is not None:
+        config.setdefault("bv_registry", {})["enabled"] = args.registry
+    if args.bisect:
+        config.setdefault("search_bisect", {})["enabled"] = True
+    if args.query_planner:
+        config.setdefault("query_planner", {})["enabled"] = True
+    if args.cache:
+        config.setdefault("response_cache", {})["enabled"] = True
+    if args.search_mode:
+        config["search_mode"] = args.search_mode
+    if args.offline:
+        config.setdefault("response_cache", {})["offline"] = True
+    if args.cassette:
+        config.setdefault("cassette", {})["mode"] = args.cassette
+    if args.cassette_dir:
+        config.setdefault("cassette", {})["dir"] = args.cassette_dir
+    if args.metrics_file:
+        config["metrics_file"] = args.metrics_file
+        config["metrics_format"] = None
+    
+    # 并发与节奏参数覆盖配置，统一由CrawlGovernor读取
+    for key in ("max_concurrency", "batch_size", "retry_times", "retry_base_delay", "retry_max_delay",
+                "delay_min", "delay_max"):
+        value = getattr(args, key)
+        if value is not None:
+            config[key] = value
+    
     # 检查时间范围参数互斥性
     if args.recent_days is not None and (config.get("time_begin") or config.get("time_end")):
         print("警告: 同时指定了--recent-days和time_begin/time_end，将使用--recent-days的值")
@@ -0,0 +1,176 @@
+from typing import Dict, List, Optional
+
+
+# 评论CSV的列，与 Comment 的字段一一对应
+COMMENT_HEADER = ['序号', '上级评论ID', '评论ID', '用户ID', '用户名', '用户等级',
+                  '性别', '评论内容', '评论时间', '回复数', '点赞数',
+                  '个性签名', 'IP属地', '是否是大会员', '头像']
+
+
+class _Record:
+    """
+    使用 __slots__ 存储字段的记录基类
+    子类在 _FIELDS 中按顺序声明 (字段名, 默认值)，__slots__ 由字段名生成；默认值为所有实例共享，只能使用不可变对象。
+    不为每个实例创建 __dict__，大量视频/评论常驻内存时显著减少占用
+    """
+
+    __slots__ = ()
+    _FIELDS = ()
+
+    def __init__(self, *args, **kwargs):
+        if len(args) > len(self._FIELDS):
+            raise TypeError(f"{type(self).__name__} 最多接受 {len(self._FIELDS)} 个位置参数")
+        for (name, _), value in zip(self._FIELDS, args):
+            kwargs[name] = value
+        for name, default in self._FIELDS:
+            setattr(self, name, kwargs.pop(name) if name in kwargs else default)
+        if kwargs:
+            raise TypeError(f"{type(self).__name__} 没有字段: {', '.join(kwargs)}")
+
+    def to_dict(self) -> Dict:
+        """按字段顺序转换为字典(用于JSON序列化与导出)"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict):
+        """由字典创建记录，忽略未声明的键，缺失的字段取默认值"""
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Owner(_Record):
+    """UP主"""
+
+    _FIELDS = (("mid", 0), ("name", ""), ("face_url", ""))
+    __slots__ = tuple(name for name, _ in _FIELDS)
+
+
+class VideoPage(_Record):
+    """视频分P"""
+
+    _FIELDS = (("cid", 0), ("bvid", ""), ("page_number", 0), ("part_title", ""), ("duration", 0), ("width", 0),
+               ("height", 0), ("first_frame_url", ""), ("page_ctime", ""))
+    __slots__ = tuple(name for name, _ in _FIELDS)
+
+
+class Honor(_Record):
+    """视频荣誉(如入站必刷、每周必看)"""
+
+    _FIELDS = (("bvid", ""), ("type", 0), ("description", ""))
+    __slots__ = tuple(name for name, _ in _FIELDS)
+
+
+class Video(_Record):
+    """
+    视频
+    搜索阶段只填充基本字段(from_search 为True)，获取详情后为完整字段；
+    详情获取失败、仅保留搜索信息时 error 记录失败原因
+    """
+
+    _FIELDS = (
+        # 基本信息
+        ("bvid", ""), ("aid", 0), ("title", ""), ("cover_url", ""),
+        # 分类信息
+        ("tid", 0), ("tname", ""), ("tid_v2", 0), ("tname_v2", ""),
+        # 视频描述与时间
+        ("description", ""), ("pubdate", ""), ("ctime", ""), ("duration", 0),
+        ("copyright", 0), ("state", 0), ("mission_id", 0), ("videos", 0), ("dynamic", ""), ("keywords", ""),
+        # 统计信息
+        ("view_count", 0), ("danmaku_count", 0), ("reply_count", 0), ("favorite_count", 0), ("coin_count", 0),
+        ("share_count", 0), ("like_count", 0), ("dislike_count", 0),
+        # 权限信息
+        ("is_downloadable", False), ("no_reprint", False), ("autoplay", False),
+        # 关联UP主
+        ("owner_mid", 0), ("owner", None),
+        # 分P与荣誉，没有时为共享的空元组
+        ("pages", ()), ("honors", ()),
+        # 搜索来源：搜索关键词、页码与时间窗口标签
+        ("from_search", False), ("search_keyword", None), ("search_page", None), ("search_day", None),
+        # 详情获取失败的原因
+        ("error", None),
+    )
+    __slots__ = tuple(name for name, _ in _FIELDS)
+
+    # 旧的嵌套字典中以下划线开头保存的字段
+    _PRIVATE = ("from_search", "search_keyword", "search_page", "search_day", "error")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.owner is None:
+            self.owner = Owner()
+
+    @property
+    def succeeded(self) -> bool:
+        """是否为成功获取的详情(而不是搜索得到的基本信息或失败后的占位信息)"""
+        return self.error is None and not self.from_search
+
+    def to_dict(self) -> Dict:
+        """
+        转换为 {"video": {...}, "owner": {...}, "pages": [...], "honors": [...]} 形式的嵌套字典
+
+        Returns:
+            与旧版视频字典结构相同的字典，未设置的搜索来源与错误字段不输出
+        """
+        nested = ("owner", "pages", "honors") + self._PRIVATE
+        video = {name: getattr(self, name) for name in self.__slots__ if name not in nested}
+        for name in self._PRIVATE:
+            value = getattr(self, name)
+            if value is not None and value is not False:
+                video["_" + name] = value
+        return {
+            "video": video,
+            "owner": self.owner.to_dict(),
+            "pages": [page.to_dict() for page in self.pages],
+            "honors": [honor.to_dict() for honor in self.honors],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Video":
+        """由 to_dict 形式的嵌套字典创建视频"""
+        video = dict(data.get("video") or {})
+        for name in cls._PRIVATE:
+            if "_" + name in video:
+                video[name] = video.pop("_" + name)
+        fields = {name: video[name] for name in cls.__slots__ if name in video}
+        fields["owner"] = Owner.from_dict(data.get("owner") or {})
+        fields["pages"] = [VideoPage.from_dict(page) for page in data.get("pages") or []]
+        fields["honors"] = [Honor.from_dict(honor) for honor in data.get("honors") or []]
+        return cls(**fields)
+
+
+class Comment(_Record):
+    """评论，字段顺序与评论CSV的列(COMMENT_HEADER)一致"""
+
+    _FIELDS = (("index", 0), ("parent_id", ""), ("rpid", ""), ("mid", ""), ("username", ""), ("level", 0),
+               ("sex", ""), ("content", ""), ("ctime", ""), ("reply_count", 0), ("like_count", 0), ("sign", ""),
+               ("ip_location", ""), ("is_vip", "否"), ("avatar", ""))
+    __slots__ = tuple(name for name, _ in _FIELDS)
+
+    def as_row(self) -> List:
+        """转换为写入评论CSV的一行"""
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def from_row(cls, row) -> Optional["Comment"]:
+        """
+        由评论CSV的一行创建评论
+
+        Args:
+            row: CSV行(字符串列表)
+
+        Returns:
+            Comment，列数不足时返回None
+        """
+        if len(row) < len(cls._FIELDS):
+            return None
+        return cls(*row[:len(cls._FIELDS)])
@@ -2,13 +2,14 @@ import pandas as pd
 import numpy as np
 from db_handler import DatabaseHandler
 from crawl_utils import extract_comment_data
+from models import Owner, Video
 
 def save_videos_to_mysql(videos, config):
     """
     将视频数据保存到 MySQL 数据库
     
     Args:
-        videos: 视频数据列表
+        videos: 视频(Video)列表
         config: 包含db_config配置的字典
     """
     # 确保config包含有效的db_config配置
@@ -114,34 +115,32 @@ if __name__ == "__main__":
                     except (ValueError, TypeError):
                         return default
                 
-                # 构建视频数据字典
-                video_data = {
-                    "video": {
-                        "bvid": safe_get("bvid"),
-                        "aid": safe_int("aid"),
-                        "title": safe_get("title", "", 255),
-                        "cover_url": safe_get("cover_url", "", 255),
-                        "tid": safe_int("tid"),
-                        "tname": safe_get("tname", "", 50),
-                        "description": safe_get("description", ""),
-                        "pubdate": safe_get("pubdate", ""),
-                        "ctime": safe_get("ctime", ""),
-                        "duration": safe_int("duration"),
-                        "view_count": safe_int("view_count"),
-                        "danmaku_count": safe_int("danmaku_count"),
-                        "reply_count": safe_int("reply_count"),
-                        "favorite_count": safe_int("favorite_count"),
-                        "coin_count": safe_int("coin_count"),
-                        "share_count": safe_int("share_count"),
-                        "like_count": safe_int("like_count"),
-                        "owner_mid": safe_int("owner_mid")
-                    },
-                    "owner": {
-                        "mid": safe_int("owner_mid"),
-                        "name": safe_get("owner_name", "", 100),
-                        "face_url": safe_get("owner_face", "", 255)
-                    }
-                }
+                # 构建视频数据
+                video_data = Video(
+                    bvid=safe_get("bvid"),
+                    aid=safe_int("aid"),
+                    title=safe_get("title", "", 255),
+                    cover_url=safe_get("cover_url", "", 255),
+                    tid=safe_int("tid"),
+                    tname=safe_get("tname", "", 50),
+                    description=safe_get("description", ""),
+                    pubdate=safe_get("pubdate", ""),
+                    ctime=safe_get("ctime", ""),
+                    duration=safe_int("duration"),
+                    view_count=safe_int("view_count"),
+                    danmaku_count=safe_int("danmaku_count"),
+                    reply_count=safe_int("reply_count"),
+                    favorite_count=safe_int("favorite_count"),
+                    coin_count=safe_int("coin_count"),
+                    share_count=safe_int("share_count"),
+                    like_count=safe_int("like_count"),
+                    owner_mid=safe_int("owner_mid"),
+                    owner=Owner(
+                        mid=safe_int("owner_mid"),
+                        name=safe_get("owner_name", "", 100),
+                        face_url=safe_get("owner_face", "", 255)
+                    )
+                )
                 videos.append(video_data)
             
             # 保存到数据库
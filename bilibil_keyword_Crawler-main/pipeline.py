@@ -0,0 +1,271 @@
+import asyncio
+import csv
+import os
+import re
+import traceback
+from typing import Dict, List
+
+from bil_comment_crawl import start_async as crawl_comments
+from crawl_utils import extract_comment_data, prepare_full_video_data, prepare_simple_video_data
+from models import COMMENT_HEADER, Video
+
+# 队列结束标记
+_DONE = object()
+
+
+async def crawl_video_comments(client, bvid, aid, csv_path, is_second=False, max_page=5) -> bool:
+    """
+    爬取单个视频的评论并写入CSV文件
+
+    Args:
+        client: 共享的 HttpClient
+        bvid: 视频BV号
+        aid: 视频AV号
+        csv_path: 评论CSV文件路径
+        is_second: 是否采集二级评论
+        max_page: 评论最大页数
+
+    Returns:
+        是否采集成功
+    """
+    with open(csv_path, mode='w', newline='', encoding='utf-8-sig') as file:
+        csv_writer = csv.writer(file)
+        csv_writer.writerow(COMMENT_HEADER)
+        try:
+            await crawl_comments(bvid, aid, '', 0, csv_writer, is_second, None, None, None,
+                                 max_page=max_page, page_counter=0, client=client)
+            return True
+        except Exception as e:
+            print(f"获取评论失败: {str(e)}")
+            traceback.print_exc()
+            return False
+
+
+class StreamingCsvWriter:
+    """逐行写出结果的CSV文件，表头取第一行的字段，之后的行缺少的字段留空"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, row: Dict):
+        if self._writer is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, mode='w', newline='', encoding='utf-8-sig')
+            self._writer = csv.DictWriter(self._file, fieldnames=list(row), restval='', extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerow(row)
+        self.rows += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class CrawlPipeline:
+    """
+    搜索 -> 详情 -> 评论 的流式流水线
+    搜索每请求完一页就把新的BV号放入有界的详情队列(入队时按BV号去重)，详情工作协程取出后立即获取详情、
+    写出结果行并把视频放入有界的评论队列；队列满时上游自动等待。各阶段同时进行，
+    内存中只保留队列中的视频与已见BV号集合，与本次采集的视频总数无关
+    """
+
+    def __init__(self, api, config, registry=None, fetch_details=True, fetch_comments=False, comments_max_page=5,
+                 output_path=None, queue_size=100, detail_workers=None, comment_workers=2, db_handler=None):
+        """
+        Args:
+            api: BilibiliAPI 实例
+            config: 配置字典(读取 output_mode、keywords_blacklist、is_second_comments 等)
+            registry: BV登记表 BvRegistry，为空时不做增量判断
+            fetch_details: 是否获取视频详情
+            fetch_comments: 是否采集评论
+            comments_max_page: 评论最大页数
+            output_path: 结果CSV文件路径
+            queue_size: 详情队列与评论队列的容量
+            detail_workers: 详情工作协程数，默认与详情批次大小相同
+            comment_workers: 评论工作协程数
+            db_handler: 已连接的 DatabaseHandler，为空时不写数据库
+        """
+        self.api = api
+        self.config = config
+        self.registry = registry
+        self.fetch_details = fetch_details
+        self.fetch_comments = fetch_comments
+        self.comments_max_page = comments_max_page
+        self.output_path = output_path or config["file_path"]
+        self.detail_workers = detail_workers or config.get("batch_size", 5)
+        self.comment_workers = comment_workers
+        self.db_handler = db_handler
+        self.row_mode = config.get("output_mode", "full")
+        self.comments_dir = os.path.join(os.path.dirname(self.output_path), "comments")
+        self._detail_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._comment_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._seen = set()
+        self._writer = StreamingCsvWriter(self.output_path)
+        self._db_batch: List[Video] = []
+        self.comment_files = 0
+        self.found = 0
+        self.filtered = 0
+        self.carried = 0
+        self.fetched = 0
+        self.failed = 0
+
+    @classmethod
+    def from_config(cls, api, config, **kwargs) -> "CrawlPipeline":
+        """根据 config["pipeline"] 创建流水线，其余参数原样传入"""
+        options = dict(config.get("pipeline") or {})
+        options.pop("enabled", None)
+        options.update(kwargs)
+        return cls(api, config, **options)
+
+    @classmethod
+    def enabled(cls, config) -> bool:
+        return bool((config.get("pipeline") or {}).get("enabled", False))
+
+    async def _on_videos(self, keyword, videos):
+        """搜索回调：清洗标题、过滤黑名单，新的BV号入队"""
+        blacklist = self.config.get("keywords_blacklist", [])
+        new_videos = [video for video in videos if video.bvid not in self._seen]
+        if not new_videos:
+            return
+        self._seen.update(video.bvid for video in new_videos)
+        if self.registry is not None:
+            self.registry.mark_seen(video.bvid for video in new_videos)
+        for video in new_videos:
+            title = re.sub(r"<.*?>", "", video.title)
+            video.title = title
+            if any(black in title for black in blacklist):
+                self.filtered += 1
+                continue
+            self.found += 1
+            await self._detail_queue.put(video)
+
+    def _row(self, video) -> Dict:
+        if self.row_mode == "full":
+            return prepare_full_video_data(video)
+        return prepare_simple_video_data(video)
+
+    def _flush_db(self, force=False):
+        if self.db_handler is None or not self._db_batch:
+            return
+        if force or len(self._db_batch) >= self.detail_workers:
+            try:
+                self.db_handler.insert_videos(self._db_batch)
+            except Exception as e:
+                print(f"保存视频数据到数据库失败: {str(e)}")
+            self._db_batch = []
+
+    async def _process_video(self, video):
+        bvid = video.bvid
+        row = None
+        if self.registry is not None and self.fetch_details:
+            # 详情未过期的视频沿用登记表中的结果行
+            row = self.registry.fresh_rows([bvid], self.row_mode).get(bvid)
+            if row is not None:
+                self.carried += 1
+        if row is None:
+            detailed = video
+            succeeded = False
+            if self.fetch_details:
+                results = await self.api.get_videos_detail([video], show_progress=False)
+                detailed = results[0] if results else video
+                succeeded = detailed.succeeded
+                if succeeded:
+                    self.fetched += 1
+                else:
+                    self.failed += 1
+            row = self._row(detailed)
+            if succeeded:
+                if self.registry is not None:
+                    self.registry.record_details({bvid: row}, self.row_mode)
+                if self.db_handler is not None:
+                    self._db_batch.append(detailed)
+                    self._flush_db()
+        self._writer.write(row)
+        if self.fetch_comments:
+            aid = row.get("aid") if self.row_mode == "full" else row.get("AV号")
+            await self._comment_queue.put((bvid, aid))
+
+    async def _detail_worker(self):
+        while True:
+            video = await self._detail_queue.get()
+            try:
+                if video is _DONE:
+                    return
+                await self._process_video(video)
+            except Exception as e:
+                print(f"处理视频 {video.bvid} 失败: {str(e)}")
+            finally:
+                self._detail_queue.task_done()
+
+    async def _comment_worker(self):
+        is_second = self.config.get("is_second_comments", False)
+        while True:
+            item = await self._comment_queue.get()
+            try:
+                if item is _DONE:
+                    return
+                bvid, aid = item
+                if self.registry is not None and not self.registry.needs_comments(bvid):
+                    continue
+                csv_path = os.path.join(self.comments_dir, f"{bvid}_comments.csv")
+                if await crawl_video_comments(self.api.client, bvid, aid, csv_path, is_second, self.comments_max_page):
+                    self.comment_files += 1
+                    if self.registry is not None:
+                        self.registry.record_comments(bvid)
+                    if self.db_handler is not None:
+                        comments_data = extract_comment_data(csv_path)
+                        if comments_data:
+                            self.db_handler.insert_comments(comments_data, bvid, aid)
+            except Exception as e:
+                # 单个视频出错不能让工作协程退出，否则评论队列会被填满，上游在入队时永久阻塞
+                print(f"处理视频 {item[0]} 的评论失败: {str(e)}")
+            finally:
+                self._comment_queue.task_done()
+
+    async def run(self, keywords, time_begin=None, time_end=None, pages=None, recent_days=None) -> Dict:
+        """
+        运行流水线
+
+        Args:
+            keywords: 关键词列表
+            time_begin / time_end / pages / recent_days: 同 BilibiliAPI.search_many
+
+        Returns:
+            {"video_count", "output_file", "comment_files"}
+        """
+        if self.fetch_comments:
+            os.makedirs(self.comments_dir, exist_ok=True)
+        detail_tasks = [asyncio.ensure_future(self._detail_worker()) for _ in range(self.detail_workers)]
+        comment_tasks = [asyncio.ensure_future(self._comment_worker())
+                         for _ in range(self.comment_workers if self.fetch_comments else 0)]
+        try:
+            await self.api.search_many(keywords, time_begin=time_begin, time_end=time_end, pages=pages,
+                                       recent_days=recent_days, on_videos=self._on_videos)
+            # 上游结束后依次通知下游的工作协程退出
+            for _ in detail_tasks:
+                await self._detail_queue.put(_DONE)
+            await asyncio.gather(*detail_tasks)
+            for _ in comment_tasks:
+                await self._comment_queue.put(_DONE)
+            await asyncio.gather(*comment_tasks)
+        finally:
+            for task in detail_tasks + comment_tasks:
+                if not task.done():
+                    task.cancel()
+            self._flush_db(force=True)
+            self._writer.close()
+        return {
+            "video_count": self._writer.rows,
+            "output_file": self.output_path,
+            "comment_files": self.comment_files,
+        }
+
+    def stats(self):
+        return {"found": self.found, "filtered": self.filtered, "carried": self.carried, "fetched": self.fetched,
+                "failed": self.failed, "rows": self._writer.rows, "comment_files": self.comment_files}
@@ -0,0 +1,105 @@
+from typing import Dict, List, Optional, Set
+
+
+class QueryPlanner:
+    """
+    关键词组合的查询规划
+    mix_keywords 的笛卡尔积会产生大量结果高度重叠的组合。规划器先用每个组合第1页的结果(探测)估计重叠度：
+    按贪心集合覆盖的顺序依次考察各组合，第1页中已被前面组合覆盖的BV号比例达到 drop_overlap 时不再继续翻页，
+    达到 deprioritize_overlap 时降低优先级并按未覆盖比例缩减页数，并统计预计节省的请求数。
+    探测失败或第1页为空的组合无法估计重叠度，一律保留
+    """
+
+    KEEP = "keep"
+    DEPRIORITIZE = "deprioritize"
+    DROP = "drop"
+
+    def __init__(self, drop_overlap=0.9, deprioritize_overlap=0.5, min_queries=2):
+        """
+        Args:
+            drop_overlap: 第1页重叠比例达到该值时丢弃该组合后续的页
+            deprioritize_overlap: 第1页重叠比例达到该值时降低优先级并缩减页数
+            min_queries: 组合数少于该值时不做规划
+        """
+        self.drop_overlap = drop_overlap
+        self.deprioritize_overlap = deprioritize_overlap
+        self.min_queries = min_queries
+        self.dropped = 0
+        self.deprioritized = 0
+        self.saved = 0
+        self.unprobed = 0
+        self.decisions: List[Dict] = []
+
+    @classmethod
+    def from_config(cls, config) -> Optional["QueryPlanner"]:
+        """
+        根据 config["query_planner"] 创建查询规划器，未启用时返回None
+
+        Args:
+            config: 配置字典
+        """
+        options = dict(config.get("query_planner") or {})
+        if not options.pop("enabled", False):
+            return None
+        return cls(**options)
+
+    @staticmethod
+    def _window_pages(meta, max_page) -> int:
+        # 读取不到总页数的窗口按最多页数估计
+        return max_page if meta is None else min(meta["num_pages"], max_page)
+
+    def _expected_pages(self, metas, max_page) -> int:
+        return sum(self._window_pages(meta, max_page) for meta in metas)
+
+    def plan(self, probes: Dict[str, Optional[Set[str]]], metas: Dict[str, List[Optional[Dict]]],
+             max_page) -> List[Dict]:
+        """
+        根据探测结果为每个关键词组合决定处理方式与页数
+
+        Args:
+            probes: {关键词: 第1页(所有时间窗口)的BV号集合}，有时间窗口的探测请求失败时为None
+            metas: {关键词: 各时间窗口第1页的结果总数信息 {"num_results", "num_pages"} 或 None}
+            max_page: 每个查询最多请求的页数
+
+        Returns:
+            按执行优先级排列的 [{"keyword", "action", "overlap", "max_page"}, ...]，
+            action为 keep/deprioritize/drop，drop 的组合 max_page 为1(只保留探测页)
+        """
+        # 探测失败或为空的组合不参与覆盖计算，按原页数保留
+        remaining = [keyword for keyword, found in probes.items() if found]
+        unprobed = [keyword for keyword, found in probes.items() if not found]
+        covered: Set[str] = set()
+        decisions = []
+        # 贪心集合覆盖：每次取新增BV号最多的组合，重叠比例按此顺序计算
+        while remaining:
+            keyword = max(remaining, key=lambda k: (len(probes[k] - covered), len(probes[k])))
+            remaining.remove(keyword)
+            found = probes[keyword]
+            overlap = len(found & covered) / len(found)
+            covered |= found
+            expected = self._expected_pages(metas[keyword], max_page)
+            if overlap >= self.drop_overlap:
+                action, budget = self.DROP, 1
+                self.dropped += 1
+            elif overlap >= self.deprioritize_overlap:
+                needed = max((self._window_pages(meta, max_page) for meta in metas[keyword]), default=max_page)
+                action, budget = self.DEPRIORITIZE, max(1, round(needed * (1 - overlap)))
+                self.deprioritized += 1
+            else:
+                action, budget = self.KEEP, max_page
+            # 探测页已经请求过，节省的是原本还要请求的后续页
+            self.saved += expected - self._expected_pages(metas[keyword], budget)
+            decisions.append({"keyword": keyword, "action": action, "overlap": round(overlap, 3), "max_page": budget})
+        for keyword in unprobed:
+            self.unprobed += 1
+            decisions.append({"keyword": keyword, "action": self.KEEP, "overlap": None, "max_page": max_page})
+
+        # 保留的组合优先执行，降级的以较低优先级执行，丢弃的不再请求
+        order = {self.KEEP: 0, self.DEPRIORITIZE: 1, self.DROP: 2}
+        decisions.sort(key=lambda decision: order[decision["action"]])
+        self.decisions.extend(decisions)
+        return decisions
+
+    def stats(self):
+        return {"dropped": self.dropped, "deprioritized": self.deprioritized, "saved_requests": self.saved,
+                "unprobed": self.unprobed}
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from typing import Dict
+
+
+# 默认接口预算：rate为每秒补充的令牌数(即持续请求速率)，burst为令牌桶容量(允许的突发请求数)
+DEFAULT_RATE_LIMITS = {
+    "search": {"rate": 1.0, "burst": 1},   # search.bilibili.com 搜索页
+    "video": {"rate": 3.0, "burst": 3},    # www.bilibili.com/video 视频详情页
+    "reply": {"rate": 5.0, "burst": 5},    # api.bilibili.com 评论接口
+}
+
+
+class TokenBucket:
+    """
+    令牌桶限速器
+    令牌以固定速率补充，每次请求消耗一个令牌，令牌不足时等待到下一个令牌生成
+    """
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("rate 必须大于0")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        # 串行化等待者，保证先到先得且不会同时透支令牌；在事件循环内延迟创建
+        self._lock = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self, tokens=1) -> bool:
+        """当前是否有足够的令牌、且没有其他请求在等待"""
+        if self._lock is not None and self._lock.locked():
+            return False
+        self._refill()
+        return self._tokens >= tokens
+
+    async def acquire(self, tokens=1) -> float:
+        """
+        获取令牌，必要时等待
+
+        Returns:
+            本次等待的秒数
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                delay = (tokens - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self._tokens -= tokens
+        return waited
+
+
+class RateLimiter:
+    """
+    按接口划分预算的限速器
+    每个接口(search / video / reply)拥有独立的令牌桶，未配置的接口不限速
+    """
+
+    def __init__(self, limits: Dict[str, Dict] = None):
+        if limits is None:
+            limits = DEFAULT_RATE_LIMITS
+        self.buckets = {
+            endpoint: TokenBucket(spec["rate"], spec.get("burst", 1))
+            for endpoint, spec in limits.items()
+            if spec and spec.get("rate")
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        根据 config["rate_limits"] 创建限速器，缺省的接口沿用默认预算
+
+        Args:
+            config: 配置字典
+        """
+        limits = {endpoint: dict(spec) for endpoint, spec in DEFAULT_RATE_LIMITS.items()}
+        for endpoint, spec in (config.get("rate_limits") or {}).items():
+            limits[endpoint] = spec
+        return cls(limits)
+
+    async def acquire(self, endpoint) -> float:
+        """为指定接口获取一个令牌，返回等待的秒数"""
+        bucket = self.buckets.get(endpoint)
+        if bucket is None:
+            return 0.0
+        return await bucket.acquire()
@@ -0,0 +1,159 @@
+import asyncio
+import gzip
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+# 默认缓存有效期(秒)：搜索页变化较快，视频页相对稳定；未列出的接口不缓存
+DEFAULT_CACHE_TTLS = {
+    "search": 6 * 3600,
+    "video": 24 * 3600,
+}
+
+
+class CacheMissError(Exception):
+    """离线(仅缓存)模式下请求的内容不在缓存中"""
+
+
+class ResponseCache:
+    """
+    原始响应的磁盘缓存
+    以 接口名+URL 的SHA-256摘要作为文件名(内容寻址)，gzip压缩存储，
+    按接口设置有效期，总大小超过上限时按最近访问时间淘汰最旧的条目。
+    在事件循环中使用 get_async / put_async，压缩与文件读写在线程池中执行，不阻塞其他请求
+    """
+
+    def __init__(self, cache_dir, ttls: Dict[str, float] = None, max_size_mb=1024, offline=False):
+        """
+        Args:
+            cache_dir: 缓存目录
+            ttls: 各接口的缓存有效期(秒)，未列出的接口不缓存
+            max_size_mb: 缓存总大小上限(MB)
+            offline: 仅使用缓存，不发起任何网络请求；此时忽略有效期
+        """
+        self.cache_dir = cache_dir
+        self.ttls = dict(DEFAULT_CACHE_TTLS if ttls is None else ttls)
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._sizes = self._scan()
+        self._total_size = sum(self._sizes.values())
+        # put 可能在多个线程中同时执行，保护大小统计与淘汰
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> Optional["ResponseCache"]:
+        """
+        根据 config["response_cache"] 创建缓存，未启用时返回None；缓存目录默认位于 raw_data_dir 下
+
+        Args:
+            config: 配置字典
+        """
+        options = dict(config.get("response_cache") or {})
+        if not options.pop("enabled", False) and not options.get("offline"):
+            return None
+        cache_dir = options.pop("dir", None) or os.path.join(config.get("raw_data_dir", "./raw_data"), "http_cache")
+        return cls(cache_dir, **options)
+
+    def _scan(self) -> Dict[str, int]:
+        sizes = {}
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".gz"):
+                    path = os.path.join(root, name)
+                    try:
+                        sizes[path] = os.path.getsize(path)
+                    except OSError:
+                        continue
+        return sizes
+
+    def is_cacheable(self, endpoint) -> bool:
+        return endpoint in self.ttls
+
+    def _path(self, endpoint, url) -> str:
+        digest = hashlib.sha256(f"{endpoint}\n{url}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.gz")
+
+    def get(self, endpoint, url) -> Optional[str]:
+        """读取未过期的缓存内容，不存在或已过期时返回None"""
+        if not self.is_cacheable(endpoint) and not self.offline:
+            return None
+        path = self._path(endpoint, url)
+        try:
+            mtime = os.path.getmtime(path)
+            if not self.offline and time.time() - mtime > self.ttls[endpoint]:
+                self.misses += 1
+                return None
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                text = f.read()
+        except (OSError, EOFError):
+            self.misses += 1
+            return None
+        # 仅更新访问时间，供淘汰时参考；修改时间保留为写入时间，用于判断有效期
+        try:
+            os.utime(path, (time.time(), mtime))
+        except OSError:
+            pass
+        self.hits += 1
+        return text
+
+    def put(self, endpoint, url, text):
+        """写入缓存，先写临时文件再原子替换，避免中断时留下损坏的条目"""
+        if not self.is_cacheable(endpoint):
+            return
+        path = self._path(endpoint, url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._total_size += size - self._sizes.get(path, 0)
+            self._sizes[path] = size
+            if self._total_size > self.max_size:
+                self._evict()
+
+    async def get_async(self, endpoint, url) -> Optional[str]:
+        """在线程池中执行 get，解压与文件读取不阻塞事件循环"""
+        if not self.is_cacheable(endpoint) and not self.offline:
+            return None
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, endpoint, url)
+
+    async def put_async(self, endpoint, url, text):
+        """在线程池中执行 put，压缩与文件写入不阻塞事件循环"""
+        if not self.is_cacheable(endpoint):
+            return
+        await asyncio.get_running_loop().run_in_executor(None, self.put, endpoint, url, text)
+
+    def _evict(self):
+        """按最近访问时间从旧到新淘汰，直到总大小降到上限的90%"""
+        target = self.max_size * 0.9
+        entries = []
+        for path in self._sizes:
+            try:
+                entries.append((os.path.getatime(path), path))
+            except OSError:
+                entries.append((0, path))
+        entries.sort()
+        for _, path in entries:
+            if self._total_size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self._total_size -= self._sizes.pop(path, 0)
+
+    def stats(self):
+        return {
+            "entries": len(self._sizes),
+            "size_mb": round(self._total_size / 1024 / 1024, 2),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,183 @@
+import asyncio
+import random
+import time
+import aiohttp
+from concurrency import THROTTLE_CODES, THROTTLE_STATUS
+
+
+# 可重试的HTTP状态码：风控拦截、限流与服务端临时错误
+RETRYABLE_STATUS = (412, 429, 500, 502, 503, 504)
+# 可重试的B站业务码：风控(-352/-412)、服务器错误(-500)、过载(-503)、请求过于频繁(-509/-799)
+RETRYABLE_CODES = THROTTLE_CODES + (-500, -503, -509, -799)
+
+
+class BilibiliAPIError(Exception):
+    """B站接口返回了非0业务码"""
+
+    def __init__(self, code, message="", url=None):
+        self.code = code
+        self.message = message
+        self.url = url
+        super().__init__(f"Bilibili API Error: code={code}, message={message}")
+
+
+class RetryableError(Exception):
+    """调用方自行判定为可重试的错误(如风控页面导致的解析失败)"""
+
+
+def is_risk_control(exc) -> bool:
+    """判断异常是否由风控拦截引起"""
+    if isinstance(exc, BilibiliAPIError):
+        return exc.code in THROTTLE_CODES
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status in THROTTLE_STATUS
+    return False
+
+
+class RetryPolicy:
+    """
+    指数退避+抖动的重试策略
+    第n次重试前等待 [d*(1-jitter), d] 之间的随机时长，其中 d = min(max_delay, base_delay * 2^n)
+    """
+
+    def __init__(self, max_retries=3, base_delay=1.0, max_delay=30.0, jitter=0.5):
+        """
+        Args:
+            max_retries: 最大尝试次数(含首次请求)
+            base_delay: 首次重试的最长等待时间(秒)
+            max_delay: 单次等待时间上限(秒)
+            jitter: 随机抖动比例，0表示固定等待，1表示在 [0, d] 内均匀随机
+        """
+        self.max_retries = max(1, int(max_retries))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = min(max(jitter, 0.0), 1.0)
+
+    def with_retries(self, max_retries):
+        """返回仅尝试次数不同的新策略"""
+        return RetryPolicy(max_retries, self.base_delay, self.max_delay, self.jitter)
+
+    def is_retryable(self, exc) -> bool:
+        if isinstance(exc, (RetryableError, asyncio.TimeoutError)):
+            return True
+        if isinstance(exc, BilibiliAPIError):
+            return exc.code in RETRYABLE_CODES
+        if isinstance(exc, aiohttp.ClientResponseError):
+            return exc.status in RETRYABLE_STATUS
+        # 连接重置、DNS失败等网络层错误
+        return isinstance(exc, aiohttp.ClientError)
+
+    def backoff(self, attempt) -> float:
+        """计算第attempt次(从0开始)重试前的等待时间"""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * (1 - self.jitter) + random.uniform(0, delay * self.jitter)
+
+    async def call(self, func, *args, **kwargs):
+        """
+        按策略执行异步函数，遇到可重试错误时退避后重试，不可重试的错误直接抛出
+
+        Args:
+            func: 异步函数
+            *args, **kwargs: 传给func的参数
+        """
+        for attempt in range(self.max_retries):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries - 1 or not self.is_retryable(e):
+                    raise
+                delay = self.backoff(attempt)
+                print(f"请求失败 ({attempt+1}/{self.max_retries}): {str(e)}, 将在{delay:.1f}秒后重试...")
+                await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    单个接口的熔断器
+    连续出现 failure_threshold 次风控错误后熔断，熔断期间该接口的所有请求暂停等待；
+    熔断到期后放行一个探测请求，成功则恢复，失败则以加倍的时长再次熔断
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=30.0, max_timeout=600.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._trips = 0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+
+    async def wait(self):
+        """熔断期间阻塞调用方，直到允许发起请求"""
+        while True:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                remaining = self._open_until - time.monotonic()
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+                    continue
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            # 半开状态只放行一个探测请求，其他请求等待探测结果；探测请求被取消时超时后重新放行
+            now = time.monotonic()
+            if not self._probe_in_flight or now - self._probe_started > self.reset_timeout:
+                self._probe_in_flight = True
+                self._probe_started = now
+                return
+            await asyncio.sleep(0.5)
+
+    def record_success(self):
+        self._failures = 0
+        if self.state != self.CLOSED:
+            print(f"[{self.name}] 熔断恢复，继续请求")
+        self.state = self.CLOSED
+        self._trips = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, exc=None):
+        """记录一次失败，只有风控类错误会计入熔断"""
+        if exc is not None and not is_risk_control(exc):
+            if self.state == self.HALF_OPEN:
+                # 探测请求到达了服务端且未被风控，视为已解除拦截
+                self.record_success()
+            return
+        if self.state == self.HALF_OPEN:
+            self._trip()
+            return
+        self._failures += 1
+        if self.state == self.CLOSED and self._failures >= self.failure_threshold:
+            self._trip()
+
+    def _trip(self):
+        timeout = min(self.max_timeout, self.reset_timeout * (2 ** self._trips))
+        self._trips += 1
+        self._failures = 0
+        self._probe_in_flight = False
+        self.state = self.OPEN
+        self._open_until = time.monotonic() + timeout
+        print(f"[{self.name}] 连续触发风控，暂停该接口所有请求 {timeout:.0f} 秒")
+
+
+class CircuitBreakers:
+    """按接口管理熔断器，首次使用时创建"""
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0, max_timeout=600.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self._breakers = {}
+
+    def get(self, endpoint) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(endpoint, self.failure_threshold, self.reset_timeout, self.max_timeout)
+            self._breakers[endpoint] = breaker
+        return breaker
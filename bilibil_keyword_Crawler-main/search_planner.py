@@ -0,0 +1,263 @@
+import asyncio
+from typing import Dict, List, Optional
+
+
+class PageFetchError(Exception):
+    """搜索页请求或解析失败；与确实没有结果的空页区分开，失败的页不会被当作空页提前结束查询"""
+
+
+class Pager:
+    """
+    单个 (关键词, 时间窗口) 查询的分页
+    先请求第一页：能读取到总页数时以总页数为准，只并发请求实际存在的页，超出总页数的页直接跳过；
+    读取不到总页数时逐页请求，遇到空页或不足一页的结果即停止。
+    请求失败(fetch 抛出 PageFetchError)的页会重试，重试后仍失败的页计入失败数，不作为提前结束的依据。
+    每个查询停止的原因都会记录下来
+    """
+
+    # 停止原因
+    EMPTY_PAGE = "empty_page"    # 遇到空页
+    SHORT_PAGE = "short_page"    # 遇到不足一页的结果
+    NUM_PAGES = "num_pages"      # 已请求到总页数，之后的页不存在
+    MAX_PAGE = "max_page"        # 已请求到允许的最大页码
+    FAILED = "failed"            # 第一页重试后仍失败，无法判断之后的页
+
+    def __init__(self, page_size=None, retries=1):
+        """
+        Args:
+            page_size: 每页结果数，未知时(如HTML搜索页)以第一页的结果数为准
+            retries: 单页请求失败后的重试次数(HttpClient 内部的重试之外再重试)
+        """
+        self.page_size = page_size
+        self.retries = retries
+        self.queries = 0
+        self.requests = 0
+        self.skipped = 0
+        self.failed = 0
+        self.stops: Dict[str, int] = {}
+        self.log: List[Dict] = []
+
+    def _stop(self, reason, window, last_page, tag=None):
+        self.stops[reason] = self.stops.get(reason, 0) + 1
+        self.log.append({"tag": tag, "label": window.get("label"), "begin_ts": window.get("begin_ts"),
+                         "end_ts": window.get("end_ts"), "last_page": last_page, "reason": reason})
+
+    async def fetch(self, fetch, window, page):
+        """
+        请求一页，失败时重试
+
+        Returns:
+            (结果列表, meta)，重试后仍失败时返回None
+        """
+        for _ in range(self.retries + 1):
+            self.requests += 1
+            try:
+                return await fetch(window, page)
+            except PageFetchError:
+                continue
+        self.failed += 1
+        return None
+
+    async def run(self, window, pages, fetch, first=None, tag=None, collect=True):
+        """
+        按页码请求一个查询
+
+        Args:
+            window: 时间窗口，包含 begin_ts / end_ts / label
+            pages: 允许请求的页码
+            fetch: fetch(window, page) 返回 (结果列表, meta) 的协程函数，meta为 {"num_results", "num_pages"}，
+                读取不到时为None；请求失败时抛出 PageFetchError
+            first: 已请求过的第一页 (结果列表, meta)，提供时不再重复请求
+            tag: 记录停止原因时附带的标识(如关键词)
+            collect: 是否汇总各页结果；结果已由 fetch 交给下游处理时设为False，不在内存中保留
+
+        Returns:
+            [(window, page, 结果列表), ...]，按页码顺序排列，不含失败的页；collect 为False时为空列表
+        """
+        pages = sorted(set(pages))
+        if not pages:
+            return []
+        self.queries += 1
+        if first is None:
+            first = await self.fetch(fetch, window, pages[0])
+            if first is None:
+                self._stop(self.FAILED, window, pages[0], tag)
+                return []
+        videos, meta = first
+        results = []
+        if collect:
+            results.append((window, pages[0], videos))
+
+        rest = pages[1:]
+        if meta is not None:
+            # 总页数已知：以总页数为准(去重后不足一页的页之后仍可能有结果)，之后的页同时请求，不存在的页直接跳过
+            existing = [page for page in rest if page <= meta["num_pages"]]
+            self.skipped += len(rest) - len(existing)
+            fetched = await asyncio.gather(*[self.fetch(fetch, window, page) for page in existing])
+            if collect:
+                results.extend((window, page, item[0]) for page, item in zip(existing, fetched) if item is not None)
+            if not videos and not existing:
+                reason = self.EMPTY_PAGE
+            else:
+                reason = self.NUM_PAGES if len(existing) < len(rest) else self.MAX_PAGE
+            self._stop(reason, window, existing[-1] if existing else pages[0], tag)
+            return results
+
+        page_size = self.page_size or len(videos)
+        if not videos or len(videos) < page_size:
+            self.skipped += len(rest)
+            self._stop(self.SHORT_PAGE if videos else self.EMPTY_PAGE, window, pages[0], tag)
+            return results
+
+        # 总页数未知：逐页请求，遇到空页或不足一页即停止；失败的页跳过，继续请求下一页
+        for index, page in enumerate(rest):
+            item = await self.fetch(fetch, window, page)
+            if item is None:
+                continue
+            page_videos = item[0]
+            if collect:
+                results.append((window, page, page_videos))
+            if not page_videos or len(page_videos) < page_size:
+                self.skipped += len(rest) - index - 1
+                self._stop(self.EMPTY_PAGE if not page_videos else self.SHORT_PAGE, window, page, tag)
+                return results
+        self._stop(self.MAX_PAGE, window, pages[-1], tag)
+        return results
+
+    def stats(self):
+        return {"queries": self.queries, "requests": self.requests, "skipped": self.skipped, "failed": self.failed,
+                **self.stops}
+
+
+class WindowPlanner:
+    """
+    搜索时间窗口的自适应二分
+    先请求窗口的第1页，根据返回的结果总数与总页数判断窗口是否被截断：
+    结果数达到搜索接口的上限(result_cap)或总页数超过允许的页数时，把窗口从中间一分为二分别搜索，
+    直到窗口不再被截断、短于 min_window、二分深度达到 max_depth 或二分产生的第1页请求数达到 max_requests；
+    未被截断的窗口交给 Pager 只请求实际存在的页，不再为结果很少的窗口请求空页。
+    二分后父窗口第1页的结果仍会返回；若其发布时间全部落在某个不再二分的子窗口内，该页即是子窗口的第1页，直接复用
+    """
+
+    def __init__(self, result_cap=1000, min_window=3600, max_depth=6, max_requests=200):
+        """
+        Args:
+            result_cap: 搜索接口单次查询最多返回的结果数，结果总数达到该值即视为被截断
+            min_window: 最短窗口(秒)，短于该时长的窗口不再二分
+            max_depth: 单个窗口最多二分的层数，每个查询最多被分成 2**max_depth 个窗口
+            max_requests: 本规划器因二分而额外请求的子窗口第1页总数上限，达到后不再二分
+        """
+        self.result_cap = result_cap
+        self.min_window = min_window
+        self.max_depth = max_depth
+        self.max_requests = max_requests
+        self.split_requests = 0
+        self.windows = 0
+        self.splits = 0
+        self.reused = 0
+        self.failed = 0
+        self.capped = 0
+
+    @classmethod
+    def from_config(cls, config) -> Optional["WindowPlanner"]:
+        """
+        根据 config["search_bisect"] 创建窗口规划器，未启用时返回None
+
+        Args:
+            config: 配置字典
+        """
+        options = dict(config.get("search_bisect") or {})
+        if not options.pop("enabled", False):
+            return None
+        return cls(**options)
+
+    def _can_split(self, window) -> bool:
+        if window["begin_ts"] is None:
+            return False
+        return window["end_ts"] - window["begin_ts"] >= 2 * self.min_window
+
+    def _within_budget(self, depth) -> bool:
+        return depth < self.max_depth and self.split_requests + 2 <= self.max_requests
+
+    def _truncated(self, meta, max_page) -> bool:
+        return meta["num_results"] >= self.result_cap or meta["num_pages"] > max_page
+
+    @staticmethod
+    def _contains(window, first, published_at) -> bool:
+        """第1页所有结果的发布时间是否都在窗口内，无法读取发布时间时视为不包含"""
+        if not first or published_at is None:
+            return False
+        for item in first:
+            ts = published_at(item)
+            if ts is None or not window["begin_ts"] <= ts <= window["end_ts"]:
+                return False
+        return True
+
+    @staticmethod
+    def split(window):
+        """把窗口从中间分成不重叠的两半，标签沿用父窗口"""
+        middle = (window["begin_ts"] + window["end_ts"]) // 2
+        return (dict(window, end_ts=middle), dict(window, begin_ts=middle + 1))
+
+    async def search(self, window, max_page, fetch, pager: Optional[Pager] = None, tag=None, first=None,
+                     collect=True, published_at=None, depth=0):
+        """
+        搜索一个时间窗口，必要时递归二分
+
+        Args:
+            window: 时间窗口，包含 begin_ts / end_ts / label
+            max_page: 每个窗口最多请求的页数
+            fetch: fetch(window, page) 返回 (结果列表, meta) 的协程函数，meta为 {"num_results", "num_pages"}，
+                读取不到时为None；请求失败时抛出 PageFetchError
+            pager: 未截断窗口的分页器，为None时使用默认分页器
+            tag: 记录分页停止原因时附带的标识
+            first: 已请求过的第1页 (结果列表, meta)，提供时不再重复请求
+            collect: 是否汇总各页结果，见 Pager.run
+            published_at: published_at(结果) 返回发布时间戳(读取不到时为None)，用于在子窗口中复用父窗口的第1页；
+                为None时不复用
+            depth: 当前窗口的二分深度
+
+        Returns:
+            [(window, page, 结果列表), ...]，按时间窗口先后、页码顺序排列；collect 为False时为空列表
+        """
+        if pager is None:
+            pager = Pager()
+        self.windows += 1
+        if first is None:
+            # 分页器会按重试次数重新请求失败的第1页，仍失败时放弃该窗口，不当作空窗口做判断
+            first = await pager.fetch(fetch, window, 1)
+            if first is None:
+                self.failed += 1
+                return []
+        first, meta = first
+        if meta is not None and self._truncated(meta, max_page) and self._can_split(window):
+            if not self._within_budget(depth):
+                # 达到深度或请求数上限，按截断的窗口直接翻页
+                self.capped += 1
+                return await pager.run(window, range(1, max_page + 1), fetch, first=(first, meta), tag=tag,
+                                       collect=collect)
+            self.splits += 1
+            tasks = []
+            reused = False
+            for half in self.split(window):
+                reuse = None
+                if not reused and not (self._can_split(half) and self._within_budget(depth + 1)) \
+                        and self._contains(half, first, published_at):
+                    # 搜索排序不变时，结果全部落在子窗口内的父窗口第1页就是子窗口的第1页；
+                    # 结果总数未知，子窗口改由分页器逐页请求到空页或不足一页
+                    reuse, reused = (first, None), True
+                    self.reused += 1
+                else:
+                    self.split_requests += 1
+                tasks.append(self.search(half, max_page, fetch, pager, tag, first=reuse, collect=collect,
+                                         published_at=published_at, depth=depth + 1))
+            halves = await asyncio.gather(*tasks)
+            # 父窗口第1页已经请求过，未被子窗口复用时同样作为结果返回，子窗口中重复的结果由调用方按BV号去重
+            units = [] if reused or not collect else [(window, 1, first)]
+            return units + [item for half in halves for item in half]
+        # 读取不到结果总数时由分页器逐页请求，遇到空页或不足一页即停止
+        return await pager.run(window, range(1, max_page + 1), fetch, first=(first, meta), tag=tag, collect=collect)
+
+    def stats(self):
+        return {"windows": self.windows, "splits": self.splits, "reused": self.reused, "failed": self.failed,
+                "capped": self.capped}
@@ -0,0 +1,294 @@
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Optional
+
+
+# 延迟与排队时间直方图的桶上界(秒)
+DEFAULT_BUCKETS = (0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0, 60.0)
+
+
+class Histogram:
+    """固定桶直方图，与Prometheus的histogram语义一致(导出时为累积计数)"""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个桶为 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q) -> Optional[float]:
+        """按桶内线性插值估计分位数，没有样本时返回None"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def cumulative(self):
+        total = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            total += n
+            yield bound, total
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": _round(self.quantile(0.5)),
+            "p95": _round(self.quantile(0.95)),
+            "p99": _round(self.quantile(0.99)),
+            "buckets": {("+Inf" if bound == float("inf") else str(bound)): n for bound, n in self.cumulative()},
+        }
+
+
+def _round(value):
+    return round(value, 4) if value is not None else None
+
+
+class EndpointMetrics:
+    """单个接口的请求统计"""
+
+    __slots__ = ("requests", "failures", "retries", "cache_hits", "bytes", "latency", "queue_wait",
+                 "status", "codes", "errors")
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.bytes = 0
+        self.latency = Histogram()
+        self.queue_wait = Histogram()
+        self.status = {}   # HTTP状态码 -> 次数
+        self.codes = {}    # B站业务码 -> 次数
+        self.errors = {}   # 异常类型 -> 次数
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "bytes": self.bytes,
+            "latency": self.latency.to_dict(),
+            "queue_wait": self.queue_wait.to_dict(),
+            "status": {str(k): v for k, v in sorted(self.status.items())},
+            "codes": {str(k): v for k, v in sorted(self.codes.items())},
+            "errors": dict(sorted(self.errors.items())),
+        }
+
+
+class Telemetry:
+    """
+    按接口(search / video / reply)记录请求遥测：延迟与排队时间直方图、响应字节数、重试次数、
+    HTTP状态码与业务码分布；可在运行中定期、结束时一次性导出为JSON或Prometheus文本格式
+    """
+
+    def __init__(self, path=None, fmt=None, interval=0):
+        """
+        Args:
+            path: 导出文件路径，为空时只在内存中统计
+            fmt: 导出格式 "json" 或 "prometheus"，为空时按扩展名判断(.prom/.txt 为Prometheus格式)
+            interval: 运行中定期导出的间隔(秒)，0表示只在结束时导出
+        """
+        if fmt is None:
+            fmt = "prometheus" if path and os.path.splitext(path)[1] in (".prom", ".txt") else "json"
+        if fmt not in ("json", "prometheus"):
+            raise ValueError(f"不支持的导出格式: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.interval = interval
+        self.endpoints: Dict[str, EndpointMetrics] = {}
+        self.started = time.time()
+        # 上次请求失败的URL，再次请求同一URL即视为一次重试(涵盖退避重试与换Cookie重新请求)
+        self._failed_urls = set()
+        self._task = None
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        根据 config["metrics_file"] / config["metrics_format"] / config["metrics_interval"] 创建遥测
+
+        Args:
+            config: 配置字典
+        """
+        return cls(
+            path=config.get("metrics_file") or None,
+            fmt=config.get("metrics_format") or None,
+            interval=config.get("metrics_interval", 0) or 0,
+        )
+
+    def _get(self, endpoint) -> EndpointMetrics:
+        endpoint = endpoint or "other"
+        metrics = self.endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self.endpoints[endpoint] = EndpointMetrics()
+        return metrics
+
+    def record_cache_hit(self, endpoint):
+        self._get(endpoint).cache_hits += 1
+
+    def record_request(self, endpoint, url, latency, queue_wait, status=None, nbytes=0, exc=None):
+        """
+        记录一次实际发出的请求
+
+        Args:
+            endpoint: 接口名
+            url: 请求URL
+            latency: 请求耗时(秒)
+            queue_wait: 发出前在熔断、限速令牌、并发名额与代理上等待的时间(秒)
+            status: HTTP状态码，连接失败或超时时为None
+            nbytes: 响应体字节数
+            exc: 请求异常，成功时为None
+        """
+        metrics = self._get(endpoint)
+        metrics.requests += 1
+        metrics.bytes += nbytes
+        metrics.latency.observe(latency)
+        metrics.queue_wait.observe(queue_wait)
+        if status is not None:
+            metrics.status[status] = metrics.status.get(status, 0) + 1
+        if url in self._failed_urls:
+            metrics.retries += 1
+        if exc is None:
+            self._failed_urls.discard(url)
+        else:
+            metrics.failures += 1
+            name = type(exc).__name__
+            metrics.errors[name] = metrics.errors.get(name, 0) + 1
+            self._failed_urls.add(url)
+
+    def record_code(self, endpoint, code):
+        """记录一次B站业务码"""
+        metrics = self._get(endpoint)
+        metrics.codes[code] = metrics.codes.get(code, 0) + 1
+
+    def latency_quantile(self, endpoint, q) -> Optional[float]:
+        """某接口请求延迟的分位数估计，没有样本时返回None"""
+        metrics = self.endpoints.get(endpoint)
+        return metrics.latency.quantile(q) if metrics is not None else None
+
+    def snapshot(self):
+        return {
+            "started": self.started,
+            "elapsed": round(time.time() - self.started, 3),
+            "endpoints": {name: m.to_dict() for name, m in sorted(self.endpoints.items())},
+        }
+
+    def to_prometheus(self) -> str:
+        """导出为Prometheus文本格式"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{name}{{{label_str}}} {value}")
+
+        items = sorted(self.endpoints.items())
+        metric("bili_http_requests_total", "counter", "Requests sent",
+               [((("endpoint", e),), m.requests) for e, m in items])
+        metric("bili_http_failures_total", "counter", "Requests that raised an error",
+               [((("endpoint", e),), m.failures) for e, m in items])
+        metric("bili_http_retries_total", "counter", "Requests repeating a previously failed URL",
+               [((("endpoint", e),), m.retries) for e, m in items])
+        metric("bili_http_cache_hits_total", "counter", "Responses served from the disk cache",
+               [((("endpoint", e),), m.cache_hits) for e, m in items])
+        metric("bili_http_response_bytes_total", "counter", "Response body bytes received",
+               [((("endpoint", e),), m.bytes) for e, m in items])
+        metric("bili_http_status_total", "counter", "HTTP status codes",
+               [((("endpoint", e), ("status", s)), n) for e, m in items for s, n in sorted(m.status.items())])
+        metric("bili_api_code_total", "counter", "Bilibili business codes",
+               [((("endpoint", e), ("code", c)), n) for e, m in items for c, n in sorted(m.codes.items())])
+        metric("bili_http_errors_total", "counter", "Request errors by exception type",
+               [((("endpoint", e), ("error", err)), n) for e, m in items for err, n in sorted(m.errors.items())])
+        for name, attr, help_text in (
+            ("bili_http_request_duration_seconds", "latency", "Request latency"),
+            ("bili_http_queue_wait_seconds", "queue_wait", "Time spent waiting before a request was sent"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for e, m in items:
+                hist = getattr(m, attr)
+                for bound, total in hist.cumulative():
+                    le = "+Inf" if bound == float("inf") else bound
+                    lines.append(f'{name}_bucket{{endpoint="{e}",le="{le}"}} {total}')
+                lines.append(f'{name}_sum{{endpoint="{e}"}} {hist.sum:.6f}')
+                lines.append(f'{name}_count{{endpoint="{e}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path=None):
+        """写出当前统计，先写临时文件再原子替换，便于外部程序随时读取"""
+        path = path or self.path
+        if not path:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.fmt == "prometheus":
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def start(self):
+        """配置了导出路径与间隔时，启动后台定期导出任务(需在事件循环内调用)"""
+        if self.path and self.interval > 0 and self._task is None:
+            self._task = asyncio.ensure_future(self._export_loop())
+
+    async def _export_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.export()
+            except OSError as e:
+                print(f"写出请求统计失败: {e}")
+
+    async def stop(self):
+        """停止定期导出并写出最终统计"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.export()
+
+    def summary(self) -> str:
+        """各接口统计的简要文本，供运行结束时打印"""
+        lines = []
+        for name, m in sorted(self.endpoints.items()):
+            p50 = m.latency.quantile(0.5)
+            p95 = m.latency.quantile(0.95)
+            lines.append(
+                f"[{name}] 请求 {m.requests} 次，失败 {m.failures}，重试 {m.retries}，缓存命中 {m.cache_hits}，"
+                f"{m.bytes / 1024 / 1024:.2f} MB，延迟 p50={p50 or 0:.2f}s p95={p95 or 0:.2f}s，"
+                f"平均排队 {m.queue_wait.sum / max(1, m.queue_wait.count):.2f}s"
+            )
+        return "\n".join(lines)
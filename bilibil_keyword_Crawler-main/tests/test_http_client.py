@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+from concurrency import AdaptiveConcurrency
+from http_client import HttpClient
+from rate_limiter import RateLimiter
+
+
+async def _start_server():
+    async def handler(request):
+        await asyncio.sleep(0.01)
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/{endpoint}/{i}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+def test_search_backlog_does_not_hold_concurrency_slots():
+    async def run():
+        runner, base_url = await _start_server()
+        client = HttpClient(rate_limiter=RateLimiter({"search": {"rate": 5, "burst": 1}, "video": {"rate": 100}}),
+                            concurrency=AdaptiveConcurrency(initial=4, max_limit=4))
+        try:
+            async with client:
+                searches = [asyncio.ensure_future(client.get_text(f"{base_url}/search/{i}", endpoint="search"))
+                            for i in range(8)]
+                # 让搜索请求先排上队
+                await asyncio.sleep(0.05)
+                started = time.monotonic()
+                await client.get_text(f"{base_url}/video/1", endpoint="video")
+                video_latency = time.monotonic() - started
+                await asyncio.gather(*searches)
+        finally:
+            await runner.cleanup()
+        return video_latency
+
+    # 8个搜索请求按每秒5个的预算需要约1.4秒；视频请求不应排在它们后面
+    assert asyncio.run(run()) < 0.15
@@ -0,0 +1,134 @@
+import asyncio
+import csv
+
+import pytest
+
+import pipeline
+from models import Video
+from pipeline import CrawlPipeline
+
+
+class FakeAPI:
+    """模拟 BilibiliAPI：search_many 分批回调 on_videos，详情获取按 fail 决定成败"""
+
+    def __init__(self, bvids, batch=10, fail=(), search_error=None):
+        self.bvids = bvids
+        self.batch = batch
+        self.fail = set(fail)
+        self.search_error = search_error
+        self.client = object()
+        self.detail_calls = 0
+
+    async def search_many(self, keywords, time_begin=None, time_end=None, pages=None, recent_days=None,
+                          on_videos=None):
+        for begin in range(0, len(self.bvids), self.batch):
+            videos = [Video(bvid=bvid, title=f"<em>{bvid}</em>", from_search=True)
+                      for bvid in self.bvids[begin:begin + self.batch]]
+            await on_videos(keywords[0], videos)
+            await asyncio.sleep(0)
+        if self.search_error is not None:
+            raise self.search_error
+
+    async def get_videos_detail(self, videos, show_progress=True):
+        self.detail_calls += 1
+        await asyncio.sleep(0)
+        video = videos[0]
+        if video.bvid in self.fail:
+            return [Video(bvid=video.bvid, title=video.title, from_search=True, error="请求失败")]
+        return [Video(bvid=video.bvid, aid=int(video.bvid[2:]), title=video.title)]
+
+
+def _config(tmp_path):
+    return {"file_path": str(tmp_path / "out" / "videos.csv"), "output_mode": "simple", "batch_size": 3}
+
+
+def _rows(path):
+    with open(path, encoding="utf-8-sig") as file:
+        return list(csv.DictReader(file))
+
+
+def test_pipeline_shuts_down_cleanly_with_small_queues(tmp_path):
+    api = FakeAPI([f"BV{i}" for i in range(200)])
+    crawl = CrawlPipeline(api, _config(tmp_path), queue_size=1)
+    result = asyncio.run(asyncio.wait_for(crawl.run(["测试"]), timeout=10))
+    assert result["video_count"] == 200
+    rows = _rows(result["output_file"])
+    assert len({row["BV号"] for row in rows}) == 200
+    assert rows[0]["标题"] == "BV0"
+    assert crawl.stats()["fetched"] == 200
+
+
+def test_pipeline_deduplicates_repeated_search_results(tmp_path):
+    api = FakeAPI([f"BV{i % 5}" for i in range(20)], batch=5)
+    crawl = CrawlPipeline(api, _config(tmp_path), queue_size=2)
+    result = asyncio.run(crawl.run(["测试"]))
+    assert result["video_count"] == 5
+    assert api.detail_calls == 5
+
+
+async def _no_comments(*args, **kwargs):
+    await asyncio.sleep(0)
+
+
+def test_pipeline_search_error_propagates_and_cancels_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "crawl_comments", _no_comments)
+    api = FakeAPI([f"BV{i}" for i in range(5)], search_error=RuntimeError("搜索失败"))
+    crawl = CrawlPipeline(api, _config(tmp_path), fetch_comments=True, queue_size=1)
+
+    async def run():
+        with pytest.raises(RuntimeError, match="搜索失败"):
+            await crawl.run(["测试"])
+        # 工作协程均已取消，不再有未完成的任务
+        await asyncio.sleep(0)
+        return [task for task in asyncio.all_tasks() if task.get_coro().__name__.endswith("_worker")]
+
+    assert asyncio.run(asyncio.wait_for(run(), timeout=10)) == []
+    assert crawl._writer._file is None
+
+
+def test_pipeline_detail_failure_still_writes_search_row(tmp_path):
+    api = FakeAPI([f"BV{i}" for i in range(6)], fail={"BV2", "BV4"})
+    crawl = CrawlPipeline(api, _config(tmp_path))
+    result = asyncio.run(crawl.run(["测试"]))
+    assert result["video_count"] == 6
+    assert crawl.stats()["failed"] == 2
+    assert crawl.stats()["fetched"] == 4
+
+
+def test_pipeline_comment_failure_does_not_stop_other_videos(tmp_path, monkeypatch):
+    crawled = []
+
+    async def fake_crawl_comments(bvid, *args, **kwargs):
+        await asyncio.sleep(0)
+        if bvid == "BV3":
+            raise RuntimeError("评论请求失败")
+        crawled.append(bvid)
+
+    class Registry:
+        def __init__(self):
+            self.comments = []
+
+        def mark_seen(self, bvids):
+            list(bvids)
+
+        def fresh_rows(self, bvids, row_mode):
+            return {}
+
+        def record_details(self, rows, row_mode):
+            pass
+
+        def needs_comments(self, bvid):
+            return True
+
+        def record_comments(self, bvid):
+            self.comments.append(bvid)
+
+    monkeypatch.setattr(pipeline, "crawl_comments", fake_crawl_comments)
+    registry = Registry()
+    api = FakeAPI([f"BV{i}" for i in range(8)])
+    crawl = CrawlPipeline(api, _config(tmp_path), registry=registry, fetch_comments=True, queue_size=1)
+    result = asyncio.run(asyncio.wait_for(crawl.run(["测试"]), timeout=10))
+    assert result["comment_files"] == 7
+    assert "BV3" not in registry.comments
+    assert sorted(crawled) == sorted(f"BV{i}" for i in range(8) if i != 3)
+    assert (tmp_path / "out" / "comments" / "BV0_comments.csv").exists()
@@ -0,0 +1,160 @@
+import asyncio
+import socket
+import time
+
+import aiohttp
+from aiohttp import web
+
+from proxy_pool import ProxyPool
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_route("GET", "/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def _dead_port():
+    # 绑定后立即关闭的端口，连接会被拒绝，模拟已失效的代理
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StandInProxies:
+    """本地目标站点与若干替身代理；替身代理收到绝对URI形式的请求，延迟后转发到目标站点"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.runners = []
+        self.urls = []
+        self.active = {}
+        self.peak = {}
+
+    async def __aenter__(self):
+        async def target(request):
+            return web.Response(text="ok")
+
+        runner, port = await _serve(target)
+        self.runners.append(runner)
+        self.target = f"http://127.0.0.1:{port}/"
+        for delay in self.delays:
+            runner, port = await _serve(self._proxy(delay))
+            self.runners.append(runner)
+            self.urls.append(f"http://127.0.0.1:{port}")
+        return self
+
+    def _proxy(self, delay):
+        async def handler(request):
+            port = request.transport.get_extra_info("sockname")[1]
+            self.active[port] = self.active.get(port, 0) + 1
+            self.peak[port] = max(self.peak.get(port, 0), self.active[port])
+            try:
+                await asyncio.sleep(delay)
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(str(request.url)) as resp:
+                        return web.Response(text=await resp.text(), status=resp.status)
+            finally:
+                self.active[port] -= 1
+        return handler
+
+    async def __aexit__(self, exc_type, exc, tb):
+        for runner in self.runners:
+            await runner.cleanup()
+
+
+async def _crawl(pool, target, requests):
+    async with aiohttp.ClientSession() as session:
+        async def fetch():
+            async with pool.lease() as lease:
+                started = time.monotonic()
+                try:
+                    async with session.get(target, proxy=lease.url, timeout=aiohttp.ClientTimeout(total=2)) as resp:
+                        await resp.text()
+                    lease.succeed(time.monotonic() - started)
+                except Exception as e:
+                    lease.fail(e)
+
+        await asyncio.gather(*[fetch() for _ in range(requests)])
+
+
+def test_fast_proxy_scores_better_and_takes_more_requests():
+    async def run():
+        async with StandInProxies([0.01, 0.2]) as proxies:
+            pool = ProxyPool(proxies.urls, max_per_proxy=2)
+            await _crawl(pool, proxies.target, 30)
+            return pool, proxies
+
+    pool, _ = asyncio.run(run())
+    fast, slow = pool.proxies
+    assert fast.latency < slow.latency
+    assert pool._score(fast) < pool._score(slow)
+    assert fast.requests > slow.requests
+    assert fast.requests + slow.requests == 30
+    assert fast.failures == slow.failures == 0
+
+
+def test_dead_proxy_is_backed_off_then_evicted():
+    async def run():
+        async with StandInProxies([0.01]) as proxies:
+            dead = f"http://127.0.0.1:{_dead_port()}"
+            pool = ProxyPool(proxies.urls + [dead], max_per_proxy=2, backoff_base=0.01, evict_after=3)
+            await _crawl(pool, proxies.target, 40)
+            return pool
+
+    pool = asyncio.run(run())
+    alive, dead = pool.proxies
+    assert dead.evicted
+    assert dead.failures == 3
+    assert dead.consecutive_failures == 3
+    assert not alive.evicted
+    assert alive.failures == 0
+    assert alive.requests + dead.requests == 40
+
+
+def test_leases_are_released_and_per_proxy_limit_holds():
+    async def run():
+        async with StandInProxies([0.05, 0.05]) as proxies:
+            pool = ProxyPool(proxies.urls, max_per_proxy=2)
+            await _crawl(pool, proxies.target, 20)
+            return pool, proxies
+
+    pool, proxies = asyncio.run(run())
+    assert [proxy.in_flight for proxy in pool.proxies] == [0, 0]
+    assert max(proxies.peak.values()) <= 2
+
+
+def test_lease_released_when_caller_raises():
+    async def run():
+        pool = ProxyPool(["http://127.0.0.1:1"], evict_after=1)
+        try:
+            async with pool.lease():
+                raise ValueError("解析失败")
+        except ValueError:
+            pass
+        return pool
+
+    proxy = asyncio.run(run()).proxies[0]
+    # 与代理无关的异常只归还名额，不计为代理失败
+    assert proxy.in_flight == 0
+    assert proxy.requests == 1
+    assert proxy.failures == 0
+    assert not proxy.evicted
+
+
+def test_acquire_raises_when_every_proxy_is_evicted():
+    async def run():
+        pool = ProxyPool(["http://127.0.0.1:1"], evict_after=1)
+        async with pool.lease() as lease:
+            lease.fail(aiohttp.ClientConnectionError())
+        try:
+            await pool.acquire()
+        except RuntimeError:
+            return True
+        return False
+
+    assert asyncio.run(run())
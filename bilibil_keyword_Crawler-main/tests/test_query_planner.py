@@ -0,0 +1,103 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlencode
+
+from bilibili_api import BilibiliAPI
+from cassette import Cassette
+from http_client import HttpClient
+from query_planner import QueryPlanner
+from wbi import NAV_URL, sign_params
+
+SEARCH_URL = "https://api.bilibili.com/x/web-interface/wbi/search/type"
+TIME_BEGIN, TIME_END = "2024-01-01 00:00:00", "2024-02-01 00:00:00"
+
+
+def test_plan_drops_and_deprioritizes_overlapping_combinations():
+    planner = QueryPlanner(drop_overlap=0.9, deprioritize_overlap=0.5)
+    probes = {
+        "a": {f"BV{i}" for i in range(10)},
+        "b": {f"BV{i}" for i in range(10)},          # 与 a 完全重叠
+        "c": {f"BV{i}" for i in range(4, 12)},       # 与 a 重叠 75%
+        "d": {f"BV{i}" for i in range(100, 110)},    # 不重叠
+    }
+    metas = {keyword: [{"num_results": 200, "num_pages": 10}] for keyword in probes}
+    decisions = {d["keyword"]: d for d in planner.plan(probes, metas, 10)}
+    assert decisions["a"]["action"] == QueryPlanner.KEEP
+    assert decisions["d"]["action"] == QueryPlanner.KEEP
+    assert decisions["b"]["action"] == QueryPlanner.DROP
+    assert decisions["b"]["max_page"] == 1
+    assert decisions["c"]["action"] == QueryPlanner.DEPRIORITIZE
+    assert 1 <= decisions["c"]["max_page"] < 10
+    stats = planner.stats()
+    assert stats["dropped"] == 1 and stats["deprioritized"] == 1
+    # b 节省9页，c 节省 10 - max_page 页
+    assert stats["saved_requests"] == 9 + 10 - decisions["c"]["max_page"]
+
+
+def test_plan_orders_keep_before_deprioritize_before_drop():
+    planner = QueryPlanner()
+    probes = {"x": {"BV1", "BV2"}, "y": {"BV1", "BV2"}, "z": {"BV1", "BV3", "BV4"}, "w": {"BV9"}}
+    decisions = planner.plan(probes, {k: [None] for k in probes}, 5)
+    order = {QueryPlanner.KEEP: 0, QueryPlanner.DEPRIORITIZE: 1, QueryPlanner.DROP: 2}
+    ranks = [order[d["action"]] for d in decisions]
+    assert ranks == sorted(ranks)
+
+
+def test_plan_keeps_failed_and_empty_probes():
+    planner = QueryPlanner()
+    probes = {"a": {"BV1", "BV2"}, "empty": set(), "failed": None}
+    decisions = {d["keyword"]: d for d in planner.plan(probes, {k: [None] for k in probes}, 7)}
+    for keyword in ("empty", "failed"):
+        assert decisions[keyword]["action"] == QueryPlanner.KEEP
+        assert decisions[keyword]["max_page"] == 7
+        assert decisions[keyword]["overlap"] is None
+    assert planner.stats()["unprobed"] == 2
+    assert planner.stats()["dropped"] == 0
+
+
+def _record_search(cassette, keyword, bvids, page_size=20):
+    begin = int(time.mktime(time.strptime(TIME_BEGIN, "%Y-%m-%d %H:%M:%S")))
+    end = int(time.mktime(time.strptime(TIME_END, "%Y-%m-%d %H:%M:%S")))
+    pages = max(1, -(-len(bvids) // page_size))
+    for page in range(1, pages + 1):
+        params = {"search_type": "video", "keyword": keyword, "page": page, "page_size": page_size,
+                  "order": "click", "pubtime_begin_s": begin, "pubtime_end_s": end}
+        result = [{"bvid": bvid, "title": bvid, "pubdate": begin + 60, "play": 1}
+                  for bvid in bvids[(page - 1) * page_size:page * page_size]]
+        body = {"code": 0, "data": {"numResults": len(bvids), "numPages": pages, "result": result}}
+        url = f"{SEARCH_URL}?{urlencode(sign_params(params, 'key'))}"
+        cassette.record("search", url, 200, json.dumps(body).encode("utf-8"), "utf-8")
+
+
+def test_search_many_with_query_planner_replays_fewer_pages(tmp_path):
+    corpus = {
+        "a b": [f"BV{i}" for i in range(100)],
+        "a c": [f"BV{i}" for i in range(100)],          # 与 "a b" 完全重叠，只保留探测页
+        "x": [f"BV{i}" for i in range(1000, 1030)],
+    }
+    recorder = Cassette(str(tmp_path), mode=Cassette.RECORD)
+    nav = {"code": -101, "data": {"wbi_img": {"img_url": "https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png",
+                                              "sub_url": "https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png"}}}
+    recorder.record("nav", NAV_URL, 200, json.dumps(nav).encode("utf-8"), "utf-8")
+    for keyword, bvids in corpus.items():
+        _record_search(recorder, keyword, bvids)
+    recorder.close()
+
+    async def run(query_planner):
+        cassette = Cassette(str(tmp_path), mode=Cassette.REPLAY)
+        api = BilibiliAPI(client=HttpClient(cassette=cassette), search_mode="api", search_page_size=20,
+                          query_planner=query_planner)
+        results = await api.search_many(list(corpus), TIME_BEGIN, TIME_END, pages=range(1, 11), show_progress=False)
+        await api.client.close()
+        return results, cassette
+
+    baseline, plain = asyncio.run(run(None))
+    planner = QueryPlanner()
+    results, planned = asyncio.run(run(planner))
+    assert plain.missed == planned.missed == 0
+    assert planned.played < plain.played
+    union = set().union(*({video.bvid for video in videos} for videos in results.values()))
+    assert union == set().union(*({video.bvid for video in videos} for videos in baseline.values()))
+    assert len(results["a c"]) == 20
+    assert planner.stats()["dropped"] == 1
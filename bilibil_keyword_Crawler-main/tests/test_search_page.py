@@ -0,0 +1,68 @@
+import time
+
+from bil_search_page import extract_video_info, iter_video_records, parse_search_records, slice_result_array
+
+SEARCH_URL = "https://search.bilibili.com/video?keyword=test&page=1"
+
+ARRAY = (
+    r'[{type:"video",bvid:"BV1",title:"a {x} b",author:"u},{v",description:"含有 } 和 {",play:5,review:1},'
+    r'{type:"video",bvid:"BV2",title:"say \"hi\", ok",description:"路径 c:\\",like:3,video_review:9,'
+    r'hit_columns:["title","{"],review:2},'
+    r'{type:"video",bvid:"BV3",title:"x",favorites:4}]'
+)
+
+
+def _page(array, tail=",show_column:a}"):
+    return ('<html><body><p>说明 "未闭合的引号</p><script>window.__pinia={numResults:3,numPages:1,'
+            'egg_hit:a,result:' + array + tail + '</script></body></html>')
+
+
+def test_braces_and_escaped_quotes_in_strings_do_not_split_records():
+    records = list(iter_video_records(ARRAY))
+    assert [record.bvid for record in records] == ["BV1", "BV2", "BV3"]
+    assert records[0].title == "a {x} b"
+    assert records[0].author == "u},{v"
+    assert records[0].description == "含有 } 和 {"
+    assert records[1].title == 'say "hi", ok'
+    assert records[1].description == "路径 c:\\"
+
+
+def test_field_values_and_key_prefixes():
+    first, second, third = extract_video_info(ARRAY)
+    assert first["播放量"] == "5" and first["评论数"] == "1"
+    # video_review 不是 review
+    assert second["评论数"] == "2" and second["点赞数"] == "3"
+    assert third["收藏数"] == "4" and third["播放量"] == "N/A"
+
+
+def test_nested_objects_do_not_shadow_fields():
+    array = r'[{bvid:"BV1",extra:{title:"嵌套",review:7,inner:{play:8}},title:"顶层",review:2,play:1}]'
+    record, = iter_video_records(array)
+    assert (record.title, record.review, record.play) == ("顶层", "2", "1")
+
+
+def test_pubdate_and_keyword_highlight():
+    array = (r'[{bvid:"BV1",title:"\u003Cem class=\"keyword\"\u003E关键词\u003C\u002Fem\u003E第1个",'
+             r'pubdate:1714000000}]')
+    record, = iter_video_records(array)
+    assert record.title == "关键词第1个"
+    assert record.pubdate == time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(1714000000))
+
+
+def test_records_without_bvid_are_skipped():
+    assert [record.bvid for record in iter_video_records(r'[{title:"无BV号"},{bvid:"",title:"空"},{bvid:"BV9"}]')] \
+        == ["BV9"]
+
+
+def test_parse_search_records_reads_array_from_page():
+    page = _page(ARRAY)
+    records, meta = parse_search_records(page, SEARCH_URL)
+    assert [record.bvid for record in records] == ["BV1", "BV2", "BV3"]
+    assert meta == {"num_results": 3, "num_pages": 1}
+    assert slice_result_array(page) == ARRAY
+
+
+def test_parse_search_records_ignores_content_after_the_array():
+    page = _page(ARRAY, tail=r',show_column:a,other:[{bvid:"BV_OTHER"}]}')
+    records, _ = parse_search_records(page, SEARCH_URL)
+    assert [record.bvid for record in records] == ["BV1", "BV2", "BV3"]
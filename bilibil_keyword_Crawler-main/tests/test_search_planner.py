@@ -0,0 +1,179 @@
+import asyncio
+import random
+
+from search_planner import PageFetchError, Pager, WindowPlanner
+
+
+class FakeSearch:
+    """
+    模拟搜索接口：结果按固定顺序排列，按时间窗口筛选后分页，结果总数最多返回 result_cap、总页数最多 max_pages
+    fail 中的 (begin_ts, page) 请求失败 fail_times 次
+    """
+
+    def __init__(self, items, page_size=20, result_cap=100, max_pages=5, with_meta=True, fail=(), fail_times=1):
+        self.items = items
+        self.page_size = page_size
+        self.result_cap = result_cap
+        self.max_pages = max_pages
+        self.with_meta = with_meta
+        self.failures = {key: fail_times for key in fail}
+        self.calls = []
+
+    async def __call__(self, window, page):
+        self.calls.append((window["begin_ts"], window["end_ts"], page))
+        key = (window["begin_ts"], page)
+        if self.failures.get(key):
+            self.failures[key] -= 1
+            raise PageFetchError("请求失败")
+        hits = [item for item in self.items
+                if window["begin_ts"] is None or window["begin_ts"] <= item[1] <= window["end_ts"]]
+        videos = hits[(page - 1) * self.page_size:page * self.page_size]
+        if not self.with_meta:
+            return videos, None
+        num_pages = min(-(-len(hits) // self.page_size), self.max_pages)
+        return videos, {"num_results": min(len(hits), self.result_cap), "num_pages": num_pages}
+
+
+def _items(count, span=100000, seed=1):
+    rng = random.Random(seed)
+    return [(f"BV{i}", rng.randint(0, span)) for i in range(count)]
+
+
+def _bvids(units):
+    return {bvid for _, _, videos in units for bvid, _ in videos}
+
+
+WINDOW = {"begin_ts": 0, "end_ts": 100000, "label": "全部"}
+
+
+def test_pager_stops_at_num_pages_and_skips_missing_pages():
+    search = FakeSearch(_items(45))
+    pager = Pager(page_size=20)
+    units = asyncio.run(pager.run(WINDOW, range(1, 11), search))
+    assert [page for _, page, _ in units] == [1, 2, 3]
+    assert len(_bvids(units)) == 45
+    assert pager.stats()["skipped"] == 7
+    assert pager.stops == {Pager.NUM_PAGES: 1}
+
+
+def test_pager_trusts_num_pages_over_short_pages():
+    # 去重后每页不足 page_size，但总页数显示后面还有页
+    items = _items(100)
+    search = FakeSearch(items, page_size=20, max_pages=10)
+    pager = Pager(page_size=25)
+    units = asyncio.run(pager.run(WINDOW, range(1, 11), search))
+    assert len(units) == 5
+    assert len(_bvids(units)) == 100
+
+
+def test_pager_without_meta_stops_at_short_page():
+    search = FakeSearch(_items(45), with_meta=False)
+    pager = Pager(page_size=20)
+    units = asyncio.run(pager.run(WINDOW, range(1, 11), search))
+    assert [page for _, page, _ in units] == [1, 2, 3]
+    assert len(search.calls) == 3
+    assert pager.stops == {Pager.SHORT_PAGE: 1}
+
+
+def test_pager_without_meta_stops_at_empty_page():
+    search = FakeSearch(_items(40), with_meta=False)
+    pager = Pager(page_size=20)
+    asyncio.run(pager.run(WINDOW, range(1, 11), search))
+    assert len(search.calls) == 3
+    assert pager.stops == {Pager.EMPTY_PAGE: 1}
+
+
+def test_pager_retries_a_failed_page():
+    search = FakeSearch(_items(45), fail=[(0, 1)])
+    pager = Pager(page_size=20, retries=1)
+    units = asyncio.run(pager.run(WINDOW, range(1, 11), search))
+    assert len(_bvids(units)) == 45
+    assert pager.failed == 0
+    assert pager.requests == 4
+
+
+def test_pager_failed_first_page_is_not_an_empty_page():
+    search = FakeSearch(_items(45), fail=[(0, 1)], fail_times=5)
+    pager = Pager(page_size=20, retries=1)
+    units = asyncio.run(pager.run(WINDOW, range(1, 11), search))
+    assert units == []
+    assert pager.failed == 1
+    assert pager.stops == {Pager.FAILED: 1}
+
+
+def test_pager_skips_a_failed_middle_page_and_keeps_paging():
+    search = FakeSearch(_items(100), with_meta=False, fail=[(0, 2)], fail_times=5)
+    pager = Pager(page_size=20, retries=1)
+    units = asyncio.run(pager.run(WINDOW, range(1, 11), search))
+    assert [page for _, page, _ in units] == [1, 3, 4, 5, 6]
+    assert pager.failed == 1
+    assert pager.stops == {Pager.EMPTY_PAGE: 1}
+
+
+def test_pager_collect_false_keeps_nothing():
+    pager = Pager(page_size=20)
+    assert asyncio.run(pager.run(WINDOW, range(1, 11), FakeSearch(_items(45)), collect=False)) == []
+    assert pager.requests == 3
+
+
+def test_window_planner_bisects_truncated_windows_until_covered():
+    items = _items(700)
+    search = FakeSearch(items)
+    planner = WindowPlanner(result_cap=100, min_window=1000)
+    units = asyncio.run(planner.search(WINDOW, 5, search, Pager(page_size=20)))
+    assert _bvids(units) == {bvid for bvid, _ in items}
+    assert planner.splits > 0
+    # 子窗口互不重叠且覆盖父窗口
+    leaves = sorted({(unit[0]["begin_ts"], unit[0]["end_ts"]) for unit in units if unit[0] is not WINDOW})
+    assert leaves[0][0] == 0 and leaves[-1][1] == 100000
+
+
+def test_window_planner_does_not_split_small_windows():
+    search = FakeSearch(_items(30))
+    planner = WindowPlanner(result_cap=100, min_window=1000)
+    units = asyncio.run(planner.search(WINDOW, 5, search, Pager(page_size=20)))
+    assert planner.splits == 0
+    assert len(_bvids(units)) == 30
+    assert len(search.calls) == 2
+
+
+def test_window_planner_keeps_parent_first_page_results():
+    items = _items(700)
+    planner = WindowPlanner(result_cap=100, min_window=1000)
+    units = asyncio.run(planner.search(WINDOW, 5, FakeSearch(items), Pager(page_size=20)))
+    assert (WINDOW, 1) in [(unit[0], unit[1]) for unit in units]
+
+
+def test_window_planner_reuses_parent_page_inside_child_window():
+    # 按发布时间倒序排列时，父窗口第1页全部落在后半个子窗口内
+    items = sorted(_items(700), key=lambda item: -item[1])
+    plain = FakeSearch(items)
+    reusing = FakeSearch(items)
+    baseline = asyncio.run(WindowPlanner(result_cap=100, min_window=20000).search(WINDOW, 5, plain, Pager(page_size=20)))
+    planner = WindowPlanner(result_cap=100, min_window=20000)
+    units = asyncio.run(planner.search(WINDOW, 5, reusing, Pager(page_size=20), published_at=lambda item: item[1]))
+    assert planner.reused > 0
+    assert len(reusing.calls) < len(plain.calls)
+    assert _bvids(units) == _bvids(baseline)
+
+
+def test_window_planner_counts_failed_first_page():
+    search = FakeSearch(_items(700), fail=[(0, 1)], fail_times=5)
+    planner = WindowPlanner(result_cap=100, min_window=1000)
+    units = asyncio.run(planner.search(WINDOW, 5, search, Pager(page_size=20, retries=1)))
+    assert units == []
+    assert planner.stats()["failed"] == 1
+    assert planner.splits == 0
+
+
+def test_window_planner_caps_depth_and_requests():
+    search = FakeSearch(_items(700))
+    planner = WindowPlanner(result_cap=100, min_window=1000, max_depth=1)
+    asyncio.run(planner.search(WINDOW, 5, search, Pager(page_size=20)))
+    assert planner.splits == 1
+    assert planner.capped == 2
+
+    planner = WindowPlanner(result_cap=100, min_window=1000, max_requests=4)
+    asyncio.run(planner.search(WINDOW, 5, FakeSearch(_items(700)), Pager(page_size=20)))
+    assert planner.split_requests <= 4
+    assert planner.splits == 2
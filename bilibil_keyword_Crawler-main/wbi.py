@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+import time
+from functools import reduce
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+
+NAV_URL = "https://api.bilibili.com/x/web-interface/nav"
+
+# img_key + sub_key 按该表重排后取前32位得到 mixin_key
+MIXIN_KEY_ENC_TAB = [
+    46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+    33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+    61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+    36, 20, 34, 44, 52
+]
+
+# 签名前需要从参数值中去掉的字符
+_FILTERED_CHARS = "!'()*"
+
+
+def get_mixin_key(img_key, sub_key) -> str:
+    """由 nav 接口返回的 img_key 与 sub_key 计算 mixin_key"""
+    orig = img_key + sub_key
+    return reduce(lambda s, i: s + orig[i], MIXIN_KEY_ENC_TAB, "")[:32]
+
+
+def key_from_url(url) -> str:
+    """从 wbi_img 中的图片URL取出文件名(不含扩展名)作为密钥"""
+    return url.rsplit("/", 1)[-1].split(".", 1)[0]
+
+
+def sign_params(params, mixin_key, wts=None) -> Dict[str, str]:
+    """
+    为请求参数添加WBI签名
+
+    Args:
+        params: 请求参数字典
+        mixin_key: get_mixin_key 计算得到的密钥
+        wts: 签名时间戳，默认为当前时间
+
+    Returns:
+        添加了 wts 与 w_rid 的新参数字典(按参数名排序)，可直接 urlencode 拼接到URL
+    """
+    signed = dict(params)
+    signed["wts"] = int(time.time()) if wts is None else wts
+    signed = {
+        key: "".join(ch for ch in str(value) if ch not in _FILTERED_CHARS)
+        for key, value in sorted(signed.items())
+    }
+    query = urlencode(signed)
+    signed["w_rid"] = hashlib.md5((query + mixin_key).encode()).hexdigest()
+    return signed
+
+
+class WbiSigner:
+    """
+    WBI签名器
+    从 nav 接口获取 img_key/sub_key 并缓存 mixin_key，密钥每天轮换，超过 ttl 后重新获取；
+    通过共享的 HttpClient 请求，录制/回放、遥测与限速对其同样生效
+    """
+
+    def __init__(self, client, ttl=3600):
+        """
+        Args:
+            client: HttpClient 实例
+            ttl: mixin_key 缓存时长(秒)
+        """
+        self.client = client
+        self.ttl = ttl
+        self._mixin_key: Optional[str] = None
+        self._fetched_at = 0.0
+        # 在事件循环内延迟创建，允许在事件循环启动前构造签名器
+        self._lock = None
+
+    async def mixin_key(self, cookies=None) -> str:
+        """返回当前的 mixin_key，过期时重新请求 nav 接口，并发调用只会请求一次"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._mixin_key is None or time.monotonic() - self._fetched_at > self.ttl:
+                # 未登录时 nav 返回业务码 -101，但 wbi_img 仍然有效
+                data = await self.client.get_json(NAV_URL, cookies=cookies, endpoint="nav", check_code=False)
+                wbi_img = (data.get("data") or {}).get("wbi_img") or {}
+                if not wbi_img.get("img_url") or not wbi_img.get("sub_url"):
+                    raise ValueError("nav 接口未返回 wbi_img")
+                self._mixin_key = get_mixin_key(key_from_url(wbi_img["img_url"]), key_from_url(wbi_img["sub_url"]))
+                self._fetched_at = time.monotonic()
+            return self._mixin_key
+
+    async def sign(self, params, cookies=None) -> Dict[str, str]:
+        """返回带 wts 与 w_rid 签名的参数字典"""
+        return sign_params(params, await self.mixin_key(cookies))
+
+    def invalidate(self):
+        """签名被拒(如业务码 -403)时清除缓存，下次签名重新获取密钥"""
+        self._mixin_key = None